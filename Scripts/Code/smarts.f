@@ -30,7 +30,26 @@ C***    Consult the User's Manual for details and explanations
 C***      about the INPUT data cards and OUTPUT files!
 C
 C
-c      Program SMARTS_295
+      Program SMARTS_295
+      INTEGER Istat(1),Nstat,Nspec,Ierr
+      REAL Spec(1)
+      CALL SMARTS295(' ',' ',Istat,1,Nstat,Spec,1,Nspec,Ierr)
+      END
+c
+c      Main model routine, also called in-process from the Python
+c      extension built with f2py (see Makefile, target engine).
+c      Root: folder of Gases, Solar, Albedo and CIE_data (blank for
+c      the current folder). Deck: text of the input cards, one card
+c      per line; if blank the cards are read from data.inp.txt and the
+c      results are written to data.out.txt and data.ext.txt as before.
+c      Otherwise the status of each Card 17a record (Istat: 1 solved,
+c      0 Sun below the horizon) and the spectra (Spec: wavelength and
+c      the Card 12c outputs of each wavelength, same as the unformatted
+c      data.ext.txt) are returned, with Nstat records and Nspec values.
+c      Ierr=1 if Spec is too small (Nspec is then the size needed).
+c
+      SUBROUTINE SMARTS295(Root,Deck,Istat,Mstat,Nstat,Spec,Mspec,
+     1 Nspec,Ierr)
 c
       Double Precision TO3,TAUZ3,DIR,DIF0,DIF,GLOB,GLOBS,DIRH,FHTO,rocb
       Double Precision DIRS,DIFS,DIREXP,DIFEXP,DGRND,HT,DRAY,TH2O,TH2OP
@@ -69,12 +88,20 @@ c
       CHARACTER*100 FileIn,FileOut,FileExt,FileScn, Usernm
       CHARACTER*64 AEROS, Spctrm, Comnt
       Character*48 dummy, smart
+      CHARACTER*(*) Root,Deck
+      CHARACTER*256 Card
+      INTEGER Mstat,Nstat,Mspec,Nspec,Ierr,Istat(Mstat)
+      REAL Spec(Mspec)
+      DOUBLE PRECISION Tabv(17)
+      LOGICAL Engine
+      COMMON /Cards/ Ipos
       Character*24 Filen1, Filen2, Lambr1, Lambr2
       CHARACTER*24 Load
       Character*24 Out(54), Seasn2
       Character*12 Filter
       CHARACTER*6 SEASON, Area
       CHARACTER*4 Atmos, YesNo
+      CHARACTER*8 Binary
 
       COMMON /SOLAR1/ WV,WLMN,wlmx,WV1,WV2
       COMMON /SOLAR2/ BNORM,GLOBH,GLOBT,DIRX,ETSPCT
@@ -195,6 +222,21 @@ c      RANGE1=1./340.85
       FileOut='smarts295.out.txt'
       FileExt='smarts295.ext.txt'
       FileScn='smarts295.scn.txt'
+c
+c      SMARTS_BINARY=1 writes the extended output file as unformatted
+c      stream (real*4) records without header
+c
+      Binary=' '
+      CALL GET_ENVIRONMENT_VARIABLE('SMARTS_BINARY',Binary)
+c
+c      In-process run: cards from Deck, results in Istat and Spec
+c
+      Engine=LEN_TRIM(Deck).GT.0
+      Ipos=1
+      Nstat=0
+      Nspec=0
+      Ierr=0
+      CALL TABRST(Root)
 C
 C
 C      Files (some with User-defined filenames)
@@ -237,58 +279,62 @@ c**********************************************************************
 c
 c
  3003 continue
-      OPEN (UNIT=14,FILE=FileIn,STATUS='OLD')
+      IF(.NOT.Engine)OPEN (UNIT=14,FILE=FileIn,STATUS='OLD')
+      IF(Engine)FileOut='/dev/null'
       OPEN (UNIT=16,FILE=FileOut)
-      OPEN (UNIT=22,FILE='Gases/Abs_O2.dat',STATUS='OLD')
-      OPEN (UNIT=25,FILE='Gases/Abs_O4.dat',STATUS='OLD')
-      OPEN (UNIT=26,FILE='Gases/Abs_N2.dat',STATUS='OLD')
-      OPEN (UNIT=27,FILE='Gases/Abs_N2O.dat',STATUS='OLD')
-      OPEN (UNIT=28,FILE='Gases/Abs_NO.dat',STATUS='OLD')
-      OPEN (UNIT=29,FILE='Gases/Abs_NO2.dat',STATUS='OLD')
-      OPEN (UNIT=30,FILE='Gases/Abs_NO3.dat',STATUS='OLD')
-      OPEN (UNIT=31,FILE='Gases/Abs_HNO3.dat',STATUS='OLD')
-      OPEN (UNIT=32,FILE='Gases/Abs_SO2U.dat',STATUS='OLD')
-      OPEN (UNIT=33,FILE='Gases/Abs_SO2I.dat',STATUS='OLD')
-      OPEN (UNIT=34,FILE='Gases/Abs_CO.dat',STATUS='OLD')
-      OPEN (UNIT=35,FILE='Gases/Abs_CO2.dat',STATUS='OLD')
-      OPEN (UNIT=36,FILE='Gases/Abs_CH4.dat',STATUS='OLD')
-      OPEN (UNIT=37,FILE='Gases/Abs_NH3.dat',STATUS='OLD')
-      OPEN (UNIT=38,FILE='Gases/Abs_BrO.dat',STATUS='OLD')
-      OPEN (UNIT=39,FILE='Gases/Abs_CH2O.dat',STATUS='OLD')
-      OPEN (UNIT=40,FILE='Gases/Abs_HNO2.dat',STATUS='OLD')
-      OPEN (UNIT=41,FILE='Gases/Abs_ClNO.dat',STATUS='OLD')
-      read(22,*)dummy
-      read(25,*)dummy
-      read(26,*)dummy
-      read(27,*)dummy
-      read(28,*)dummy
-      read(29,*)dummy
-      read(30,*)dummy
-      read(31,*)dummy
-      read(32,*)dummy
-      read(33,*)dummy
-      read(34,*)dummy
-      read(35,*)dummy
-      read(36,*)dummy
-      read(37,*)dummy
-      read(38,*)dummy
-      read(39,*)dummy
-      read(40,*)dummy
-      read(41,*)dummy
+      CALL TABOPN(22,'Gases/Abs_O2.dat','C','RR')
+      CALL TABOPN(25,'Gases/Abs_O4.dat','C','RR')
+      CALL TABOPN(26,'Gases/Abs_N2.dat','C','RR')
+      CALL TABOPN(27,'Gases/Abs_N2O.dat','C','RR')
+      CALL TABOPN(28,'Gases/Abs_NO.dat','C','RR')
+      CALL TABOPN(29,'Gases/Abs_NO2.dat','C','RRR')
+      CALL TABOPN(30,'Gases/Abs_NO3.dat','C','RRR')
+      CALL TABOPN(31,'Gases/Abs_HNO3.dat','C','RRR')
+      CALL TABOPN(32,'Gases/Abs_SO2U.dat','C','RRR')
+      CALL TABOPN(33,'Gases/Abs_SO2I.dat','C','RR')
+      CALL TABOPN(34,'Gases/Abs_CO.dat','C','RR')
+      CALL TABOPN(35,'Gases/Abs_CO2.dat','C','RR')
+      CALL TABOPN(36,'Gases/Abs_CH4.dat','C','RR')
+      CALL TABOPN(37,'Gases/Abs_NH3.dat','C','RR')
+      CALL TABOPN(38,'Gases/Abs_BrO.dat','C','RR')
+      CALL TABOPN(39,'Gases/Abs_CH2O.dat','C','RRR')
+      CALL TABOPN(40,'Gases/Abs_HNO2.dat','C','RR')
+      CALL TABOPN(41,'Gases/Abs_ClNO.dat','C','RRRR')
+      CALL TABSKP(22)
+      CALL TABSKP(25)
+      CALL TABSKP(26)
+      CALL TABSKP(27)
+      CALL TABSKP(28)
+      CALL TABSKP(29)
+      CALL TABSKP(30)
+      CALL TABSKP(31)
+      CALL TABSKP(32)
+      CALL TABSKP(33)
+      CALL TABSKP(34)
+      CALL TABSKP(35)
+      CALL TABSKP(36)
+      CALL TABSKP(37)
+      CALL TABSKP(38)
+      CALL TABSKP(39)
+      CALL TABSKP(40)
+      CALL TABSKP(41)
 C
 C***      CARD 1
 C
-      READ(14,*) COMNT
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) COMNT
 C
 C***      CARD 2
 C
-      READ(14,*) ISPR
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) ISPR
       IF(ISPR.EQ.1)GOTO 301
       IF(ISPR.EQ.2)GOTO 302
 C
 C***      CARD 2a if ISPR=0
 C
-      READ(14,*) SPR
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) SPR
       if(spr.ge.265.)goto 298
       if(spr.ge.4e-3)goto 299
       spr=4.1e-4
@@ -320,7 +366,8 @@ C
 C
 C***      CARD 2a if ISPR=1 *** "Height" input added in 2.9.3 ***
 C
-      READ(14,*)SPR,Altit, Height
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)SPR,Altit, Height
       Zalt=Altit+Height
       if(Zalt.le.100.)goto 300
       write(16,1599)
@@ -331,7 +378,8 @@ C
 C
 C***      CARD 2a if ISPR=2 *** Height added in 2.9.3 ***
 C
-      READ(14,*)Latit,Altit, Height
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)Latit,Altit, Height
       Zalt=Altit+Height
       alati=abs(latit)
       if(Zalt.le.100.)goto 281
@@ -358,16 +406,20 @@ c      ZAlt2=Zalt*Zalt
 C
 C***      CARD 3
 C
-      READ(14,*) iAtmos
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) iAtmos
 C
 C***      CARD 3a
 C
-      IF(iAtmos.EQ.0)READ(14,*)TAIR,RH,SEASON,TDAY
-      IF(iAtmos.EQ.1)READ(14,*)Atmos
+      IF(iAtmos.EQ.0)CALL CARDRD(Deck,Card,Ieof)
+      IF(iAtmos.EQ.0)READ(Card,*)TAIR,RH,SEASON,TDAY
+      IF(iAtmos.EQ.1)CALL CARDRD(Deck,Card,Ieof)
+      IF(iAtmos.EQ.1)READ(Card,*)Atmos
 C
 C***      CARD 4
 C
-      READ(14,*) IH2O
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) IH2O
 C      
  311  continue
       IF(iAtmos.NE.1)GOTO 320
@@ -455,7 +507,8 @@ C
 C
 C***      CARD 4a if IH2O=0
 C
-      READ(14,*)W
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)W
 C
  328  CONTINUE
       if(w.le.12.)goto 327
@@ -466,8 +519,8 @@ C
       goto 998      
  327  continue
       if(w.le.0.)goto 776
-      OPEN (UNIT=21,FILE='Gases/Abs_H2O.dat',STATUS='OLD')
-      read(21,*)dummy
+      CALL TABOPN(21,'Gases/Abs_H2O.dat','C','RRIIRRRIRRRIRRRRR')
+      CALL TABSKP(21)
  776  continue
       TEMPO=TEMPA
       TEMPN=TEMPA
@@ -477,7 +530,8 @@ C
       IALT=0
       Thick=1.
  329  continue
-      READ(14,*)IO3
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)IO3
       IF(IO3.ne.1)GOTO 331
       IF(iAtmos.ne.0)goto 348
       Call RefAtm(Zalt,dum1,dum2,dum3,O3ref,dum5,dum6,dum7,1)
@@ -485,21 +539,22 @@ C
  348  continue
       AbO3=O3REF
       UOC=AbO3
-      OPEN (UNIT=23,FILE='Gases/Abs_O3UV.dat',STATUS='OLD')
-      OPEN (UNIT=24,FILE='Gases/Abs_O3IR.dat',STATUS='OLD')
-      read(23,*)dummy
-      read(24,*)dummy
+      CALL TABOPN(23,'Gases/Abs_O3UV.dat','C','RRRR')
+      CALL TABOPN(24,'Gases/Abs_O3IR.dat','C','RD')
+      CALL TABSKP(23)
+      CALL TABSKP(24)
       goto 335
 C
 C***      CARD 5a if IO3=0
 C
  331  continue
-      READ(14,*) IALT,AbO3
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) IALT,AbO3
       if(AbO3.le.0.)goto 335
-      OPEN (UNIT=23,FILE='Gases/Abs_O3UV.dat',STATUS='OLD')
-      OPEN (UNIT=24,FILE='Gases/Abs_O3IR.dat',STATUS='OLD')
-      read(23,*)dummy
-      read(24,*)dummy
+      CALL TABOPN(23,'Gases/Abs_O3UV.dat','C','RRRR')
+      CALL TABOPN(24,'Gases/Abs_O3IR.dat','C','RD')
+      CALL TABSKP(23)
+      CALL TABSKP(24)
 C
 C      OZONE TOTAL COLUMN CORRECTION FITTED FROM REF. ATM.
 C      
@@ -544,13 +599,15 @@ C***      CARD 6 - Modified in 2.9! Now refers to gaseous pollution...
 C
       Load='STANDARD'
 c
-      READ(14,*)IGAS
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)IGAS
       IF(IGAS.EQ.1)GOTO 340
 C
 C***CARD 6a if      IGAS=0 - Changed in 2.9! Now inputs gaseous overload
 c      in the lower 1-km pollution layer (in ppmv)
 C
-      READ(14,*)iLoad
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)iLoad
       Load='USER-DEFINED'
       ApCH2O=-.003
       ApCH4=0.
@@ -629,7 +686,8 @@ c
 c
 C***      CARD 6b - If iLoad = 0 --- New in 2.9
 c
-      if(iLoad.eq.0)Read(14,*)ApCH2O,ApCH4,ApCO,ApHNO2,ApHNO3,
+      if(iLoad.eq.0)CALL CARDRD(Deck,Card,Ieof)
+      if(iLoad.eq.0)Read(Card,*)ApCH2O,ApCH4,ApCO,ApHNO2,ApHNO3,
      3 ApNO,ApNO2,ApNO3,ApO3,ApSO2
 c
 c      Conversion from ppmv to atm-cm
@@ -649,43 +707,37 @@ C
 C
 C***      CARD 7 - Changed in 2.9!! Input CO2 concentration (ppmv)
 C
-      READ(14,*) qCO2
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) qCO2
 c
 C***      CARD 7a - Changed in 2.9!! Choose ET spectrum
 C
-      READ(14,*)Ispctr
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)Ispctr
       
       if(Ispctr.lt.-1.or.Ispctr.gt.8)Ispctr=0
-      if(ispctr.eq.-1)OPEN (UNIT=15,FILE='Solar/Spctrm_U.dat',
-     1 STATUS='OLD')
-      if(ispctr.eq.0)OPEN (UNIT=15,FILE='Solar/Spctrm_0.dat',
-     1 STATUS='OLD')
-      if(ispctr.eq.1)OPEN (UNIT=15,FILE='Solar/Spctrm_1.dat',
-     1 STATUS='OLD')
-      if(ispctr.eq.2)OPEN (UNIT=15,FILE='Solar/Spctrm_2.dat',
-     1 STATUS='OLD')
-      if(ispctr.eq.3)OPEN (UNIT=15,FILE='Solar/Spctrm_3.dat',
-     1 STATUS='OLD')
-      if(ispctr.eq.4)OPEN (UNIT=15,FILE='Solar/Spctrm_4.dat',
-     1 STATUS='OLD')
-      if(ispctr.eq.5)OPEN (UNIT=15,FILE='Solar/Spctrm_5.dat',
-     1 STATUS='OLD')
-      if(ispctr.eq.6)OPEN (UNIT=15,FILE='Solar/Spctrm_6.dat',
-     1 STATUS='OLD')
-      if(ispctr.eq.7)OPEN (UNIT=15,FILE='Solar/Spctrm_7.dat',
-     1 STATUS='OLD')
-      if(ispctr.eq.8)OPEN (UNIT=15,FILE='Solar/Spctrm_8.dat',
-     1 STATUS='OLD')
+      if(ispctr.eq.-1)CALL TABOPN(15,'Solar/Spctrm_U.dat','CR','IR')
+      if(ispctr.eq.0)CALL TABOPN(15,'Solar/Spctrm_0.dat','CR','IR')
+      if(ispctr.eq.1)CALL TABOPN(15,'Solar/Spctrm_1.dat','CR','IR')
+      if(ispctr.eq.2)CALL TABOPN(15,'Solar/Spctrm_2.dat','CR','IR')
+      if(ispctr.eq.3)CALL TABOPN(15,'Solar/Spctrm_3.dat','CR','IR')
+      if(ispctr.eq.4)CALL TABOPN(15,'Solar/Spctrm_4.dat','CR','IR')
+      if(ispctr.eq.5)CALL TABOPN(15,'Solar/Spctrm_5.dat','CR','IR')
+      if(ispctr.eq.6)CALL TABOPN(15,'Solar/Spctrm_6.dat','CR','IR')
+      if(ispctr.eq.7)CALL TABOPN(15,'Solar/Spctrm_7.dat','CR','IR')
+      if(ispctr.eq.8)CALL TABOPN(15,'Solar/Spctrm_8.dat','CR','IR')
 c
 C
 C***      CARD 8
 C
-      READ(14,*) AEROS
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) AEROS
       IF(AEROS.NE.'USER')GOTO 350
 C
 C***      CARD 8a if AEROS='USER'
 C
-      READ(14,*) ALPHA1,ALPHA2,OMEGL,GG
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) ALPHA1,ALPHA2,OMEGL,GG
       IAER=0
       GOTO 355
 C
@@ -800,7 +852,8 @@ C
 C***      CARD 9
 C
  355  continue
-      READ(14,*) ITURB
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) ITURB
 C
 C      SELECT THE APPROPRIATE TURBIDITY INPUT
 C
@@ -819,28 +872,32 @@ C
 C
 C***      CARD 9a if ITURB=0
 C
-      READ(14,*)TAU5
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)TAU5
       if(Zalt.ge.6.)tau5=t500mn
       GOTO 359
 C
 C***      CARD 9a if ITURB=1
 C
  351  continue
-      READ(14,*) BETA
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) BETA
       TAU5=BETA/(0.5**ALPHA2)
       GOTO 359
  352  CONTINUE
 C
 C***      CARD 9a if ITURB=2
 C
-      READ(14,*)BCHUEP
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)BCHUEP
       TAU5=BCHUEP*2.302585
       goto 359
 C
 C***      CARD 9a if ITURB=5 *** Added in 2.9.3 ***
 C
  3560 continue
-      READ(14,*) Tau550
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) Tau550
       TAU5=Tau550*(1.1**ALPHA2)
  359  CONTINUE
       if(zalt.ge.6.)goto 357
@@ -880,14 +937,16 @@ C
 C
 C***      CARD 9a if ITURB=4
 C
-      READ(14,*)VISI
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)VISI
       RANGE=1.306*VISI
       GOTO 356
  353  CONTINUE
 C
 C***      CARD 9a if ITURB=3
 C
-      READ(14,*)RANGE
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)RANGE
  356  CONTINUE
 C
 C      FIT BASED ON MODTRAN4 - Modified in 2.9.2
@@ -1021,7 +1080,8 @@ C
 c
 C***      CARD 10
 C
-      Read(14,*) Ialbdx
+      CALL CARDRD(Deck,Card,Ieof)
+      Read(Card,*) Ialbdx
       Rhox=0.2
       If(Ialbdx.lt.0)goto 383
       Call Albdat(Ialbdx,Nwal1,Filen1,Lambr1,Wvla1,Albdo1)
@@ -1030,13 +1090,15 @@ C
 C***      CARD 10a
 C
  383  continue
-      READ(14,*) Rhox
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) Rhox
       
  384  Continue
 C
 C***      CARD 10b
 C      
-      Read(14,*)Itilt
+      CALL CARDRD(Deck,Card,Ieof)
+      Read(Card,*)Itilt
       Tilt=0.
       Rhog=0.
       Wazim=0.
@@ -1049,14 +1111,16 @@ C
 C
 C***      CARD 10c
 C      
-      Read(14,*)Ialbdg,TILT,WAZIM
+      CALL CARDRD(Deck,Card,Ieof)
+      Read(Card,*)Ialbdg,TILT,WAZIM
 c      
       Rhog=Rhox
       If(Ialbdg.ge.0)Goto 385
 C
 C***      CARD 10d
 C      
-      Read(14,*)Rhog
+      CALL CARDRD(Deck,Card,Ieof)
+      Read(Card,*)Rhog
 c      
       Goto 389
  385  Continue
@@ -1068,7 +1132,8 @@ c
 C
 C***      CARD 11 - Modified in 2.9
 C
-      READ(14,*)WLMN,WLMX,Suncor,SolarC
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)WLMN,WLMX,Suncor,SolarC
       
       If(Ialbdx.ge.0.and.Ialbdx.ne.2)
      2  Call Albchk(Nwal1,Filen1,Wvla1,Albdo1,.001*wlmn,.001*wlmx)
@@ -1078,26 +1143,37 @@ C
 C
 C***      CARD 12
 C
-      READ(14,*) IPRT
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) IPRT
       IF(IPRT.EQ.0) GOTO 392
 C
 C***      CARD 12a if IPRT=1 TO 3 - Modified in 2.9
 C      
-      READ(14,*)WPMN,WPMX,INTVL
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)WPMN,WPMX,INTVL
       
       IF(INTVL.LT.0.5)WRITE(16,198)
  198  FORMAT(' *** WARNING #18 ***',/,'  Parameter INTVL on Card 12a',
      & ' is too low and will be defaulted to 0.5 nm.')
       IF(IPRT.lt.2)goto 392
+      IF(.NOT.Engine)THEN
+      IF(Binary.EQ.'1')THEN
+      OPEN(UNIT=17,FILE=FileExt,ACCESS='STREAM',FORM='UNFORMATTED',
+     1 STATUS='REPLACE')
+      ELSE
       OPEN(UNIT=17,FILE=FileExt)
+      ENDIF
+      ENDIF
 C
 C***      CARDS 12b if IPRT=2 TO 3
 C      
-      READ(14,*)IOTOT
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)IOTOT
 C
 C***      CARDS 12c if IPRT=2 TO 3
 C      
-      READ(14,*)(IOUT(i),i=1,IOTOT)
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)(IOUT(i),i=1,IOTOT)
 c
 c=======================================         
       Out(1) ='Extraterrestrial_spectrm'
@@ -1165,13 +1241,15 @@ c
 C
 C***      CARD 13
 C
-      READ(14,*) ICIRC
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) ICIRC
       
       IF(ICIRC.EQ.0)goto 401
 C
 C***      CARD 13a if ICIRC=1
 C
-      READ(14,*)slope,apert,limit
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)slope,apert,limit
       Icirc=-2
       if(apert.le.0.0.and.slope.le.0.0)goto 401
       if(apert.le.0.0.and.limit.le.0.0)goto 401
@@ -1200,45 +1278,51 @@ C
 C
 C***      CARD 14
 C
-      READ(14,*) ISCAN
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) ISCAN
 C
 C***      CARD 14a if ISCAN=1 - Modified in 2.9
 C
       FWHM=0.
       IF(ISCAN.ne.1)goto 379
-      READ(14,*)IFILT,WV1,WV2,step,FWHM
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)IFILT,WV1,WV2,step,FWHM
       OPEN (UNIT=18,FILE=FileScn,STATUS='NEW')
  379  continue
 C
 C***      CARD 15
 C
-      READ(14,*)ILLUM
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)ILLUM
       IF(ILLUM.EQ.0)GOTO 408
       If(Illum.ge.1)Goto 403
-      OPEN (UNIT=19,FILE='CIE_data/VLambda.dat',STATUS='OLD')
-      Read(19,*)dummy
+      CALL TABOPN(19,'CIE_data/VLambda.dat','C','RR')
+      CALL TABSKP(19)
 C
 C      PHOTOMETRIC DATA
 C
       DO 409 IV=1,513
-      READ(19,*)wvli,VL(IV)
+      CALL TABGET(19,Tabv,Ieof)
+      wvli=Tabv(1)
+      VL(IV)=Tabv(2)
  409  CONTINUE
       CIEYr=24
-      Close (Unit=19,status='keep')
       Goto 408
  403  continue
-      OPEN (UNIT=19,FILE='CIE_data/VMLambda.dat',STATUS='OLD')
-      Read(19,*)dummy
+      CALL TABOPN(19,'CIE_data/VMLambda.dat','C','RR')
+      CALL TABSKP(19)
       Do 404 IV=1,513
-      READ(19,*)wvli,VL(IV)
+      CALL TABGET(19,Tabv,Ieof)
+      wvli=Tabv(1)
+      VL(IV)=Tabv(2)
  404  CONTINUE
       CIEYr=88
-      Close (Unit=19,status='keep')
 C
 C***      CARD 16
 C
  408  continue
-      READ(14,*)IUV
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*)IUV
 C
 C      WAVELENGTH LIMITS MANIPULATION
 C
@@ -1306,7 +1390,8 @@ C
 C
 C***      CARD 17
 C
-      READ(14,*) IMASS
+      CALL CARDRD(Deck,Card,Ieof)
+      READ(Card,*) IMASS
       
 C
 C      SOLAR POSITION LONG DO-LOOP
@@ -1321,7 +1406,9 @@ C
 C
 C***      CARD 17a if IMASS=1
 C
-      READ(14,*,END=998)ELEV,Azim
+      CALL CARDRD(Deck,Card,Ieof)
+      IF(Ieof.ne.0)GOTO 998
+      READ(Card,*)ELEV,Azim
       Zenit=90.-ELEV
       GOTO 3
  11   CONTINUE
@@ -1331,13 +1418,17 @@ C
 C
 C***      CARD 17a if IMASS=0
 C
-      READ(14,*,END=998)Zenit,Azim
+      CALL CARDRD(Deck,Card,Ieof)
+      IF(Ieof.ne.0)GOTO 998
+      READ(Card,*)Zenit,Azim
       GOTO 3
  19   continue
 C
 C***      CARD 17a if IMASS=4
 C
-      READ(14,*,END=998) month,Latit,Dstep
+      CALL CARDRD(Deck,Card,Ieof)
+      IF(Ieof.ne.0)GOTO 998
+      READ(Card,*) month,Latit,Dstep
       iscan=0
       if(iprt.eq.2)iprt=0
       if(iprt.eq.3)iprt=1
@@ -1447,7 +1538,9 @@ c
 C
 C***      CARD 17a if IMASS=3 - Modified in 2.9
 C
-      READ(14,*,END=998)YEAR,month,DAY,HOUR,Latit,Longit,ZONE
+      CALL CARDRD(Deck,Card,Ieof)
+      IF(Ieof.ne.0)GOTO 998
+      READ(Card,*)YEAR,month,DAY,HOUR,Latit,Longit,ZONE
 c
       HourUT=Hour-Zone
       DayUT=Day
@@ -1463,9 +1556,17 @@ c
      1 Zenit,Azim,Julian,Radius,EOT,SPR,TK,Year,Month,DayUT)
  3    CONTINUE
       IF(Zenit.LE.90.)GOTO 13
+      IF(Engine.AND.Nstat.LT.Mstat)Istat(Nstat+1)=0
+      Nstat=Nstat+1
       WRITE(16,103,iostat=Ierr24)Zenit
  103  FORMAT(//,'** ERROR #7 *** Value of Zenit = ',F6.2,' is > 90 deg.'
      1 ,' RUN ABORTED!')
+c
+c      Aborted records are not counted, otherwise the initializations
+c      done only for the first record (nread=1) would be skipped
+c      when a batch deck (one Card 17a per minute) starts before sunrise
+c
+      nread=nread-1
       GOTO 898
  13   CONTINUE
       AmR=AMZ(Zenit)
@@ -1481,7 +1582,9 @@ C
 C***      CARD 17a if IMASS=2
 C
  4    continue
-      READ(14,*,END=998) AMASS
+      CALL CARDRD(Deck,Card,Ieof)
+      IF(Ieof.ne.0)GOTO 998
+      READ(Card,*) AMASS
       Azim=180.
       IF(AMASS.GT.1.0)GOTO 6
       Zenit=0.
@@ -1501,6 +1604,10 @@ C
       Write(16,109,iostat=Ierr25)Amass
  109  Format(//,'** ERROR #8 *** Value of AMASS = ',f6.2,' is > 38.2. ',
      1 'RUN ABORTED!')
+c
+c      Aborted records are not counted, same as ERROR #7
+c
+      nread=nread-1
       Goto 898
  98   continue
       ITER=0
@@ -1564,6 +1671,8 @@ c      AmN2O5=1./(ZCOS+1.0497*(Zenit**.48545)*(99.455-Zenit)**(-2.1117))
       AmPOL=1./(.0001569+.9998431*zcos*zcos)**.5
       Amdif=1.732
 c
+      IF(imass.ne.4.AND.Engine.AND.Nstat.LT.Mstat)Istat(Nstat+1)=1
+      if(imass.ne.4)Nstat=Nstat+1
       if(imass.ne.4)WRITE(16,172,iostat=Ierr26)Zenit,Azim,AmR,
      1 Real(AmH2O),AMO3,AMNO2,AmAER
  172  FORMAT(2(/,100('=')),//,'* SOLAR POSITION (deg.):',/,4x,
@@ -1965,8 +2074,7 @@ C      Start reading the selected E.T. SPECTRUM file
 C
       if(nread.gt.1)goto 787
       if(imass.eq.4.and.iday.gt.1)goto 787
-      READ(15,*)Spctrm
-      READ(15,*)ESC
+      CALL TABHDR(15,Spctrm,ESC)
       ESCC=SUNCOR*SolarC
       Scor=Escc/Esc
       Scor2=SolarC/Esc
@@ -1997,54 +2105,53 @@ c      Rewind data files for new runs
 c
       goto 788
  787  continue
-      Rewind 15
-      Rewind 22
-      Rewind 25
-      Rewind 26
-      Rewind 27
-      Rewind 28
-      Rewind 29
-      Rewind 30
-      Rewind 31
-      Rewind 32
-      Rewind 33
-      Rewind 34
-      Rewind 35
-      Rewind 36
-      Rewind 37
-      Rewind 38
-      Rewind 39
-      Rewind 40
-      Rewind 41
-      if(w.gt.0.)Rewind 21
-      if(AbO3.gt.0.)Rewind 23
-      if(AbO3.gt.0.)Rewind 24
-      read(22,*)dummy
-      read(25,*)dummy
-      read(26,*)dummy
-      read(27,*)dummy
-      read(28,*)dummy
-      read(29,*)dummy
-      read(30,*)dummy
-      read(31,*)dummy
-      read(32,*)dummy
-      read(33,*)dummy
-      read(34,*)dummy
-      read(35,*)dummy
-      read(36,*)dummy
-      read(37,*)dummy
-      read(38,*)dummy
-      read(39,*)dummy
-      read(40,*)dummy
-      read(41,*)dummy
-      if(w.gt.0.)read(21,*)dummy
-      if(AbO3.gt.0.)read(23,*)dummy
-      if(AbO3.gt.0.)read(24,*)dummy
+      CALL TABRWD(15)
+      CALL TABRWD(22)
+      CALL TABRWD(25)
+      CALL TABRWD(26)
+      CALL TABRWD(27)
+      CALL TABRWD(28)
+      CALL TABRWD(29)
+      CALL TABRWD(30)
+      CALL TABRWD(31)
+      CALL TABRWD(32)
+      CALL TABRWD(33)
+      CALL TABRWD(34)
+      CALL TABRWD(35)
+      CALL TABRWD(36)
+      CALL TABRWD(37)
+      CALL TABRWD(38)
+      CALL TABRWD(39)
+      CALL TABRWD(40)
+      CALL TABRWD(41)
+      if(w.gt.0.)CALL TABRWD(21)
+      if(AbO3.gt.0.)CALL TABRWD(23)
+      if(AbO3.gt.0.)CALL TABRWD(24)
+      CALL TABSKP(22)
+      CALL TABSKP(25)
+      CALL TABSKP(26)
+      CALL TABSKP(27)
+      CALL TABSKP(28)
+      CALL TABSKP(29)
+      CALL TABSKP(30)
+      CALL TABSKP(31)
+      CALL TABSKP(32)
+      CALL TABSKP(33)
+      CALL TABSKP(34)
+      CALL TABSKP(35)
+      CALL TABSKP(36)
+      CALL TABSKP(37)
+      CALL TABSKP(38)
+      CALL TABSKP(39)
+      CALL TABSKP(40)
+      CALL TABSKP(41)
+      if(w.gt.0.)CALL TABSKP(21)
+      if(AbO3.gt.0.)CALL TABSKP(23)
+      if(AbO3.gt.0.)CALL TABSKP(24)
 c      
 C      Start reading the selected E.T. SPECTRUM file
 C
-      READ(15,*)Spctrm
-      READ(15,*)ESC
+      CALL TABHDR(15,Spctrm,ESC)
       ESCC=SUNCOR*SolarC
       Scor=Escc/Esc
       Scor2=SolarC/Esc
@@ -2148,6 +2255,7 @@ C
      8  '       ---- TILTED PLANE ---',/)
  65   CONTINUE
       If(IPRT.lt.2) goto 5008
+      If(Binary.eq.'1'.or.Engine) goto 5008
       Write(17,113,iostat=ierr35) (Out(Iout(i)),i=1,IOTOT)
  113  Format('Wvlgth',50(1x,a24))
  5008	continue
@@ -2163,7 +2271,10 @@ C
       iF(wlmn.le.400.)WVOLD=wlmn-0.5
 c
  15   continue
-      READ (15,*,END=999) IWVLN1,H0
+      CALL TABGET(15,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 999
+      IWVLN1=NINT(Tabv(1))
+      H0=Tabv(2)
 c 
       WVLn=FLOAT(IWVLN1)/10.
       WVL=wvln/1000.
@@ -2195,8 +2306,25 @@ C
 c
       if(wvln.lt.440.0.or.w.le.0.0)goto 17
  73   continue
-      READ (21,*,END=17) wvlw,AW,iband,ifitw,bwa0,bwa1,bwa2,
-     1 ifitm,bma0,bma1,bma2,ifitmw,bmwa0,bmwa1,bmwa2,bpa1,bpa2
+      CALL TABGET(21,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 17
+      wvlw=Tabv(1)
+      AW=Tabv(2)
+      iband=NINT(Tabv(3))
+      ifitw=NINT(Tabv(4))
+      bwa0=Tabv(5)
+      bwa1=Tabv(6)
+      bwa2=Tabv(7)
+      ifitm=NINT(Tabv(8))
+      bma0=Tabv(9)
+      bma1=Tabv(10)
+      bma2=Tabv(11)
+      ifitmw=NINT(Tabv(12))
+      bmwa0=Tabv(13)
+      bmwa1=Tabv(14)
+      bmwa2=Tabv(15)
+      bpa1=Tabv(16)
+      bpa2=Tabv(17)
       if(abs(wvln-wvlw).gt.epsilm)goto 73
       IF(AW.le.0.0)GOTO 17
 c      
@@ -2316,7 +2444,10 @@ c
       TO2P=1.
       if(wvln.lt.627.0.or.WVLN.GT.1581.0)goto 801
  800  continue
-      READ (22,*,END=801) wvlo,AO2
+      CALL TABGET(22,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 801
+      wvlo=Tabv(1)
+      AO2=Tabv(2)
       if(abs(wvln-wvlo).gt.epsilm)goto 800
       IF(AO2.le.0.0)GOTO 801
       tauo2=AO2*AbO2
@@ -2331,7 +2462,10 @@ c
       If(AbCH4.le.0.)goto 853
       if(wvln.lt.1617.0)goto 853
  852  continue
-      READ (36,*,END=853) wvlo,ACH4
+      CALL TABGET(36,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 853
+      wvlo=Tabv(1)
+      ACH4=Tabv(2)
       if(abs(wvln-wvlo).gt.epsilm)goto 852
       IF(ACH4.le.0.0)GOTO 853
       Call GSCH4(ACH4,AbCH4,AmCH4,TCH4,TCH4P,amdif)
@@ -2344,7 +2478,10 @@ c
       If(AbCO.le.0.)goto 855
       if(wvln.lt.2310.0.or.wvln.gt.2405.)goto 855
  854  continue
-      READ (34,*,END=855) wvlo,ACO
+      CALL TABGET(34,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 855
+      wvlo=Tabv(1)
+      ACO=Tabv(2)
       if(abs(wvln-wvlo).gt.epsilm)goto 854
       Call GSCO(ACO,AbCO,AmCO,TCO,TCOP,amdif)
  855  continue
@@ -2355,7 +2492,10 @@ c
       TN2OP=1.
       if(wvln.lt.1950.0)goto 807
  806  continue
-      READ (27,*,END=807) wvlo,AN2O
+      CALL TABGET(27,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 807
+      wvlo=Tabv(1)
+      AN2O=Tabv(2)
       if(abs(wvln-wvlo).gt.epsilm)goto 806
       IF(AN2O.le.0.0)GOTO 807
       TN2O=exp(-(AN2O*AbN2O*AmN2O))
@@ -2368,7 +2508,10 @@ c
       TCO2P=1.
       if(wvln.lt.1036.0)goto 809
  808  continue
-      READ (35,*,END=809) wvlo,ACO2
+      CALL TABGET(35,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 809
+      wvlo=Tabv(1)
+      ACO2=Tabv(2)
       if(abs(wvln-wvlo).gt.epsilm)goto 808
       IF(ACO2.le.0.0)GOTO 809
       tauco2=ACO2*AbCO2
@@ -2382,7 +2525,10 @@ c
       TN2P=1.
       if(wvln.lt.3645.0)goto 811
  810  continue
-      READ (26,*,END=811) wvlo,AN2
+      CALL TABGET(26,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 811
+      wvlo=Tabv(1)
+      AN2=Tabv(2)
       if(abs(wvln-wvlo).gt.epsilm)goto 810
 c      IF(AN2.le.0.0)GOTO 811
       TN2=exp(-(AN2*AbN2*AmN2))
@@ -2397,7 +2543,10 @@ c
       TO4P=1.
       if(WVLN.GT.1593.0)goto 827
  826  continue
-      READ (25,*,END=827) wvlo,xsO4
+      CALL TABGET(25,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 827
+      wvlo=Tabv(1)
+      xsO4=Tabv(2)
       if(abs(wvln-wvlo).gt.epsilm)goto 826
       IF(xsO4.le.0.0)GOTO 827
       AO4=xsO4*1d-46
@@ -2415,7 +2564,11 @@ c
       If(AbHNO3.le.0.)goto 863
       if(wvln.gt.350.0)goto 863
  862  continue
-      READ (31,*,END=863) wvlo,xsHNO3,athno3
+      CALL TABGET(31,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 863
+      wvlo=Tabv(1)
+      xsHNO3=Tabv(2)
+      athno3=Tabv(3)
       if(abs(wvln-wvlo).gt.epsilm)goto 862
       Call GSHNO3(234.2,xsHNO3,athno3,AbHNO3,AmHNO3,THNO3,
      1 THNO3P,amdif)
@@ -2428,7 +2581,11 @@ c
       if(AbNO2.le.0.)goto 865
       if(wvln.gt.926.0)goto 865
  864  continue
-      READ (29,*,END=865) wvlo,xsNO2,atno2
+      CALL TABGET(29,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 865
+      wvlo=Tabv(1)
+      xsNO2=Tabv(2)
+      atno2=Tabv(3)
       if(abs(wvln-wvlo).gt.epsilm)goto 864
       Call GSNO2(TempN,xsNO2,atno2,AbNO2,AmNO2,TNO2,TNO2P,amdif)
  865  continue
@@ -2440,7 +2597,11 @@ c
       if(AbNO3.le.0.)goto 867
       if(wvln.lt.400.0.or.wvln.gt.703.0)goto 867
  866  continue
-      READ (30,*,END=867) wvlo,xsNO3,atno3
+      CALL TABGET(30,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 867
+      wvlo=Tabv(1)
+      xsNO3=Tabv(2)
+      atno3=Tabv(3)
       if(abs(wvln-wvlo).gt.epsilm)goto 866
       Call GSNO3(TempN,xsNO3,atno3,AbNO3,AmNO3,TNO3,TNO3P,amdif)
  867  continue
@@ -2452,7 +2613,10 @@ c
       If(AbNO.le.0.)goto 869
       if(wvln.lt.2645.0.or.wvln.gt.2745.)goto 869
  868  continue
-      READ (28,*,END=869) wvlo,ANO
+      CALL TABGET(28,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 869
+      wvlo=Tabv(1)
+      ANO=Tabv(2)
       if(abs(wvln-wvlo).gt.epsilm)goto 868
       Call GSNO(ANO,AbNO,AmNO,TNO,TNOP,amdif)
  869  continue
@@ -2464,7 +2628,11 @@ c
       If(AbSO2.le.0.)goto 823
       if(wvln.gt.420.0)goto 821
  820  continue
-      READ (32,*,END=821) wvlo,xsSO2,atso2
+      CALL TABGET(32,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 821
+      wvlo=Tabv(1)
+      xsSO2=Tabv(2)
+      atso2=Tabv(3)
       if(abs(wvln-wvlo).gt.epsilm)goto 820
 c      IF(xsSO2.le.0.0)GOTO 821
       Call GSSO2U(247.1,xsSO2,atso2,AbSO2,AmSO2,TSO2,TSO2P,amdif)
@@ -2474,7 +2642,10 @@ c      5b. Sulfur Dioxide (SO2) [IR band]
 c
       if(wvln.lt.3955.0)goto 823
  822  continue
-      READ (33,*,END=823) wvlo,ASO2
+      CALL TABGET(33,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 823
+      wvlo=Tabv(1)
+      ASO2=Tabv(2)
       if(abs(wvln-wvlo).gt.epsilm)goto 822
 c      IF(ASO2.le.0.0)GOTO 823
       Call GSSO2I(ASO2,AbSO2,AmSO2,TSO2,TSO2P,amdif)      
@@ -2488,7 +2659,12 @@ c
       IF(AbO3.le.0.0)GOTO 875
       if(wvln.gt.1091.)goto 872
  870  continue
-      read(23,*,end=872)wvlo,xso3,a0o3,a1o3
+      CALL TABGET(23,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 872
+      wvlo=Tabv(1)
+      xso3=Tabv(2)
+      a0o3=Tabv(3)
+      a1o3=Tabv(4)
       if(abs(wvln-wvlo).gt.epsilm)goto 870
 c      if(xso3.le.0.)goto 872
       Tref=223.
@@ -2502,7 +2678,10 @@ c      6b. Ozone (O3) [IR bands]
 c
       if(wvln.lt.2470.)goto 875
  874  continue
-      read(24,*,end=875)wvlo,AO3
+      CALL TABGET(24,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 875
+      wvlo=Tabv(1)
+      AO3=Tabv(2)
       if(abs(wvln-wvlo).gt.epsilm)goto 874
       TxO3=exp(-AO3*AbO3*AmO3)
  875  continue
@@ -2514,7 +2693,10 @@ c
       TNH3P=1.
       if(wvln.lt.1900.0)goto 825
  824  continue
-      READ (37,*,END=825) wvlo,ANH3
+      CALL TABGET(37,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 825
+      wvlo=Tabv(1)
+      ANH3=Tabv(2)
       if(abs(wvln-wvlo).gt.epsilm)goto 824
       IF(ANH3.le.0.0)GOTO 825
       TNH3=exp(-ANH3*AbNH3*AmNH3)
@@ -2527,7 +2709,10 @@ c
       TBrOP=1.
       if(wvln.lt.296.5.or.WVLN.GT.384.5)goto 829
  828  continue
-      READ (38,*,END=829) wvlo,xsBrO
+      CALL TABGET(38,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 829
+      wvlo=Tabv(1)
+      xsBrO=Tabv(2)
       if(abs(wvln-wvlo).gt.epsilm)goto 828
       ABrO=xsBrO*NLosch
 c      IF(ABrO.le.0.0)GOTO 829
@@ -2542,7 +2727,11 @@ c
       If(AbCH2O.le.0.)goto 831
       if(WVLN.GT.400.0)goto 831
  830  continue
-      READ (39,*,END=831) wvlo,xsCH2O,atCH2O
+      CALL TABGET(39,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 831
+      wvlo=Tabv(1)
+      xsCH2O=Tabv(2)
+      atCH2O=Tabv(3)
       if(abs(wvln-wvlo).gt.epsilm)goto 830
       Call GSCH2O(TK-24.,xsCH2O,atCH2O,AbCH2O,AmCH2O,
      1 TCH2O,TCH2OP,amdif)
@@ -2555,7 +2744,10 @@ c
       If(AbHNO2.le.0.)goto 833
       if(wvln.lt.300.5.or.WVLN.GT.396.5)goto 833
  832  continue
-      READ (40,*,END=833) wvlo,xsHNO2
+      CALL TABGET(40,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 833
+      wvlo=Tabv(1)
+      xsHNO2=Tabv(2)
       if(abs(wvln-wvlo).gt.epsilm)goto 832
       Call GSHNO2(xsHNO2,AbHNO2,AmHNO2,THNO2,THNO2P,amdif)
  833  continue
@@ -2567,7 +2759,12 @@ c
       TCl=230.
       if(WVLN.GT.432.0)goto 835
  834  continue
-      READ (41,*,END=835) wvlo,xsClNO,a1tCl,a2tCl
+      CALL TABGET(41,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 835
+      wvlo=Tabv(1)
+      xsClNO=Tabv(2)
+      a1tCl=Tabv(3)
+      a2tCl=Tabv(4)
       if(abs(wvln-wvlo).gt.epsilm)goto 834
       AClNO=xsClNO*(1.+a1tCl*(TCl-296.)+a2tCl*(TCl-296.)*(TCl-296.))*
      2 NLosch
@@ -3318,7 +3515,21 @@ c
       jo=IOUT(io)
       Xout(io)=Output(jo)
  457  continue
+      IF(Engine)THEN
+      IF(Nspec+1+IOTOT.LE.Mspec)THEN
+      Spec(Nspec+1)=WVLN
+      do 458 io=1,IOTOT
+      Spec(Nspec+1+io)=Xout(io)
+ 458  continue
+      ELSE
+      Ierr=1
+      ENDIF
+      Nspec=Nspec+1+IOTOT
+      ELSEIF(Binary.EQ.'1')THEN
+      WRITE(17,iostat=ierr40)WVLN,(Xout(io),io=1,IOTOT)
+      ELSE
       WRITE(17,121,iostat=ierr40)WVLN,(Xout(io),io=1,IOTOT)
+      ENDIF
  121  FORMAT(e9.4,50(1X,e9.4))
  953  CONTINUE
       GOTO 15
@@ -3513,34 +3724,13 @@ C
  998  CONTINUE
 c
       CLOSE (UNIT=14,STATUS='KEEP')
-      CLOSE (UNIT=15,STATUS='KEEP')
       CLOSE (UNIT=16,STATUS='KEEP')
       IF(IPRT.ge.2)CLOSE (UNIT=17,STATUS='KEEP')
       IF(Iscan.eq.1)CLOSE (UNIT=18,STATUS='KEEP')
       CLOSE (UNIT=20,STATUS='KEEP')
-      IF(w.gt.0.)CLOSE (UNIT=21,STATUS='KEEP')
-      CLOSE (UNIT=22,STATUS='KEEP')
-      IF(AbO3.gt.0.)CLOSE (UNIT=23,STATUS='KEEP')
-      IF(AbO3.gt.0.)CLOSE (UNIT=24,STATUS='KEEP')
-      CLOSE (UNIT=25,STATUS='KEEP')
-      CLOSE (UNIT=26,STATUS='KEEP')
-      CLOSE (UNIT=27,STATUS='KEEP')
-      CLOSE (UNIT=28,STATUS='KEEP')
-      CLOSE (UNIT=29,STATUS='KEEP')
-      CLOSE (UNIT=30,STATUS='KEEP')
-      CLOSE (UNIT=31,STATUS='KEEP')
-      CLOSE (UNIT=32,STATUS='KEEP')
-      CLOSE (UNIT=33,STATUS='KEEP')
-      CLOSE (UNIT=34,STATUS='KEEP')
-      CLOSE (UNIT=35,STATUS='KEEP')
-      CLOSE (UNIT=36,STATUS='KEEP')
-      CLOSE (UNIT=37,STATUS='KEEP')
-      CLOSE (UNIT=38,STATUS='KEEP')
-      CLOSE (UNIT=39,STATUS='KEEP')
-      CLOSE (UNIT=40,STATUS='KEEP')
-      CLOSE (UNIT=41,STATUS='KEEP')
 c
 c
+      RETURN
       END
 c
 c
@@ -3582,326 +3772,327 @@ c      Reads the selected albedo data file
 c
       Character*24 Name, Lamber
       Real Wvla(3000),Albd(3000)
+      DOUBLE PRECISION Tabv(17)
 c
 c      Nfile=Max(19,18+Ialbd)
  3    continue
       If(Ialbd.ne.3)goto 4
-      Open (UNIT=20,FILE='Albedo/SNOW.DAT',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/SNOW.DAT',' ','RR')
       Name='FRESH_SNOW'
       Goto 300
  4    continue
       If(Ialbd.ne.4)goto 5
-      Open (UNIT=20,FILE='Albedo/NEVE.DAT',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/NEVE.DAT',' ','RR')
       Name='MOUNTAIN_NEVE'
       Goto 300
  5    continue
       If(Ialbd.ne.5)goto 6
-      Open (UNIT=20,FILE='Albedo/BASALT.DAT',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/BASALT.DAT',' ','RR')
       Name='BASALT_ROCK'
       Goto 300
  6    continue
       If(Ialbd.ne.6)goto 7
-      Open (UNIT=20,FILE='Albedo/DRY_SAND.DAT',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/DRY_SAND.DAT',' ','RR')
       Name='DRY_SAND'
       Goto 300
  7    continue
       If(Ialbd.ne.7)goto 8
-      Open (UNIT=20,FILE='Albedo/WITESAND.DAT',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/WITESAND.DAT',' ','RR')
       Name='WHITE_SANDS'
       Goto 300
  8    continue
       If(Ialbd.ne.8)goto 9
-      Open (UNIT=20,FILE='Albedo/SOIL.DAT',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/SOIL.DAT',' ','RR')
       Name='SOIL'
       Goto 300
  9    continue
       If(Ialbd.ne.9)goto 10
-      Open (UNIT=20,FILE='Albedo/Dry_clay.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/Dry_clay.dat',' ','RR')
       Name='DRY_CLAY_SOIL'
       Goto 300
  10   continue
       If(Ialbd.ne.10)goto 11
-      Open (UNIT=20,FILE='Albedo/WETCLAY.DAT',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/WETCLAY.DAT',' ','RR')
       Name='WET_CLAY_SOIL'
       Goto 300
  11   continue
       If(Ialbd.ne.11)goto 12
-      Open (UNIT=20,FILE='Albedo/ALFALFA.DAT',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/ALFALFA.DAT',' ','RR')
       Name='ALFALFA'
       Goto 300
  12   continue
       If(Ialbd.ne.12)goto 13
-      Open (UNIT=20,FILE='Albedo/GRASS.DAT',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/GRASS.DAT',' ','RR')
       Name='GRASS'
       Goto 300
  13   continue
       If(Ialbd.ne.13)goto 14
-      Open (UNIT=20,FILE='Albedo/RYEGRASS.DAT',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/RYEGRASS.DAT',' ','RR')
       Name='RYE_GRASS'
       Goto 300
  14   continue
       If(Ialbd.ne.14)goto 15
-      Open (UNIT=20,FILE='Albedo/MEADOW1.DAT',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/MEADOW1.DAT',' ','RR')
       Name='ALPINE_MEADOW'
       Goto 300
  15   continue
       If(Ialbd.ne.15)goto 16
-      Open (UNIT=20,FILE='Albedo/MEADOW2.DAT',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/MEADOW2.DAT',' ','RR')
       Name='LUSH_MEADOW'
       Goto 300
  16   continue
       If(Ialbd.ne.16)goto 17
-      Open (UNIT=20,FILE='Albedo/WHEAT.DAT',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/WHEAT.DAT',' ','RR')
       Name='WHEAT'
       Goto 300
  17   continue
       If(Ialbd.ne.17)goto 18
-      Open (UNIT=20,FILE='Albedo/PINETREE.DAT',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/PINETREE.DAT',' ','RR')
       Name='PONDEROSA_PINE_TREE'
       Goto 300
  18   continue
       If(Ialbd.ne.18)goto 19
-      Open (UNIT=20,FILE='Albedo/CONCRETE.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/CONCRETE.dat',' ','RR')
       Name='CONCRETE'
       Goto 300
  19   continue
       If(Ialbd.ne.19)goto 20
-      Open (UNIT=20,FILE='Albedo/BlckLoam.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/BlckLoam.dat',' ','RR')
       Name='BLACK_LOAM'
       Goto 300
  20   continue
       If(Ialbd.ne.20)goto 21
-      Open (UNIT=20,FILE='Albedo/BrwnLoam.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/BrwnLoam.dat',' ','RR')
       Name='BROWN_SANDY_LOAM'
       Goto 300
  21   continue
       If(Ialbd.ne.21)goto 22
-      Open (UNIT=20,FILE='Albedo/BrwnSand.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/BrwnSand.dat',' ','RR')
       Name='BROWN_LOAMY_FINE_SAND'
       Goto 300
  22   continue
       If(Ialbd.ne.22)goto 23
-      Open (UNIT=20,FILE='Albedo/Conifers.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/Conifers.dat',' ','RR')
       Name='CONIFER_TREES'
       Goto 300
  23   continue
       If(Ialbd.ne.23)goto 24
-      Open (UNIT=20,FILE='Albedo/DarkLoam.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/DarkLoam.dat',' ','RR')
       Name='BROWN_SILT_LOAM'
       Goto 300
  24   continue
       If(Ialbd.ne.24)goto 25
-      Open (UNIT=20,FILE='Albedo/DarkSand.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/DarkSand.dat',' ','RR')
       Name='BROWN_LOAMY_SAND'
       Goto 300
  25   continue
       If(Ialbd.ne.25)goto 26
-      Open (UNIT=20,FILE='Albedo/Decidous.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/Decidous.dat',' ','RR')
       Name='DECIDUOUS_TREES'
       Goto 300
  26   continue
       If(Ialbd.ne.26)goto 27
-      Open (UNIT=20,FILE='Albedo/DryGrass.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/DryGrass.dat',' ','RR')
       Name='DRY_GRASS'
       Goto 300
  27   continue
       If(Ialbd.ne.27)goto 28
-      Open (UNIT=20,FILE='Albedo/DuneSand.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/DuneSand.dat',' ','RR')
       Name='WHITE_DUNE_SAND'
       Goto 300
  28   continue
       If(Ialbd.ne.28)goto 29
-      Open (UNIT=20,FILE='Albedo/FineSnow.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/FineSnow.dat',' ','RR')
       Name='FINE_SNOW'
       Goto 300
  29   continue
       If(Ialbd.ne.29)goto 30
-      Open (UNIT=20,FILE='Albedo/GrnGrass.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/GrnGrass.dat',' ','RR')
       Name='GREEN_GRASS'
       Goto 300
  30   continue
       If(Ialbd.ne.30)goto 31
-      Open (UNIT=20,FILE='Albedo/GrnlSnow.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/GrnlSnow.dat',' ','RR')
       Name='GRANULAR_SNOW'
       Goto 300
  31   continue
       If(Ialbd.ne.31)goto 32
-      Open (UNIT=20,FILE='Albedo/LiteClay.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/LiteClay.dat',' ','RR')
       Name='LIGHT_BROWN_CLAY'
       Goto 300
  32   continue
       If(Ialbd.ne.32)goto 33
-      Open (UNIT=20,FILE='Albedo/LiteLoam.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/LiteLoam.dat',' ','RR')
       Name='LIGHT_BROWN_LOAM'
       Goto 300
  33   continue
       If(Ialbd.ne.33)goto 34
-      Open (UNIT=20,FILE='Albedo/LiteSand.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/LiteSand.dat',' ','RR')
       Name='LIGHT_BROWN_LOAMY_SAND'
       Goto 300
  34   continue
       If(Ialbd.ne.34)goto 35
-      Open (UNIT=20,FILE='Albedo/PaleLoam.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/PaleLoam.dat',' ','RR')
       Name='PALE_BROWN_LOAM'
       Goto 300
  35   continue
       If(Ialbd.ne.35)goto 36
-      Open (UNIT=20,FILE='Albedo/Seawater.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/Seawater.dat',' ','RR')
       Name='SEA_WATER'
       Goto 300
  36   continue
       If(Ialbd.ne.36)goto 37
-      Open (UNIT=20,FILE='Albedo/SolidIce.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/SolidIce.dat',' ','RR')
       Name='SOLID_ICE'
       Goto 300
  37   continue
       If(Ialbd.ne.37)goto 38
-      Open (UNIT=20,FILE='Albedo/Dry_Soil.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/Dry_Soil.dat',' ','RR')
       Name='DRY_SOIL'
       Goto 300
  38   continue
       If(Ialbd.ne.38)goto 39
-      Open (UNIT=20,FILE='Albedo/LiteSoil.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/LiteSoil.dat',' ','RR')
       Name='LIGHT_SANDY_SOIL'
       Goto 300
  39   continue
       If(Ialbd.ne.39)goto 40
-      Open (UNIT=20,FILE='Albedo/RConcrte.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/RConcrte.dat',' ','RR')
       Name='OLD_RUNWAY_CONCRETE'
       Goto 300
  40   continue
       If(Ialbd.ne.40)goto 41
-      Open (UNIT=20,FILE='Albedo/RoofTile.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/RoofTile.dat',' ','RR')
       Name='TERRACOTA_ROOFING_TILE'
       Goto 300
  41   continue
       If(Ialbd.ne.41)goto 42
-      Open (UNIT=20,FILE='Albedo/RedBrick.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/RedBrick.dat',' ','RR')
       Name='RED_BRICK'
       Goto 300
  42   continue
       If(Ialbd.ne.42)goto 43
-      Open (UNIT=20,FILE='Albedo/Asphalt.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/Asphalt.dat',' ','RR')
       Name='OLD_RUNWAY_ASPHALT'
       Goto 300
  43   continue
       If(Ialbd.ne.43)goto 44
-      Open (UNIT=20,FILE='Albedo/TallCorn.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/TallCorn.dat',' ','RR')
       Name='TALL_GREEN_CORN'
       Goto 300
  44   continue
       If(Ialbd.ne.44)goto 45
-      Open (UNIT=20,FILE='Albedo/SndGrvl.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/SndGrvl.dat',' ','RR')
       Name='SAND_&_GRAVEL'
       Goto 300
  45   continue
       If(Ialbd.ne.45)goto 46
-      Open (UNIT=20,FILE='Albedo/Fallow.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/Fallow.dat',' ','RR')
       Name='FALLOW_FIELD'
       Goto 300
  46   continue
       If(Ialbd.ne.46)goto 47
-      Open (UNIT=20,FILE='Albedo/WetClay2.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/WetClay2.dat',' ','RR')
       Name='WET_RED_CLAY'
       Goto 300
  47   continue
       If(Ialbd.ne.47)goto 48
-      Open (UNIT=20,FILE='Albedo/WetSSoil.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/WetSSoil.dat',' ','RR')
       Name='WET_SANDY_SOIL'
       Goto 300
  48   continue
       If(Ialbd.ne.48)goto 49
-      Open (UNIT=20,FILE='Albedo/Gravel.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/Gravel.dat',' ','RR')
       Name='GRAVEL'
       Goto 300
  49   continue
       If(Ialbd.ne.49)goto 50
-      Open (UNIT=20,FILE='Albedo/WetClay2.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/WetClay2.dat',' ','RR')
       Name='WET_RED_CLAY'
       Goto 300
  50   continue
       If(Ialbd.ne.50)goto 51
-      Open (UNIT=20,FILE='Albedo/WetSilt.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/WetSilt.dat',' ','RR')
       Name='WET_SILT'
       Goto 300
  51   continue
       If(Ialbd.ne.51)goto 52
-      Open (UNIT=20,FILE='Albedo/LngGrass.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/LngGrass.dat',' ','RR')
       Name='DRY_LONG_GRASS'
       Goto 300
  52   continue
       If(Ialbd.ne.52)goto 53
-      Open (UNIT=20,FILE='Albedo/LwnGrass.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/LwnGrass.dat',' ','RR')
       Name='GENERIC_LAWN_GRASS'
       Goto 300
  53   continue
       If(Ialbd.ne.53)goto 54
-      Open (UNIT=20,FILE='Albedo/OakTree.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/OakTree.dat',' ','RR')
       Name='DECIDOUS_OAK_TREE_LEAVES'
       Goto 300
  54   continue
       If(Ialbd.ne.54)goto 55
-      Open (UNIT=20,FILE='Albedo/Pinion.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/Pinion.dat',' ','RR')
       Name='PINON_PINETREE_NEEDLES'
       Goto 300
  55   continue
       If(Ialbd.ne.55)goto 56
-      Open (UNIT=20,FILE='Albedo/MeltSnow.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/MeltSnow.dat',' ','RR')
       Name='MELTING_SNOW=SLUSH'
       Goto 300
  56   continue
       If(Ialbd.ne.56)goto 57
-      Open (UNIT=20,FILE='Albedo/Plywood.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/Plywood.dat',' ','RR')
       Name='PLYWOOD_SHEET'
       Goto 300
  57   continue
       If(Ialbd.ne.57)goto 58
-      Open (UNIT=20,FILE='Albedo/WiteVinl.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/WiteVinl.dat',' ','RR')
       Name='WHITE_VINYL_COVER_SHEET'
       Goto 300
  58   continue
       If(Ialbd.ne.58)goto 59
-      Open (UNIT=20,FILE='Albedo/FibrGlss.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/FibrGlss.dat',' ','RR')
       Name='CLEAR_FIBERGLASS_COVER'
       Goto 300
  59   continue
       If(Ialbd.ne.59)goto 60
-      Open (UNIT=20,FILE='Albedo/ShtMetal.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/ShtMetal.dat',' ','RR')
       Name='GALVANIZED_SHEET_METAL'
       Goto 300
  60   continue
       If(Ialbd.ne.60)goto 61
-      Open (UNIT=20,FILE='Albedo/Wetland.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/Wetland.dat',' ','RR')
       Name='WETLAND_CANOPY'
       Goto 300
  61   continue
       If(Ialbd.ne.61)goto 62
-      Open (UNIT=20,FILE='Albedo/SageBrsh.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/SageBrsh.dat',' ','RR')
       Name='SAGEBRUSH_CANOPY'
       Goto 300
  62   continue
       If(Ialbd.ne.62)goto 63
-      Open (UNIT=20,FILE='Albedo/FirTrees.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/FirTrees.dat',' ','RR')
       Name='FIR_TREES_COLORADO'
       Goto 300
  63   continue
       If(Ialbd.ne.63)goto 64
-      Open (UNIT=20,FILE='Albedo/CSeaWatr.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/CSeaWatr.dat',' ','RR')
       Name='COASTAL_PACIFIC_SEAWATER'
       Goto 300
  64   continue
       If(Ialbd.ne.64)goto 65
-      Open (UNIT=20,FILE='Albedo/OSeaWatr.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/OSeaWatr.dat',' ','RR')
       Name='OPEN_ATLANTIC_SEAWATER'
       Goto 300
  65   continue
       If(Ialbd.ne.65)goto 66
-      Open (UNIT=20,FILE='Albedo/GrazingField.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/GrazingField.dat',' ','RR')
       Name='GRAZING_FIELD'
       Goto 300
  66   continue
       If(Ialbd.ne.66)goto 2
-      Open (UNIT=20,FILE='Albedo/Spruce.dat',STATUS='OLD')
+      CALL TABOPN(20,'Albedo/Spruce.dat',' ','RR')
       Name='SPRUCE_TREE'
       Goto 300
 c      
@@ -3914,12 +4105,15 @@ c
       Name='WATER'
       Return
  1    continue
-      If(Ialbd.LE.1)Open (UNIT=20,FILE='Albedo/ALBEDO.DAT',STATUS='OLD')
+      If(Ialbd.LE.1)CALL TABOPN(20,'Albedo/ALBEDO.DAT',' ','RR')
       Name='USER_DEFINED'
  300  Continue
       Ial=1
  371  continue
-      Read(20,*,End=370)Wvla(Ial),Albd(Ial)
+      CALL TABGET(20,Tabv,Ieof)
+      IF(Ieof.ne.0)GOTO 370
+      Wvla(Ial)=Tabv(1)
+      Albd(Ial)=Tabv(2)
       Ial=Ial+1
       Goto 371
  370  Continue
@@ -3929,7 +4123,6 @@ c
      1 'of data rows is ',i8,/,' but should be <= 3000.',/)
       Lamber='NON_LAMBERTIAN'
       If(Ialbd.le.0)Lamber='LAMBERTIAN'
-      Close (Unit=20,status='keep')
       Return
       End
 C
@@ -5923,3 +6116,319 @@ c
       End
 C
 C*********************************************************************
+c
+c
+      Subroutine CARDRD(Deck,Card,Ieof)
+c
+c      Next input card: a line of data.inp.txt (unit 14), or of Deck
+c      in the in-process runs. Blank lines are skipped as in the
+c      list-directed reads. Ieof=1 at the end of the input.
+c
+      CHARACTER*(*) Deck,Card
+      INTEGER Ieof,Ipos,Iend,Icr
+      COMMON /Cards/ Ipos
+      Ieof=0
+ 10   continue
+      IF(LEN_TRIM(Deck).EQ.0)THEN
+      READ(14,'(A)',END=20)Card
+      ELSE
+      IF(Ipos.GT.LEN(Deck))GOTO 20
+      Iend=INDEX(Deck(Ipos:),CHAR(10))
+      IF(Iend.EQ.0)Iend=LEN(Deck)-Ipos+2
+      Card=Deck(Ipos:Ipos+Iend-2)
+      Ipos=Ipos+Iend
+      ENDIF
+      Icr=INDEX(Card,CHAR(13))
+      IF(Icr.GT.0)Card(Icr:Icr)=' '
+      IF(VERIFY(Card,' '//CHAR(9)).EQ.0)GOTO 10
+      Return
+ 20   continue
+      Ieof=1
+      Card=' '
+      Return
+      End
+c
+c
+      BLOCK DATA TabDat
+c
+c      No reference table is loaded when the process starts
+c
+      PARAMETER (Mtab=64,Mpool=500000)
+      CHARACTER*1000 Tpath,Tname(Mtab)
+      CHARACTER*64 Thead(Mtab)
+      DOUBLE PRECISION Pool(Mpool),Hval(Mtab)
+      INTEGER Tsize(Mtab),Ttime(Mtab),Tcol(Mtab),Thd(Mtab),Trow(Mtab)
+      INTEGER Toff(Mtab),Ntab,Npool
+      COMMON /Tables/ Pool,Hval,Tsize,Ttime,Tcol,Thd,Trow,Toff,Ntab,
+     1 Npool
+      COMMON /Tabchr/ Tpath,Tname,Thead
+      DATA Ntab/0/,Npool/0/
+      End
+c
+c
+      Subroutine TABRST(Root)
+c
+c      Folder of the reference tables for this run (blank for the
+c      current folder). The loaded tables are dropped when more than
+c      half of the memory pool or of the table slots is in use.
+c
+      CHARACTER*(*) Root
+      PARAMETER (Mtab=64,Mpool=500000)
+      CHARACTER*1000 Tpath,Tname(Mtab)
+      CHARACTER*64 Thead(Mtab)
+      DOUBLE PRECISION Pool(Mpool),Hval(Mtab)
+      INTEGER Tsize(Mtab),Ttime(Mtab),Tcol(Mtab),Thd(Mtab),Trow(Mtab)
+      INTEGER Toff(Mtab),Ntab,Npool
+      COMMON /Tables/ Pool,Hval,Tsize,Ttime,Tcol,Thd,Trow,Toff,Ntab,
+     1 Npool
+      COMMON /Tabchr/ Tpath,Tname,Thead
+      Tpath=Root
+      if(Npool.gt.Mpool/2.or.Ntab.gt.Mtab/2)Ntab=0
+      if(Ntab.eq.0)Npool=0
+      Return
+      End
+c
+c
+      Subroutine TABOPN(Iunit,Name,Head,Types)
+c
+c      Loads a reference table (Gases, Solar, Albedo, CIE_data) in
+c      memory and selects it for the unit Iunit. Head gives the types
+c      of the header lines and Types the types of the values of each
+c      data line (R real, D double precision, I integer, C character
+c      of 64), as in tables.f. A table is read once per process and
+c      kept while the size and modification time of the text file do
+c      not change. The unformatted copy made by tables.f (same name
+c      with .bin) is read if it was made from the current text file,
+c      otherwise the text file is read.
+c
+      CHARACTER*(*) Name,Head,Types
+      CHARACTER*1000 File
+      CHARACTER*4096 Line
+      CHARACTER*256 Rec
+      INTEGER Istat(13),Ierr,Ierr2,Isize,Itime,Ncol,Nhd,K,J,L,Icr
+      REAL Rval
+      LOGICAL Exists
+      PARAMETER (Mtab=64,Mpool=500000)
+      CHARACTER*1000 Tpath,Tname(Mtab)
+      CHARACTER*64 Thead(Mtab)
+      DOUBLE PRECISION Pool(Mpool),Hval(Mtab)
+      INTEGER Tsize(Mtab),Ttime(Mtab),Tcol(Mtab),Thd(Mtab),Trow(Mtab)
+      INTEGER Toff(Mtab),Ntab,Npool,Itab(15:41),Icur(15:41)
+      COMMON /Tables/ Pool,Hval,Tsize,Ttime,Tcol,Thd,Trow,Toff,Ntab,
+     1 Npool
+      COMMON /Tabchr/ Tpath,Tname,Thead
+      COMMON /Tabcur/ Itab,Icur
+      File=Tpath(1:LEN_TRIM(Tpath))//Name
+      Ncol=LEN_TRIM(Types)
+      Nhd=LEN_TRIM(Head)
+      CALL STAT(File,Istat,Ierr)
+c
+c      Table already loaded from the same text file
+c
+      DO 10 K=1,Ntab
+      if(Tname(K).ne.File)goto 10
+      if(Ierr.eq.0.and.Tsize(K).eq.Istat(8).and.Ttime(K).eq.Istat(10))
+     1 goto 90
+      Tname(K)=' '
+ 10   continue
+      if(Ntab.ge.Mtab)Ntab=0
+      if(Ntab.eq.0)Npool=0
+      Ntab=Ntab+1
+      K=Ntab
+      Tname(K)=File
+      Tsize(K)=Istat(8)
+      Ttime(K)=Istat(10)
+      Tcol(K)=Ncol
+      Thd(K)=Nhd
+      Trow(K)=0
+      Toff(K)=Npool
+      Thead(K)=' '
+      Hval(K)=0.
+      L=0
+      DO 15 J=1,Ncol
+      L=L+4
+      if(Types(J:J).eq.'D')L=L+4
+ 15   continue
+c
+c      Unformatted copy
+c
+      INQUIRE(FILE=File(1:LEN_TRIM(File)-4)//'.bin',EXIST=Exists)
+      if(.not.Exists)goto 40
+      OPEN (UNIT=Iunit,FILE=File(1:LEN_TRIM(File)-4)//'.bin',
+     1 FORM='UNFORMATTED',STATUS='OLD')
+      READ(Iunit,iostat=Ierr2)Isize,Itime
+      if(Ierr.eq.0.and.Ierr2.eq.0.and.Isize.eq.Istat(8).and.
+     1 Itime.eq.Istat(10))goto 20
+      CLOSE(Iunit)
+      goto 40
+ 20   continue
+      DO 25 J=1,Nhd
+      if(Head(J:J).eq.'C')READ(Iunit)Thead(K)
+      if(Head(J:J).ne.'C')READ(Iunit)Rval
+      if(Head(J:J).ne.'C')Hval(K)=Rval
+ 25   continue
+ 30   continue
+      READ(Iunit,END=80)Rec(1:L)
+      if(Npool+Ncol.gt.Mpool)goto 85
+      CALL TABBIN(Rec,Types(1:Ncol),Pool(Npool+1))
+      Npool=Npool+Ncol
+      Trow(K)=Trow(K)+1
+      goto 30
+c
+c      Text file
+c
+ 40   continue
+      OPEN (UNIT=Iunit,FILE=File,STATUS='OLD')
+      DO 45 J=1,Nhd
+      READ(Iunit,'(A)')Line
+      if(Head(J:J).eq.'C')READ(Line,*)Thead(K)
+      if(Head(J:J).ne.'C')READ(Line,*)Rval
+      if(Head(J:J).ne.'C')Hval(K)=Rval
+ 45   continue
+ 50   continue
+      READ(Iunit,'(A)',END=80)Line
+      Icr=INDEX(Line,CHAR(13))
+      if(Icr.gt.0)Line(Icr:Icr)=' '
+      if(VERIFY(Line,' '//CHAR(9)).eq.0)goto 50
+      if(Npool+Ncol.gt.Mpool)goto 85
+      CALL TABTXT(Line,Types(1:Ncol),Pool(Npool+1))
+      Npool=Npool+Ncol
+      Trow(K)=Trow(K)+1
+      goto 50
+ 85   continue
+      WRITE(16,186)Name
+ 186  FORMAT('** ERROR: not enough memory for the table ',A)
+ 80   continue
+      CLOSE(Iunit)
+ 90   continue
+      Itab(Iunit)=K
+      Icur(Iunit)=0
+      Return
+      End
+c
+c
+      Subroutine TABTXT(Line,Types,Row)
+c
+c      Values of one text line in the order of Types, each one read
+c      with the list-directed rules and its own type as in tables.f
+c
+      CHARACTER*(*) Line,Types
+      DOUBLE PRECISION Row(*),Dval
+      CHARACTER*64 Cdum
+      INTEGER K,J,Ival
+      REAL Rval
+      DO 10 K=1,LEN(Types)
+      IF(Types(K:K).EQ.'R')THEN
+      READ(Line,*)(Cdum,J=1,K-1),Rval
+      Row(K)=Rval
+      ELSEIF(Types(K:K).EQ.'I')THEN
+      READ(Line,*)(Cdum,J=1,K-1),Ival
+      Row(K)=Ival
+      ELSE
+      READ(Line,*)(Cdum,J=1,K-1),Dval
+      Row(K)=Dval
+      ENDIF
+ 10   continue
+      Return
+      End
+c
+c
+      Subroutine TABBIN(Rec,Types,Row)
+c
+c      Values of one record of the unformatted copy made by tables.f
+c
+      CHARACTER*(*) Rec,Types
+      DOUBLE PRECISION Row(*),Dval
+      INTEGER K,L,Ival
+      REAL Rval
+      L=0
+      DO 10 K=1,LEN(Types)
+      IF(Types(K:K).EQ.'R')THEN
+      Row(K)=TRANSFER(Rec(L+1:L+4),Rval)
+      L=L+4
+      ELSEIF(Types(K:K).EQ.'I')THEN
+      Row(K)=TRANSFER(Rec(L+1:L+4),Ival)
+      L=L+4
+      ELSE
+      Row(K)=TRANSFER(Rec(L+1:L+8),Dval)
+      L=L+8
+      ENDIF
+ 10   continue
+      Return
+      End
+c
+c
+      Subroutine TABRWD(Iunit)
+c
+c      Goes back to the first line of the table of the unit Iunit
+c
+      INTEGER Itab(15:41),Icur(15:41)
+      COMMON /Tabcur/ Itab,Icur
+      Icur(Iunit)=0
+      Return
+      End
+c
+c
+      Subroutine TABSKP(Iunit)
+c
+c      Skips the header line of a reference table
+c
+      INTEGER Itab(15:41),Icur(15:41)
+      COMMON /Tabcur/ Itab,Icur
+      Icur(Iunit)=Icur(Iunit)+1
+      Return
+      End
+c
+c
+      Subroutine TABHDR(Iunit,Spctrm,ESC)
+c
+c      Header lines of a solar spectrum: name and total irradiance
+c
+      CHARACTER*64 Spctrm
+      REAL ESC
+      PARAMETER (Mtab=64,Mpool=500000)
+      CHARACTER*1000 Tpath,Tname(Mtab)
+      CHARACTER*64 Thead(Mtab)
+      DOUBLE PRECISION Pool(Mpool),Hval(Mtab)
+      INTEGER Tsize(Mtab),Ttime(Mtab),Tcol(Mtab),Thd(Mtab),Trow(Mtab)
+      INTEGER Toff(Mtab),Ntab,Npool,Itab(15:41),Icur(15:41)
+      COMMON /Tables/ Pool,Hval,Tsize,Ttime,Tcol,Thd,Trow,Toff,Ntab,
+     1 Npool
+      COMMON /Tabchr/ Tpath,Tname,Thead
+      COMMON /Tabcur/ Itab,Icur
+      K=Itab(Iunit)
+      Spctrm=Thead(K)
+      ESC=Hval(K)
+      Icur(Iunit)=Icur(Iunit)+Thd(K)
+      Return
+      End
+c
+c
+      Subroutine TABGET(Iunit,V,Ieof)
+c
+c      Next data line of the table of the unit Iunit in V, Ieof=1 at
+c      the end of the table
+c
+      DOUBLE PRECISION V(*)
+      INTEGER Iunit,Ieof,K,J,Irow
+      PARAMETER (Mtab=64,Mpool=500000)
+      DOUBLE PRECISION Pool(Mpool),Hval(Mtab)
+      INTEGER Tsize(Mtab),Ttime(Mtab),Tcol(Mtab),Thd(Mtab),Trow(Mtab)
+      INTEGER Toff(Mtab),Ntab,Npool,Itab(15:41),Icur(15:41)
+      COMMON /Tables/ Pool,Hval,Tsize,Ttime,Tcol,Thd,Trow,Toff,Ntab,
+     1 Npool
+      COMMON /Tabcur/ Itab,Icur
+      K=Itab(Iunit)
+      Irow=Icur(Iunit)-Thd(K)
+      Ieof=0
+      if(Irow.lt.Trow(K))goto 10
+      Ieof=1
+      Return
+ 10   continue
+      DO 20 J=1,Tcol(K)
+      V(J)=Pool(Toff(K)+Irow*Tcol(K)+J)
+ 20   continue
+      Icur(Iunit)=Icur(Iunit)+1
+      Return
+      End
+C*********************************************************************
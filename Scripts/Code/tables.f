@@ -0,0 +1,113 @@
+C
+C     Conversion of the reference tables of SMARTS (Gases, Solar) to
+C     unformatted sequential files (*.bin) next to the text files.
+C     Each line is read with the list-directed rules and the same types
+C     as in smarts.f (R real, D double precision, I integer, C character
+C     of 64) and written as one record, so smarts.f reads exactly the
+C     same values without converting text. The first record of each
+C     file holds the size and modification time of the text file, if
+C     they change smarts.f reads the text file again.
+C
+C     Run from the folder of smarts.out (make tables).
+C
+      PROGRAM TABLES
+      CALL TABCNV('Gases/Abs_O2.dat','C','RR')
+      CALL TABCNV('Gases/Abs_O4.dat','C','RR')
+      CALL TABCNV('Gases/Abs_N2.dat','C','RR')
+      CALL TABCNV('Gases/Abs_N2O.dat','C','RR')
+      CALL TABCNV('Gases/Abs_NO.dat','C','RR')
+      CALL TABCNV('Gases/Abs_NO2.dat','C','RRR')
+      CALL TABCNV('Gases/Abs_NO3.dat','C','RRR')
+      CALL TABCNV('Gases/Abs_HNO3.dat','C','RRR')
+      CALL TABCNV('Gases/Abs_SO2U.dat','C','RRR')
+      CALL TABCNV('Gases/Abs_SO2I.dat','C','RR')
+      CALL TABCNV('Gases/Abs_CO.dat','C','RR')
+      CALL TABCNV('Gases/Abs_CO2.dat','C','RR')
+      CALL TABCNV('Gases/Abs_CH4.dat','C','RR')
+      CALL TABCNV('Gases/Abs_NH3.dat','C','RR')
+      CALL TABCNV('Gases/Abs_BrO.dat','C','RR')
+      CALL TABCNV('Gases/Abs_CH2O.dat','C','RRR')
+      CALL TABCNV('Gases/Abs_HNO2.dat','C','RR')
+      CALL TABCNV('Gases/Abs_ClNO.dat','C','RRRR')
+      CALL TABCNV('Gases/Abs_H2O.dat','C','RRIIRRRIRRRIRRRRR')
+      CALL TABCNV('Gases/Abs_O3UV.dat','C','RRRR')
+      CALL TABCNV('Gases/Abs_O3IR.dat','C','RD')
+      CALL TABCNV('Solar/Spctrm_U.dat','CR','IR')
+      CALL TABCNV('Solar/Spctrm_0.dat','CR','IR')
+      CALL TABCNV('Solar/Spctrm_1.dat','CR','IR')
+      CALL TABCNV('Solar/Spctrm_2.dat','CR','IR')
+      CALL TABCNV('Solar/Spctrm_3.dat','CR','IR')
+      CALL TABCNV('Solar/Spctrm_4.dat','CR','IR')
+      CALL TABCNV('Solar/Spctrm_5.dat','CR','IR')
+      CALL TABCNV('Solar/Spctrm_6.dat','CR','IR')
+      CALL TABCNV('Solar/Spctrm_7.dat','CR','IR')
+      CALL TABCNV('Solar/Spctrm_8.dat','CR','IR')
+      END
+C
+C
+      SUBROUTINE TABCNV(Name,Head,Types)
+C     Name: text table, Head: types of the header lines (one value per
+C     line), Types: types of the values of each data line
+      CHARACTER*(*) Name,Head,Types
+      CHARACTER*4096 Line
+      CHARACTER*256 Rec
+      INTEGER Istat(13),Ierr,K,L,Nline
+      LOGICAL Exists
+      INQUIRE(FILE=Name,EXIST=Exists)
+      IF(.NOT.Exists)RETURN
+      CALL STAT(Name,Istat,Ierr)
+      OPEN(UNIT=10,FILE=Name,STATUS='OLD')
+      OPEN(UNIT=11,FILE=Name(1:LEN_TRIM(Name)-4)//'.bin',
+     1 FORM='UNFORMATTED',STATUS='REPLACE')
+      WRITE(11)Istat(8),Istat(10)
+      DO K=1,LEN(Head)
+        READ(10,'(A)')Line
+        CALL TABREC(Line,Head(K:K),Rec,L)
+        WRITE(11)Rec(1:L)
+      ENDDO
+      Nline=0
+ 10   continue
+      READ(10,'(A)',END=20)Line
+C     Blank lines are skipped by the list-directed reads of smarts.f
+      IF(VERIFY(Line,' '//CHAR(9)//CHAR(13)).EQ.0)GOTO 10
+      CALL TABREC(Line,Types,Rec,L)
+      WRITE(11)Rec(1:L)
+      Nline=Nline+1
+      GOTO 10
+ 20   continue
+      CLOSE(10)
+      CLOSE(11)
+      WRITE(*,'(A,I7,A)')Name,Nline,' lines'
+      END
+C
+C
+      SUBROUTINE TABREC(Line,Types,Rec,L)
+C     Values of one line packed in Rec(1:L) in the order of Types
+      CHARACTER*(*) Line,Types,Rec
+      CHARACTER*64 Cval,Cdum
+      CHARACTER*4 C4
+      CHARACTER*8 C8
+      INTEGER K,J,L,Ival
+      REAL Rval
+      DOUBLE PRECISION Dval
+      L=0
+      DO K=1,LEN(Types)
+        IF(Types(K:K).EQ.'C')THEN
+          READ(Line,*)(Cdum,J=1,K-1),Cval
+          Rec(L+1:L+64)=Cval
+          L=L+64
+        ELSEIF(Types(K:K).EQ.'R')THEN
+          READ(Line,*)(Cdum,J=1,K-1),Rval
+          Rec(L+1:L+4)=TRANSFER(Rval,C4)
+          L=L+4
+        ELSEIF(Types(K:K).EQ.'I')THEN
+          READ(Line,*)(Cdum,J=1,K-1),Ival
+          Rec(L+1:L+4)=TRANSFER(Ival,C4)
+          L=L+4
+        ELSE
+          READ(Line,*)(Cdum,J=1,K-1),Dval
+          Rec(L+1:L+8)=TRANSFER(Dval,C8)
+          L=L+8
+        ENDIF
+      ENDDO
+      END
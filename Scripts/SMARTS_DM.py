@@ -1,7 +1,10 @@
 from SMARTS_algorithm import SMARTS
 from functions import mkdir
+from parallel import run_days
+from pipeline import SMARTS_pipeline
 from pandas import read_csv
 from os.path import join
+from time import time
 from tqdm import tqdm
 """
 Parametros para interactuar con el modelo, esto esta modificado para el uso
@@ -17,30 +20,112 @@ params = {
     "hour final": 17,
     "wavelength initial": 285,
     "wavelength final": 2800,
+    # Bandas que se integran de cada espectro ademas de la irradiancia total,
+    # [inicial, final] o [inicial, final, archivo de CIE_data, factor]
+    "bands": {"UV": [285, 400],
+              "PAR": [400, 700],
+              "illuminance": [360, 830, "VLambda", 683],
+              "photopic_1988": [360, 830, "VMLambda", 683]},
+    "batch": True,
+    # Muestreo adaptativo: con una tolerancia (W/m2) se modela cada 30 minutos
+    # y se refina hasta que la interpolacion difiera menos de ella del modelo,
+    # None para modelar cada minuto
+    "adaptive tolerance": None,
+    "adaptive step": 30,
+    "binary output": True,
+    # Cache de resultados del modelo, False para desactivarlo
+    "cache": True,
+    "file cache": "SMARTS_cache.sqlite",
+    # Reanuda la ejecucion omitiendo los dias terminados
+    "checkpoint": True,
+    # Resultados en results.bin, tambien se escribe el <Date>.txt de cada
+    # dia salvo con False en text export
+    "store": True,
+    "text export": True,
+    # Espectros de cada minuto en Results_SMARTS_DM/Spectra (float32 o float16)
+    "spectra": False,
+    "spectra dtype": "float16",
+    "spectra compression": True,
+    "scratch": True,
+    "workers": 4,
+    # Procesos asincronos de smarts.out en lugar de un proceso de Python por
+    # dia, la lectura y escritura de resultados ocurre mientras el modelo
+    # calcula los dias siguientes
+    "pipeline": False,
+    # Eventos de ejecucion en JSON lines (tiempos por etapa, ejecuciones del
+    # modelo, cache) y perfil de cProfile, None para desactivarlos
+    "metrics": None,
+    "profile": None,
 }
-for station in params["stations"]:
-    # Inicialización del objeto que contiene a la clase SMARTS con sus parametros de entrada
-    SMARTS_Model = SMARTS(params,
-                          station)
+
+
+def run_station(parameters: dict,
+                station: str,
+                dates: list = None,
+                part: str = None) -> None:
+    """
+    Ejecucion del modelo SMARTS para los dias de file data de una estacion
+    ### inputs:
+    + parameters ----> Parametros del modelo (params)
+    + station    ----> Estacion que se analizara
+    + dates      ----> Fechas que se calculan, None para todos los dias
+    + part       ----> Nombre de la parte de los dias que calcula este nodo,
+                       sus resultados se escriben en parts/<part> (ver
+                       SMARTS_run.py)
+    """
     # Direccion donde se encuentran los datos de cada estacion
-    station_path = join(params["path stations"],
+    station_path = join(parameters["path stations"],
                         station)
     # Direccion de los resultados
-    # Creacion de la carpeta resultados
     path_results = join(station_path,
-                        params["folder results"])
+                        parameters["folder results"])
+    if part is not None:
+        path_results = join(path_results,
+                            "parts",
+                            part)
+    # Creacion de la carpeta resultados
     mkdir(path_results)
     # Lectura de los parametros de entrada de cada dia
     filename = join(station_path,
-                    params["file data"])
+                    parameters["file data"])
     data = read_csv(filename)
-    # Ciclo para variar los dias
-    for index in tqdm(data.index):
-        # Ejecucion del modelo SMARTS
-        SMARTS_Model.run(data["day"][index],
-                         data["month"][index],
-                         data["year"][index],
-                         data["ozone"][index],
-                         data["AOD"][index],
-                         data["Date"][index],
-                         path=path_results)
+    if dates is not None:
+        data = data[data["Date"].astype(str).isin([str(date)
+                                                   for date in dates])]
+    days = [{"day": data["day"][index],
+             "month": data["month"][index],
+             "year": data["year"][index],
+             "o3": data["ozone"][index],
+             "aod": data["AOD"][index],
+             "name": data["Date"][index],
+             "path": path_results}
+            for index in data.index]
+    # Inicialización del objeto que contiene a la clase SMARTS con sus parametros de entrada
+    SMARTS_Model = SMARTS(parameters,
+                          station)
+    metrics = SMARTS_Model.metrics
+    start = time()
+    # Se omiten los dias calculados en una ejecucion anterior
+    days = SMARTS_Model.pending_days(days)
+    with metrics.profile(), metrics.stage("run_station"):
+        if parameters["pipeline"]:
+            SMARTS_pipeline(SMARTS_Model,
+                            parameters["workers"]).run_days(days)
+        elif parameters["workers"] > 1:
+            # Ejecucion del modelo SMARTS en paralelo, un dia por proceso
+            run_days(SMARTS_Model,
+                     days,
+                     parameters["workers"])
+        else:
+            # Ciclo para variar los dias
+            for day in tqdm(days):
+                # Ejecucion del modelo SMARTS
+                SMARTS_Model.run_day(day)
+    if metrics.filename is not None:
+        print(metrics.report(start))
+
+
+if __name__ == "__main__":
+    for station in params["stations"]:
+        run_station(params,
+                    station)
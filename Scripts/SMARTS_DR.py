@@ -11,17 +11,49 @@ parameters = {
     "hour final": 16,
     "wavelength initial": 285,
     "wavelength final": 2800,
+    "batch": True,
+    "binary output": True,
+    # Cache de resultados del modelo, False para desactivarlo
+    "cache": True,
+    "file cache": "SMARTS_cache.sqlite",
+    # Reanuda la ejecucion omitiendo los dias terminados
+    "checkpoint": True,
+    # Resultados en results.bin, tambien se escribe el <Date>.txt de cada
+    # dia salvo con False en text export
+    "store": True,
+    "text export": True,
+    # Mediciones de la estacion en un solo archivo binario (Mediciones.npy)
+    "measurement archive": True,
+    "workers": 4,
+    # Procesos asincronos de smarts.out, la lectura y escritura de cada dia
+    # ocurre mientras el modelo calcula los siguientes
+    "pipeline": False,
     "AOD inicial": 0.01,
     "AOD limite": 1,
     "RD limite": 10,
     "RD delta": 1,
+    # Metodo de busqueda del AOD: "binary", "secant" o "illinois"
+    "search": "binary",
+    # Inicia cada dia con el AOD de la fila anterior, solo con workers 1
+    "warm start": False,
+    # Todos los dias avanzan un paso de la busqueda en cada ronda y las
+    # ejecuciones de la ronda se reparten juntas entre los procesos, sin
+    # warm start
+    "lockstep": False,
+    # Eventos de ejecucion en JSON lines (iteraciones por dia, dias en el
+    # limite de iteraciones, tiempos por etapa) y perfil de cProfile
+    "metrics": None,
+    "profile": None,
+    # Durante la busqueda solo se modela la ventana del maximo
+    "peak window": True,
     "igas": 1,
     #    "igas": 3,
 }
 
-for station in parameters["stations"]:
-    # Inicialización del objeto que contiene a la clase SMARTS con sus parametros de entrada
-    SMARTS_Model = SMARTS_DR(parameters=parameters,
-                             station=station)
-    print("Calculando estacion "+station)
-    SMARTS_Model.run_search()
+if __name__ == "__main__":
+    for station in parameters["stations"]:
+        # Inicialización del objeto que contiene a la clase SMARTS con sus parametros de entrada
+        SMARTS_Model = SMARTS_DR(parameters=parameters,
+                                 station=station)
+        print("Calculando estacion "+station)
+        SMARTS_Model.run_search()
@@ -1,66 +1,219 @@
 from pandas import DataFrame, read_csv
-from scipy.integrate import trapz
+try:
+    from scipy.integrate import trapz
+except ImportError:
+    # scipy >= 1.14 solo tiene trapezoid
+    from scipy.integrate import trapezoid as trapz
 from os import system as terminal
-from functions import mkdir
+from checkpoint import SMARTS_checkpoint, parameters_signature
+from engine import SMARTS_engine
+from surrogate import SMARTS_table
+from cache import SMARTS_cache
+from measurements import SMARTS_measurements
+from spectra import SMARTS_spectra
+from resolution import select_step
+from store import SMARTS_store
+from metrics import SMARTS_metrics
+from geometry import SMARTS_geometry
+from functions import (mkdir,
+                       file_hash,
+                       solar_noon,
+                       read_stations,
+                       link_model_files,
+                       remove_files)
+from contextlib import contextmanager
+from parallel import search_days
+from pipeline import SMARTS_pipeline
+from lockstep import search_lockstep
+from tempfile import mkdtemp
+from shutil import rmtree
 from numpy import (loadtxt,
+                   fromfile,
+                   float32,
                    where,
                    array,
                    mean,
-                   max)
-from os.path import join
+                   max,
+                   diff,
+                   interp,
+                   ones,
+                   searchsorted,
+                   vstack,
+                   zeros)
+from os.path import abspath, exists, join
+from os import replace
+from scipy.interpolate import PchipInterpolator
+from time import perf_counter, time
 from tqdm import tqdm
+import json
+import re
+# Card 8 y Card 8a del modelo SMARTS para cada modelo de aerosoles
+aerosol_models = {
+    # Modelo urbano de Shettle & Fenn
+    "S&F_URBAN": [" 'S&F_URBAN'"],
+    # SSAAER Palancar
+    # Asymmetry Promedio de 550 nm y humedad ente 50-70%
+    "SSAAER_CUSTOM": [" 'USER'",
+                      " {} {} {} {}".format(1, 1, 0.8, 0.68)],
+}
 
 
 class SMARTS:
     """
     Clase que contiene las funciones que interactuaran con el modelo SMARTS
     """
+    aerosol_model = "S&F_URBAN"
 
     def __init__(self, parameters: dict, station: str) -> None:
         """
         Valores con los cuales se inicializa el modelo SMARTS
         ### inputs
-        + station      ----> Estacion que se analizara
+        + station      ----> Estacion que se analizara, del registro de
+                           estaciones (file stations)
         + hour_i       ----> Hora inicial para correr el modelo
         + hour_f       ----> Hora final para correr el modelo
         + lon_ i       ----> Longitud de onda inicial para el modelo
         + lon_ f       ----> Longitud de onda final para el modelo
         + igas         ----> Card 6a del Modelo SMARTS
-        + delta_lon    ----> Número de longitudes de onda que se saltara el resultado del modelo
         + total_minute ----> Total minutos que correra el modelo
+        + batch        ----> Ejecuta todos los minutos en una sola llamada del modelo
+        + scratch      ----> Cada ejecucion usa su propia carpeta temporal
+        + path_model   ----> Carpeta que contiene smarts.out y sus datos de referencia
+        + path_run     ----> Carpeta donde se escriben los archivos data.*
+        + binary       ----> smarts.out escribe los espectros en binario
+        + backend      ----> "executable" (smarts.out) o "engine" (extension f2py)
+        + cache        ----> Cache en disco de las integrales por cada input
+        + checkpoint   ----> Registra cada dia terminado para reanudar la ejecucion
+        + store        ----> Almacen columnar de resultados (results.bin)
+        + text_export  ----> Con store tambien escribe el <Date>.txt de cada dia
+        + wavelength   ----> Paso en nm de los espectros (wavelength step)
+        + aerosol      ----> Modelo de aerosoles de la Card 8 (ver aerosol_models)
+        + bands        ----> Bandas adicionales {nombre: [inicial, final]} o
+                           {nombre: [inicial, final, archivo de CIE_data, factor]}
+        + adaptive     ----> Tolerancia en W/m2 del muestreo adaptativo (adaptive step)
+        + spectra      ----> Guarda los espectros de cada minuto (spectra dtype,
+                           spectra compression)
+        + table        ----> Tabla precalculada del modo surrogate
+        + pipeline     ----> Ejecucion asincrona de smarts.out (ver pipeline.py),
+                           se asigna en las copias del modelo de cada hilo
+        + metrics      ----> Eventos de ejecucion en un archivo JSON lines y
+                           perfil de cProfile (profile), ver metrics.py
+        + geometry     ----> Posicion del sol de cada minuto por fecha, los
+                           minutos bajo minimum elevation no se modelan
         """
         self.params = parameters
-        self.delta_lon = parameters["wavelength initial"]-280+1
         self.total_minute = int(
             (parameters["hour final"]-parameters["hour initial"])*60)
+        # Modo batch: una sola ejecucion de smarts.out por dia
+        self.batch = parameters.get("batch", False)
+        # Carpetas aisladas para poder correr el modelo en paralelo
+        self.scratch = parameters.get("scratch", False)
+        self.path_model = abspath(parameters.get("path model", "."))
+        self.path_run = "."
+        self.pipeline = None
+        # Eventos de ejecucion, add_hook registra funciones que los reciben
+        self.metrics = SMARTS_metrics(parameters.get("metrics"),
+                                      parameters.get("profile"))
+        # Resultados del modelo en binario en lugar de texto
+        self.binary = parameters.get("binary output", False)
+        # Ejecutable smarts.out o extension smarts_engine dentro del proceso
+        self.backend = parameters.get("backend", "executable")
+        self.engine = None
+        if self.backend == "engine":
+            self.engine = SMARTS_engine(self.path_model)
+        # Texto del input de la ultima ejecucion y resultados del motor
+        self.deck = ""
+        self.results = None
+        # Cache de resultados, se desactiva con "cache": False
+        self.cache = None
+        if parameters.get("cache", True):
+            self.cache = SMARTS_cache(parameters.get("file cache",
+                                                     "SMARTS_cache.sqlite"),
+                                      parameters.get("cache size", 100000))
+            # Hash del modelo que se ejecuta, smarts.out o la extension
+            self.model_id = file_hash(self.model_filename())
+        self.checkpoint = parameters.get("checkpoint", False)
+        # Resultados en un solo archivo por carpeta en lugar de un .txt por dia
+        self.store = parameters.get("store", False)
+        self.text_export = parameters.get("text export", True)
+        self.station = station
         self.define_location(station)
+        # Posicion del sol de cada minuto, se calcula una vez por fecha
+        self.geometry = SMARTS_geometry(self.lat,
+                                        self.lon,
+                                        self.timezone,
+                                        self.obtain_hours(),
+                                        parameters.get("minimum elevation", -1))
+        # Paso de los espectros de la Card 12a, "auto" lo elige con el error
+        # estimado a partir de las tablas Solar y Gases
+        self.wavelength_step = parameters.get("wavelength step", 1)
+        if self.wavelength_step == "auto":
+            self.wavelength_step = select_step(self.path_model,
+                                               parameters["wavelength initial"],
+                                               parameters["wavelength final"],
+                                               parameters.get("wavelength tolerance", 0.001))
+        # Modelo de aerosoles de la Card 8
+        self.aerosol_model = parameters.get("aerosol model",
+                                            self.aerosol_model)
+        self.build_template()
+        # Bandas adicionales que se integran de cada espectro
+        self.bands = parameters.get("bands", {})
+        self.band_matrix = None
+        for name, band in self.bands.items():
+            if band[0] < parameters["wavelength initial"] or band[1] > parameters["wavelength final"]:
+                raise ValueError(f"La banda {name} esta fuera de wavelength "
+                                 "initial y wavelength final")
+        # Tolerancia (W/m2) del muestreo adaptativo, None para modelar cada minuto
+        self.adaptive = parameters.get("adaptive tolerance", None)
+        # Espectros completos de cada minuto en la carpeta Spectra
+        self.keep_spectra = parameters.get("spectra", False)
+        if self.adaptive and self.keep_spectra:
+            raise ValueError("Con spectra se modela cada minuto, quitar "
+                             "adaptive tolerance")
+        self.spectra_records = []
+        self.spectra_wavelength = None
+        # Modo surrogate: tabla de integrales por angulo cenital, AOD y ozono,
+        # se construye al final porque ejecuta el modelo
+        self.table = None
+        if parameters.get("surrogate", False):
+            if self.bands or self.keep_spectra:
+                raise ValueError("El modo surrogate solo calcula la "
+                                 "irradiancia total, quitar bands y spectra")
+            self.table = SMARTS_table(self)
+
+    def add_hook(self, hook: callable) -> None:
+        """
+        Registra una funcion que recibe cada evento de ejecucion (run, stage,
+        day, search, skip) como diccionario. Con workers > 1 los eventos de
+        los procesos solo se escriben en el archivo de metrics.
+        """
+        self.metrics.add_hook(hook)
+
+    def model_filename(self) -> str:
+        """
+        Archivo del modelo que se ejecuta, smarts.out o la extension
+        smarts_engine
+        """
+        if self.engine is None:
+            return join(self.path_model,
+                        "smarts.out")
+        return self.engine.filename
 
     def define_location(self, station: str) -> None:
-        stations = {
-            "centro": {
-                "Lat": 25.670,
-                "Lon": -100.338,
-                "Height": 0.560},
-            "noreste": {
-                "Lat": 25.750,
-                "Lon": -100.255,
-                "Height": 0.476},
-            "noroeste": {
-                "Lat": 25.757,
-                "Lon": -100.366,
-                "Height": 0.571},
-            "sureste2": {
-                "Lat": 25.646,
-                "Lon": -100.096,
-                "Height": 0.387},
-            "suroeste": {
-                "Lat": 25.676,
-                "Lon": -100.464,
-                "Height": 0.694}
-        }
+        """
+        Coordenadas, altura y zona horaria de la estacion a partir del
+        registro de estaciones
+        """
+        filename = self.params.get("file stations",
+                                   join(self.path_model, "stations.json"))
+        stations = read_stations(filename)
+        if station not in stations:
+            raise ValueError(f"La estacion {station} no esta en {filename}, "
+                             f"estaciones: {', '.join(stations)}")
         self.lat = stations[station]["Lat"]
         self.lon = stations[station]["Lon"]
         self.height = stations[station]["Height"]
+        self.timezone = stations[station]["Timezone"]
 
     def atmosphere_state(self):
         pass
@@ -83,162 +236,888 @@ class SMARTS:
         + aod   ----> AOD del dia
         + name  ----> nombre del archivo de resultados
         + path  ----> direccion para guardar los archivos
+        ### output:
+        + Integrales de cada minuto del dia
+        """
+        # Hora y minutos a hora con decimal
+        hours = self.obtain_hours()
+        integrals = self.run_hours(day,
+                                   month,
+                                   year,
+                                   hours,
+                                   o3,
+                                   aod)
+        with self.metrics.stage("write"):
+            self.write_results(name,
+                               path,
+                               integrals)
+            if self.keep_spectra:
+                self.write_spectra(name,
+                                   path,
+                                   hours)
+        return self.obtain_broadband(integrals)
+
+    def obtain_hours(self) -> list:
+        return [self.hour_and_minute_to_hours(minute)
+                for minute in range(self.total_minute)]
+
+    def write_results(self,
+                      name: str,
+                      path: str,
+                      integrals: list) -> None:
         """
+        Escritura de las integrales de un dia en el almacen columnar y/o
+        en el archivo <name>.txt
+        """
+        if self.store:
+            self.obtain_store(path).append(name,
+                                           integrals)
+            if not self.text_export:
+                return
         filename = f"{name}.txt"
         filename = join(path,
                         filename)
-        file_date = open(filename,
+        # Escritura de los resultados, el archivo se reemplaza al terminar
+        # para no dejar archivos incompletos si el proceso se detiene
+        file_date = open(f"{filename}.tmp",
                          "w")
-        for minute in range(self.total_minute):
-            # Hora y minutos a hora con decimal
-            minutes = self.hour_and_minute_to_hours(minute)
-            # Escribir el archivo de input para el modelo SMARTS
-            self.write_data_input(day,
-                                  month,
-                                  year,
-                                  minutes,
-                                  o3,
-                                  aod)
-            terminal("./smarts.out")
-            # Resultado de la integral a partir de los resultaos del modelo SMARTS
-            integral = self.read_results()
-            # Escritura de los resultados
-            file_date.write("{} {}\n".format(minutes,
+        for hour, integral in zip(self.obtain_hours(), integrals):
+            file_date.write("{} {}\n".format(hour,
                                              integral))
         file_date.close()
+        replace(f"{filename}.tmp",
+                filename)
+
+    def write_spectra(self, name: str, path: str, hours: list) -> None:
+        """
+        Escritura de los espectros de cada minuto de la ultima ejecucion de
+        run_hours, los minutos con el sol bajo el horizonte quedan en 0
+        """
+        if self.spectra_wavelength is None:
+            return
+        total = sum(records for records, _, _ in self.spectra_records)
+        irradiance = zeros((total,
+                            len(self.spectra_wavelength)),
+                           dtype=float32)
+        start = 0
+        for records, solved, values in self.spectra_records:
+            irradiance[[start+record for record in solved]] = values
+            start += records
+        self.obtain_spectra(path).write(name,
+                                        hours,
+                                        self.spectra_wavelength,
+                                        irradiance)
+
+    def obtain_spectra(self, path: str) -> SMARTS_spectra:
+        """
+        Espectros de la carpeta de resultados
+        """
+        return SMARTS_spectra(join(path, "Spectra"),
+                              self.params.get("spectra dtype", "float32"),
+                              self.params.get("spectra compression", False))
+
+    def obtain_store(self, path: str) -> SMARTS_store:
+        """
+        Almacen columnar de la carpeta de resultados
+        """
+        return SMARTS_store(path,
+                            self.station,
+                            self.obtain_hours(),
+                            ["integral"]+list(self.bands))
+
+    def results_exist(self, path: str) -> callable:
+        """
+        Funcion que indica si los resultados de un dia ya estan escritos
+        en la carpeta path
+        """
+        if self.store:
+            dates = self.obtain_store(path).dates()
+            return lambda name: str(name) in dates
+        return lambda name: exists(join(path, f"{name}.txt"))
+
+    def run_day(self, arguments: dict) -> None:
+        """
+        Ejecucion de SMARTS.run para un dia, si el modo checkpoint esta
+        activo el dia se registra en la carpeta de resultados
+        """
+        start = perf_counter()
+        self.run(**arguments)
+        self.metrics.emit("day",
+                          name=arguments["name"],
+                          seconds=perf_counter()-start)
+        if self.checkpoint:
+            checkpoint = self.obtain_checkpoint(arguments["path"])
+            checkpoint.append(arguments["name"],
+                              inputs=self.day_inputs(arguments))
+
+    def day_inputs(self, arguments: dict) -> dict:
+        """
+        Datos de entrada de un dia que se guardan en el checkpoint
+        """
+        return {key: float(arguments[key])
+                for key in ["year", "month", "day", "o3", "aod"]}
+
+    def pending_days(self, days: list) -> list:
+        """
+        Dias que no se han calculado con los parametros y datos de entrada
+        actuales
+        ### inputs:
+        + days ----> Lista de argumentos de SMARTS.run para cada dia
+        """
+        if not self.checkpoint:
+            return days
+        finished = {}
+        written = {}
+        pending = []
+        for arguments in days:
+            path = arguments["path"]
+            if path not in finished:
+                finished[path] = self.obtain_checkpoint(path)
+                finished[path].load()
+                written[path] = self.results_exist(path)
+            name = arguments["name"]
+            inputs = finished[path].inputs.get(str(name))
+            if inputs == self.day_inputs(arguments) and written[path](name):
+                continue
+            pending += [arguments]
+        self.metrics.emit("skip",
+                          days=len(days)-len(pending))
+        return pending
+
+    def obtain_checkpoint(self,
+                          path: str,
+                          name: str = "checkpoint.jsonl") -> SMARTS_checkpoint:
+        """
+        Archivo de puntos de control con la firma de los parametros actuales
+        """
+        signature = parameters_signature(self.params,
+                                         type(self).__name__,
+                                         self.station)
+        return SMARTS_checkpoint(join(path, name),
+                                 signature)
+
+    def run_hours(self,
+                  day: int,
+                  month: int,
+                  year: int,
+                  hours: list,
+                  o3: float,
+                  aod: float) -> list:
+        """
+        Ejecucion del modelo SMARTS para una lista de horas del dia, las
+        horas con el sol bajo minimum elevation tienen irradiancia 0 y no
+        se envian al modelo
+        ### output:
+        + Lista de integrales de cada hora
+        """
+        self.spectra_records = []
+        visible = self.geometry.visible(year,
+                                        month,
+                                        day,
+                                        hours)
+        if visible.all():
+            return self.run_visible_hours(day,
+                                          month,
+                                          year,
+                                          hours,
+                                          o3,
+                                          aod)
+        positions = where(visible)[0]
+        integrals = [self.format_integrals(zeros(1+len(self.bands)))]*len(hours)
+        if len(positions):
+            results = self.run_visible_hours(day,
+                                             month,
+                                             year,
+                                             [hours[position]
+                                              for position in positions],
+                                             o3,
+                                             aod)
+            for position, integral in zip(positions, results):
+                integrals[position] = integral
+        if self.keep_spectra:
+            self.expand_spectra(len(hours),
+                                positions)
+        return integrals
+
+    def expand_spectra(self, total: int, positions: array) -> None:
+        """
+        Registros de los espectros con todas las horas del dia, positions
+        son las horas que se enviaron al modelo
+        """
+        solved = []
+        values = []
+        start = 0
+        for records, records_solved, records_values in self.spectra_records:
+            solved += [positions[start+record] for record in records_solved]
+            if records_values is not None:
+                values += [records_values]
+            start += records
+        self.spectra_records = [(total,
+                                 solved,
+                                 vstack(values) if values else None)]
+
+    def run_visible_hours(self,
+                          day: int,
+                          month: int,
+                          year: int,
+                          hours: list,
+                          o3: float,
+                          aod: float) -> list:
+        if self.table is not None:
+            # Modo surrogate: interpolacion en la tabla precalculada
+            return self.table.integrals(day,
+                                        month,
+                                        year,
+                                        hours,
+                                        o3,
+                                        aod)
+        if self.adaptive and len(hours) > 2:
+            # Solo se modelan algunas horas, el resto se interpola
+            return self.run_adaptive(day,
+                                     month,
+                                     year,
+                                     hours,
+                                     o3,
+                                     aod)
+        with self.working_directory():
+            if self.batch:
+                integrals = self.run_batch(day,
+                                           month,
+                                           year,
+                                           hours,
+                                           o3,
+                                           aod)
+            else:
+                integrals = [self.run_minute(day,
+                                             month,
+                                             year,
+                                             hour,
+                                             o3,
+                                             aod)
+                             for hour in hours]
+        return integrals
+
+    def run_adaptive(self,
+                     day: int,
+                     month: int,
+                     year: int,
+                     hours: list,
+                     o3: float,
+                     aod: float) -> list:
+        """
+        Ejecucion del modelo SMARTS cada adaptive step minutos, cada
+        intervalo se divide a la mitad mientras la interpolacion en su punto
+        medio difiera del modelo mas de adaptive tolerance (W/m2). Las horas
+        que no se modelan se interpolan (PCHIP) con los valores del modelo.
+        ### output:
+        + Lista de integrales de cada hora
+        """
+        step = self.params.get("adaptive step", 30)
+        last = len(hours)-1
+        positions = sorted(set(range(0, last, step)) | {last})
+        intervals = [(start, end)
+                     for start, end in zip(positions[:-1], positions[1:])
+                     if end-start > 1]
+        samples = {}
+        with self.working_directory():
+            while positions:
+                prediction = None
+                if samples:
+                    prediction = self.interpolate_samples(samples,
+                                                          positions)
+                # Todas las horas nuevas en una sola llamada del modelo
+                results = self.run_batch(day,
+                                         month,
+                                         year,
+                                         [hours[position]
+                                          for position in positions],
+                                         o3,
+                                         aod)
+                for position, integral in zip(positions, results):
+                    samples[position] = integral
+                if prediction is not None:
+                    model = self.obtain_broadband(results)
+                    error = abs(model-prediction[:, 0])
+                    refine = {position
+                              for position, value in zip(positions, error)
+                              if value > self.adaptive}
+                    intervals = [interval
+                                 for start, end in intervals
+                                 if (start+end)//2 in refine
+                                 for interval in [(start, (start+end)//2),
+                                                  ((start+end)//2, end)]
+                                 if interval[1]-interval[0] > 1]
+                positions = sorted({(start+end)//2
+                                    for start, end in intervals})
+        interpolated = self.interpolate_samples(samples,
+                                                range(len(hours)))
+        return [samples[position] if position in samples
+                else self.format_integrals(interpolated[position])
+                for position in range(len(hours))]
+
+    def interpolate_samples(self, samples: dict, positions: list) -> array:
+        """
+        Interpolacion PCHIP de las integrales (y bandas) modeladas
+        ### output:
+        + arreglo (len(positions), 1+bandas)
+        """
+        known = sorted(samples)
+        values = array([[float(value) for value in str(samples[position]).split()]
+                        for position in known])
+        return PchipInterpolator(known,
+                                 values,
+                                 axis=0)(list(positions))
+
+    def run_minute(self,
+                   day: int,
+                   month: int,
+                   year: int,
+                   hour: float,
+                   o3: float,
+                   aod: float) -> str:
+        """
+        Ejecucion del modelo SMARTS para un solo minuto
+        """
+        # Escribir el archivo de input para el modelo SMARTS
+        self.write_data_input(day,
+                              month,
+                              year,
+                              hour,
+                              o3,
+                              aod)
+        # Resultado de la integral a partir de los resultaos del modelo SMARTS
+        integral = self.run_model(1)[0]
+        return integral
+
+    def run_batch(self,
+                  day: int,
+                  month: int,
+                  year: int,
+                  hours: list,
+                  o3: float,
+                  aod: float) -> list:
+        """
+        Ejecucion del modelo SMARTS para todas las horas en una sola llamada,
+        el modelo lee una Card 17a por cada hora
+        """
+        records = [(year, month, day, hour) for hour in hours]
+        self.write_data_input(day,
+                              month,
+                              year,
+                              records,
+                              o3,
+                              aod)
+        integrals = self.run_model(len(records))
+        return integrals
+
+    def run_records(self, records: list) -> list:
+        """
+        Ejecucion del modelo SMARTS para una lista de registros
+        (year, month, day, hour, o3, aod). Los registros que comparten
+        ozono y AOD se resuelven en una sola llamada del modelo.
+        ### output:
+        + Lista de integrales en el mismo orden que records
+        """
+        groups = {}
+        for position, record in enumerate(records):
+            year, month, day, hour, o3, aod = record
+            groups.setdefault((o3, aod), []).append(position)
+        integrals = [None]*len(records)
+        with self.working_directory():
+            for (o3, aod), positions in groups.items():
+                dates = [records[position][:4] for position in positions]
+                year, month, day, _ = dates[0]
+                self.write_data_input(day,
+                                      month,
+                                      year,
+                                      dates,
+                                      o3,
+                                      aod)
+                results = self.run_model(len(dates))
+                for position, integral in zip(positions, results):
+                    integrals[position] = integral
+        return integrals
+
+    def run_zeniths(self,
+                    zeniths: list,
+                    o3: float,
+                    aod: float) -> list:
+        """
+        Ejecucion del modelo SMARTS para una lista de angulos cenitales,
+        usado para construir la tabla del modo surrogate
+        ### output:
+        + Lista de integrales sin redondear de cada angulo
+        """
+        with self.working_directory():
+            deck = self.render_zenith_input(zeniths,
+                                            o3,
+                                            aod)
+            self.write_deck(deck)
+            self.execute_model(len(zeniths))
+            integrals = self.integrate_results(len(zeniths))
+            self.clean_files()
+        return integrals[:, 0].tolist()
+
+    def run_deck(self, deck: str, total_records: int) -> list:
+        """
+        Ejecucion del modelo SMARTS con el texto completo del input, usado
+        por el modo ensemble
+        ### output:
+        + Lista de integrales de cada Card 17a
+        """
+        with self.working_directory():
+            self.write_deck(deck)
+            integrals = self.run_model(total_records)
+        return integrals
+
+    def run_model(self, total_records: int) -> list:
+        """
+        Ejecucion del modelo SMARTS con el data.inp.txt de la carpeta de
+        trabajo. Si el cache esta activo y ya existe el resultado de las
+        mismas cards no se ejecuta smarts.out
+        ### output:
+        + Lista de integrales de cada Card 17a
+        """
+        start = perf_counter()
+        # Los espectros solo se obtienen ejecutando el modelo
+        if self.cache is None or self.keep_spectra:
+            integrals = self.execute_and_read(total_records)
+            self.metrics.emit("run",
+                              records=total_records,
+                              cached=False,
+                              seconds=perf_counter()-start)
+            return integrals
+        parts = [self.model_id,
+                 str(self.binary)]
+        if self.bands:
+            parts += [json.dumps(self.bands)]
+        key = self.cache.key(*parts,
+                             self.read_data_input())
+        integrals = self.cache.get(key)
+        if integrals is not None:
+            self.clean_files()
+            self.metrics.emit("run",
+                              records=total_records,
+                              cached=True,
+                              seconds=perf_counter()-start)
+            return integrals
+        integrals = self.execute_and_read(total_records)
+        self.cache.set(key,
+                       integrals)
+        self.metrics.emit("run",
+                          records=total_records,
+                          cached=False,
+                          seconds=perf_counter()-start)
+        return integrals
+
+    def execute_and_read(self, total_records: int) -> list:
+        with self.metrics.stage("execute"):
+            self.execute_model(total_records)
+        with self.metrics.stage("read"):
+            integrals = self.read_results_batch(total_records)
+        return integrals
+
+    def read_data_input(self) -> str:
+        return self.deck
+
+    def write_deck(self, deck: str) -> None:
+        """
+        Escritura del input del modelo SMARTS en data.inp.txt, el motor
+        dentro del proceso recibe el texto sin archivos
+        """
+        self.deck = deck
+        if self.engine is not None:
+            return
+        with open(join(self.path_run, "data.inp.txt"), "w") as file:
+            file.write(deck)
+
+    @contextmanager
+    def working_directory(self):
+        """
+        Crea una carpeta temporal con enlaces a smarts.out, Gases, Solar,
+        Albedo y CIE_data si el modo scratch esta activo. La carpeta se
+        elimina al terminar la ejecucion.
+        """
+        # El motor dentro del proceso no escribe archivos
+        if not self.scratch or self.engine is not None:
+            yield self.path_run
+            return
+        path_run = mkdtemp(prefix="SMARTS_",
+                           dir=self.params.get("path scratch"))
+        link_model_files(self.path_model,
+                         path_run)
+        self.path_run = path_run
+        try:
+            yield path_run
+        finally:
+            self.path_run = "."
+            rmtree(path_run,
+                   ignore_errors=True)
+
+    def execute_model(self, total_records: int) -> None:
+        """
+        Ejecucion de smarts.out dentro de la carpeta de trabajo
+        ### inputs:
+        + total_records ----> Número de Card 17a escritas en el input
+        """
+        if self.pipeline is not None:
+            # El proceso lo ejecuta el ciclo de asyncio del pipeline
+            self.pipeline.execute(self.path_run)
+            return
+        if self.engine is not None:
+            self.results = self.engine.run(self.deck,
+                                           total_records)
+            return
+        command = "./smarts.out"
+        if self.binary:
+            # Archivo de resultados en binario (ver smarts.f)
+            command = f"SMARTS_BINARY=1 {command}"
+        if self.path_run != ".":
+            command = f'cd "{self.path_run}" && {command}'
+        terminal(command)
+
+    def clean_files(self) -> None:
+        """
+        Eliminación de los archivos data.* de la carpeta de trabajo
+        """
+        if self.engine is not None:
+            return
+        files = [join(self.path_run, f"data.{extension}.txt")
+                 for extension in ["inp", "out", "ext", "scn"]]
+        remove_files(files)
 
     def hour_and_minute_to_hours(self, minute: int) -> float:
         return round(self.params["hour initial"]+minute/60, 4)
 
-    def read_results(self, name_result: str = "data.ext.txt"):
-        """
-        Funcion que realiza la lectura de los resultados del SMARTS
-        y realiza la integral del especto a cada minuto
-        Describción de variables
-        + wavelength ----> longitudes de onda de los resultados del modelo SMARTS
-        + irra       ----> Valor del especto de los resultados del modelo SMARTS
-        + integral   ----> Valor que irradiancia solar
-        """
-        # Lectura de los resultados del modelo SMARTS
-        wavelength, irradiance = loadtxt(name_result,
-                                         skiprows=self.delta_lon,
-                                         unpack=True)
-        # Calculo de la irradiancia solar a partir de los resultados del modelo SMARTS
-        integral = trapz(irradiance,
-                         wavelength)
+    def read_results_batch(self,
+                           total_records: int,
+                           name_result: str = "data.ext.txt",
+                           name_output: str = "data.out.txt") -> list:
+        """
+        Funcion que realiza la lectura de los resultados del SMARTS cuando
+        se ejecuto con varias Card 17a. El archivo de resultados contiene un
+        bloque por cada registro con el sol sobre el horizonte, los
+        registros restantes tienen irradiancia 0.
+        ### inputs:
+        + total_records ----> Número de Card 17a escritas en el input
+        """
+        integrals = self.integrate_results(total_records,
+                                           name_result,
+                                           name_output)
         # Eliminación de los archivos
-        terminal("rm data*")
-        # Formato de la integral
-        integral = str(round(integral))
-        return integral
+        self.clean_files()
+        return [self.format_integrals(row) for row in integrals]
 
-    def write_data_input(self, day: int,
-                         month: int,
-                         year: int,
-                         hour: int,
-                         ozono: int,
-                         aod: int) -> None:
+    def format_integrals(self, row: array) -> str:
+        """
+        Texto del resultado de un registro, la irradiancia total como entero
+        seguida de cada banda con dos decimales
+        """
+        values = [str(round(float(row[0])))]
+        values += [str(round(float(value), 2)) for value in row[1:]]
+        return " ".join(values)
+
+    def obtain_broadband(self, integrals: list) -> array:
+        """
+        Irradiancia total de cada registro sin las bandas adicionales
         """
-        Formato del input del modelo SMARTS
+        return array([float(str(integral).split()[0])
+                      for integral in integrals])
+
+    def integrate_results(self,
+                          total_records: int,
+                          name_result: str = "data.ext.txt",
+                          name_output: str = "data.out.txt") -> array:
+        """
+        Integrales sin redondear de cada Card 17a, 0 para los registros
+        con el sol bajo el horizonte
+        ### output:
+        + arreglo (total_records, 1+bandas), la primera columna es la
+          irradiancia total
+        """
+        # Registros resueltos por el modelo (ERROR #7 = sol bajo el horizonte)
+        if self.engine is not None:
+            solved = self.results[0].tolist()
+        else:
+            with open(join(self.path_run, name_output), "r", errors="ignore") as file:
+                status = re.findall(r"SOLAR POSITION|ERROR #7",
+                                    file.read())
+            solved = [value != "ERROR #7" for value in status]
+        integrals = zeros((total_records,
+                           1+len(self.bands)))
+        if any(solved):
+            # Lectura de los resultados del modelo SMARTS
+            wavelength, irradiance = self.read_spectra(sum(solved),
+                                                       name_result)
+            if self.bands:
+                # Todas las bandas de todos los registros en un solo producto
+                results = irradiance @ self.obtain_band_matrix(wavelength).T
+            else:
+                # Calculo de la irradiancia solar de todos los registros
+                results = trapz(irradiance,
+                                wavelength,
+                                axis=1)[:, None]
+            records = [record
+                       for record, is_solved in enumerate(solved[:total_records])
+                       if is_solved]
+            integrals[records] = results[:len(records)]
+            if self.keep_spectra:
+                self.spectra_wavelength = wavelength
+                self.spectra_records += [(total_records,
+                                          records,
+                                          irradiance[:len(records)])]
+        elif self.keep_spectra:
+            self.spectra_records += [(total_records, [], None)]
+        return integrals
+
+    def obtain_band_matrix(self, wavelength: array) -> array:
+        """
+        Matriz (1+bandas, longitudes de onda) con los pesos de la regla del
+        trapecio multiplicados por la funcion de cada banda, la primera fila
+        es la irradiancia total. Se calcula una sola vez.
+        """
+        if self.band_matrix is not None and self.band_matrix.shape[1] == len(wavelength):
+            return self.band_matrix
+        step = diff(wavelength)
+        quadrature = zeros(len(wavelength))
+        quadrature[:-1] += step/2
+        quadrature[1:] += step/2
+        weights = [ones(len(wavelength))]
+        weights += [self.obtain_band_weight(band,
+                                            wavelength)
+                    for band in self.bands.values()]
+        self.band_matrix = array(weights)*quadrature
+        return self.band_matrix
+
+    def obtain_band_weight(self, band: list, wavelength: array) -> array:
+        """
+        Funcion de una banda sobre las longitudes de onda del modelo
         ### inputs:
-        + day   -> Dia del año
-        + month -> Mes del año númerico
-        + year  -> Año del dia por analizar
-        + hour  -> Hora del calculo de la irradiancia
-        + ozono -> ozono del dia
-        + aod   -> AOD del dia
+        + band ----> [inicial, final] o [inicial, final, archivo de CIE_data, factor]
+        """
+        wavelength_min, wavelength_max, *weighting = band
+        weight = (wavelength >= wavelength_min) & (wavelength <= wavelength_max)
+        weight = weight.astype(float)
+        if weighting:
+            name, factor = (weighting+[1])[:2]
+            data = loadtxt(join(self.path_model, "CIE_data", f"{name}.dat"),
+                           skiprows=1)
+            weight *= factor*interp(wavelength,
+                                    data[:, 0],
+                                    data[:, 1],
+                                    left=0,
+                                    right=0)
+        return weight
+
+    def read_spectra(self,
+                     total_records: int,
+                     name_result: str = "data.ext.txt") -> tuple:
+        """
+        Lectura de los espectros del archivo de resultados del modelo SMARTS,
+        en modo binario se leen los valores real*4 sin convertir texto
+        ### output:
+        + wavelength ----> longitudes de onda a partir de wavelength initial
+        + irradiance ----> arreglo (total_records, longitudes de onda)
+        """
+        filename = join(self.path_run,
+                        name_result)
+        if self.engine is not None:
+            # Espectros del motor dentro del proceso, real*4 como en binario
+            data = self.results[1]
+        elif self.binary:
+            data = fromfile(filename,
+                            dtype=float32)
+            if data[:1].tobytes() == b"Wvlg":
+                raise ValueError("smarts.out escribio texto, es necesario "
+                                 "compilar de nuevo Code/smarts.f")
+        else:
+            data = loadtxt(filename,
+                           comments="W")
+        data = data.reshape(total_records, -1, 2)
+        # Se omiten las longitudes de onda menores a wavelength initial
+        start = searchsorted(data[0, :, 0],
+                             self.params["wavelength initial"])
+        data = data[:, start:]
+        wavelength = data[0, :, 0]
+        irradiance = data[:, :, 1]
+        return wavelength, irradiance
+
+    def build_template(self) -> None:
+        """
+        Formato del input del modelo SMARTS. Solo la Card 1, la Card 5,
+        la Card 9a y la Card 17a cambian entre ejecuciones, el resto de
+        las cards se escribe una sola vez al inicializar el modelo
+        + aod   -> Card 1 y Card 9a
+        + ozone -> Card 5
         + igas  -> Card 6a
         """
-        file = open("data.inp.txt", "w")
-        file.write(" 'AOD={} '\n".format(aod))
+        cards = []
+        # Card 1
+        cards += [" 'AOD={aod} '"]
         # Card 2
-        file.write(" 2\n")
+        cards += [" 2"]
         # Card 2a
         # lat,altit,height
-        file.write(" {:.3f} {} {}\n".format(self.lat,
-                                            self.height,
-                                            0))
+        cards += [" {:.3f} {} {}".format(self.lat,
+                                         self.height,
+                                         0)]
         # Card 3
         # IATMOS
-        file.write(" 1\n")
+        cards += [" 1"]
         # Card 3a
-        file.write(" 'USSA'\n")
+        cards += [" 'USSA'"]
         # Card 4
         # H2O
-        file.write(" 1\n")
+        cards += [" 1"]
         # Card 4a
-        file.write(" 0\n")
+        cards += [" 0"]
         # Card 5
         # Ozono
-        file.write(" {} {:.4f}\n".format(1,
-                                         ozono/1000))
+        cards += [" 1 {ozone:.4f}"]
         # Card 6
-        file.write(" 0\n")
+        cards += [" 0"]
         # Card 6a
         # Pristine ----> 1
         # Moderate ----> 3
-        file.write(" {}\n".format(self.params["igas"]))
+        cards += [" {}".format(self.params["igas"])]
         # Card 7
         # Co2
-        file.write(" 390\n")
+        cards += [" 390"]
         # Card 7a
-        file.write(" 0\n")
-        # Card 8
-        file.write(" 'S&F_URBAN'\n")
+        cards += [" 0"]
+        # Card 8 y Card 8a
+        cards += aerosol_models[self.aerosol_model]
         # Card 9
-        file.write(" 5\n")
+        cards += [" 5"]
         # Card 9a
-        file.write(" {} {}\n".format(aod,
-                                     2))
+        cards += [" {aod} 2"]
         # Card 10
-        file.write(" 18\n")
+        cards += [" 18"]
         # Card 10b
-        file.write(" 1\n")
+        cards += [" 1"]
         # Card 10d
         # IALBDG, TILT,WAZIM
-        file.write(" {} {} {}\n".format(51,
-                                        37.,
-                                        180.))
+        cards += [" {} {} {}".format(51,
+                                     37.,
+                                     180.)]
         # Card 11---
         # Wave min, Wave max, suncor, solar cons
-        file.write(" {} {} {} {}\n".format(self.params["wavelength initial"],
-                                           self.params["wavelength final"],
-                                           1,
-                                           1366.1))
+        cards += [" {} {} {} {}".format(self.params["wavelength initial"],
+                                        self.params["wavelength final"],
+                                        1,
+                                        1366.1)]
         # ------Card 12---
-        file.write(" 2\n")
+        cards += [" 2"]
         # Card 12a
         # Wave min, Wave max, inter wave
-        file.write(" {} {} {}\n".format(self.params["wavelength initial"],
-                                        self.params["wavelength final"],
-                                        1))
+        cards += [" {} {} {}".format(self.params["wavelength initial"],
+                                     self.params["wavelength final"],
+                                     self.wavelength_step)]
         # Card 12b
-        file.write(" 1\n")
+        cards += [" 1"]
         # Card 12c
-        file.write(" 4\n")
+        cards += [" 4"]
         # Card 13
-        file.write(" 1\n")
+        cards += [" 1"]
         # Card 13a
         #  slope, apert, limit
-        file.write(" 0 2.9 0\n")
+        cards += [" 0 2.9 0"]
         # Card 14
-        file.write(" 0\n")
+        cards += [" 0"]
         # Card 15
-        file.write(" 0\n")
+        cards += [" 0"]
         # Card 16
-        file.write(" 1\n")
+        # IUV=1, smarts.f escribe la malla de la Card 12a desde 280 nm
+        # (ver resolution.output_wavelengths)
+        cards += [" 1"]
+        self.template = "\n".join(cards)+"\n"
         # Card 17
-        file.write(" 3\n")
+        # IMASS=3 (fecha y hora) o IMASS=0 (angulo cenital)
+        self.template_17 = " {}\n"
         # Card 17a
         # Year, month, day, hour, latit, longit, zone
-        file.write(" {} {} {} {} {} {} {}\n".format(year,
-                                                    month,
-                                                    day,
-                                                    hour,
-                                                    self.lat,
-                                                    self.lon,
-                                                    -6))
-        file.close()
+        self.template_17a = " {} {} {} {} "+"{} {} {}\n".format(self.lat,
+                                                               self.lon,
+                                                               self.timezone)
+        # Card 17a con IMASS=0
+        # Zenit, Azim
+        self.template_17a_zenith = " {} 180\n"
+
+    def render_data_input(self,
+                          records: list,
+                          ozone: float,
+                          aod: float) -> str:
+        """
+        Texto del input del modelo SMARTS a partir del formato
+        ### inputs:
+        + records -> Lista de (year, month, day, hour), una Card 17a por registro
+        + ozone   -> ozono del dia
+        + aod     -> AOD del dia
+        """
+        deck = self.template.format(aod=aod,
+                                    ozone=ozone/1000)
+        deck += self.render_records(records)
+        return deck
+
+    def render_records(self, records: list) -> str:
+        """
+        Texto de la Card 17 y de una Card 17a por registro, no depende del
+        ozono ni del AOD
+        ### inputs:
+        + records -> Lista de (year, month, day, hour)
+        """
+        deck = self.template_17.format(3)
+        # Año, mes y dia como enteros aunque vengan de un csv con flotantes
+        deck += "".join([self.template_17a.format(int(year),
+                                                  int(month),
+                                                  int(day),
+                                                  hour)
+                         for year, month, day, hour in records])
+        return deck
+
+    def render_zenith_input(self,
+                            zeniths: list,
+                            ozone: float,
+                            aod: float) -> str:
+        """
+        Texto del input del modelo SMARTS con el angulo cenital en lugar de
+        la fecha (IMASS=0), sin correccion de la distancia Tierra-Sol
+        ### inputs:
+        + zeniths -> Lista de angulos cenitales, una Card 17a por angulo
+        + ozone   -> ozono del dia
+        + aod     -> AOD del dia
+        """
+        deck = self.template.format(aod=aod,
+                                    ozone=ozone/1000)
+        deck += self.template_17.format(0)
+        deck += "".join([self.template_17a_zenith.format(zenith)
+                         for zenith in zeniths])
+        return deck
+
+    def write_data_input(self, day: int,
+                         month: int,
+                         year: int,
+                         hour: int,
+                         ozono: int,
+                         aod: int) -> None:
+        """
+        Escritura del input del modelo SMARTS
+        ### inputs:
+        + day   -> Dia del año
+        + month -> Mes del año númerico
+        + year  -> Año del dia por analizar
+        + hour  -> Hora del calculo de la irradiancia, o lista de
+                   (year, month, day, hour) para el modo batch
+        + ozono -> ozono del dia
+        + aod   -> AOD del dia
+        """
+        # Se escribe una Card 17a por cada registro en modo batch
+        if not isinstance(hour, list):
+            hour = [(year, month, day, hour)]
+        deck = self.render_data_input(hour,
+                                      ozono,
+                                      aod)
+        self.write_deck(deck)
 
 
 class SMARTS_DR(SMARTS):
@@ -255,11 +1134,18 @@ class SMARTS_DR(SMARTS):
         + hour_f       ----> Hora final para correr el modelo
         + lon_ i       ----> Longitud de onda inicial para el modelo
         + lon_ f       ----> Longitud de onda final para el modelo
-        + delta_lon    ----> Número de longitudes de onda que se saltara
-                           el resultado del modelo
         + total_minute ----> Total minutos que correra el modelo
         + RD_lim       ----> RD al cual se quiere llegar
         + RD_delta     ----> Mas menos del RD
+        + search       ----> Metodo de busqueda del AOD (binary, secant o illinois)
+        + lockstep     ----> Busqueda de todos los dias al mismo tiempo por rondas
+        + warm_start   ----> Inicia la busqueda con el AOD de la fila anterior
+                           de file data, solo con un proceso
+        + peak_window  ----> Durante la busqueda solo se modela la ventana del maximo
+        + measurements ----> Archivo binario con las mediciones de la estacion
+        + part         ----> Nombre de la parte de los dias que calcula este
+                           nodo, sus resultados se escriben en parts/<part>
+                           (ver SMARTS_run.py)
         """
         SMARTS.__init__(self,
                         parameters=parameters,
@@ -268,6 +1154,26 @@ class SMARTS_DR(SMARTS):
         self.station = station
         self.delta_hour = int(
             self.params["hour final"]-self.params["hour initial"])
+        self.search = parameters.get("search", "binary")
+        self.warm_start = parameters.get("warm start", False)
+        self.peak_window = parameters.get("peak window", False)
+        self.lockstep = parameters.get("lockstep", False)
+        if self.warm_start and (self.lockstep or
+                                parameters.get("pipeline", False) or
+                                parameters.get("workers", 1) > 1):
+            raise ValueError("warm start necesita resolver los dias en orden, "
+                             "usar workers 1 sin pipeline ni lockstep")
+        self.aod_previous = None
+        self.integrals_search = {}
+        # Ejecuciones del modelo de la busqueda del dia
+        self.evaluations = 0
+        # Mediciones de todos los dias en un solo archivo binario
+        self.measurements = None
+        if parameters.get("measurement archive", False):
+            self.measurements = SMARTS_measurements(join(parameters["path stations"],
+                                                         station),
+                                                    parameters["folder measurements"])
+        self.part = None
         self.select_path_name_for_results()
 
     def select_path_name_for_results(self) -> dict:
@@ -279,18 +1185,40 @@ class SMARTS_DR(SMARTS):
         self.params["path results"] = self.params["path results"]+name+"/"
         self.params["file results"] = self.params["file results"]+name
 
-    def run_search(self) -> DataFrame:
+    def run_search(self, dates: list = None) -> DataFrame:
+        """
+        Busqueda del AOD de los dias de file data, con metrics se escribe
+        el resumen de la ejecucion al terminar
+        ### inputs:
+        + dates ----> Fechas que se calculan, None para todos los dias
+        """
+        start = time()
+        with self.metrics.profile(), self.metrics.stage("run_search"):
+            AOD_results = self.search_station(dates)
+        if self.metrics.filename is not None:
+            print(self.metrics.report(start))
+        return AOD_results
+
+    def search_station(self, dates: list = None) -> DataFrame:
         # Direccion donde se encuentran los datos de cada estacion
         station_path = join(self.params["path stations"],
                             self.station)
-        # Creacion de la carpeta resultados si es que no existe
         path_results = join(station_path,
                             self.params["path results"])
-        mkdir(path_results)
         # Archivo de resultados donde se guardara el AOD y la RD de cada dia
         filename = f'{self.params["file results"]}.csv'
         filename_results = join(station_path,
                                 filename)
+        if self.part is not None:
+            # Cada nodo escribe en su propia carpeta, merge_parts junta los
+            # resultados
+            path_results = join(path_results,
+                                "parts",
+                                self.part)
+            filename_results = join(path_results,
+                                    filename)
+        # Creacion de la carpeta resultados si es que no existe
+        mkdir(path_results)
         columns = ["Date",
                    "year",
                    "month",
@@ -298,65 +1226,459 @@ class SMARTS_DR(SMARTS):
                    "ozone",
                    "AOD",
                    "RD"]
-        AOD_results = DataFrame(columns=columns)
         # Lectura de los parametros de entrada de cada dia
         filename = join(station_path,
                         self.params["file data"])
         data = read_csv(filename)
-        with tqdm(data.index) as bar:
-            for i, index in enumerate(bar):
-                self.initialize_aod(self.params["AOD inicial"],
-                                    self.params["AOD limite"])
-                # Lectura de las mediciones
-                filename = f'{data["Date"][index]}.txt'
-                filename = join(station_path,
-                                self.params["folder measurements"],
-                                filename)
-                measurements = loadtxt(filename,
-                                       skiprows=self.params["hour initial"],
-                                       usecols=1)
-                # Valor maximo de medicion, esta se usara para el calculo de la RD
-                data_max = max(measurements[0:self.delta_hour+1])
-                stop = False
-                # Primer valor de AOD, se puede cambiar por cualquier otro siempre y cuando este entre aod_i y aod_lim
-                aod = self.obtain_aod(self.aod_i,
-                                      self.aod_lim)
-                # Control de iteracciones
-                iter = 0
-                while not(stop) and iter < 10:
-                    # Ejecucion del modelo SMARTS con los parametros de cada dia
-                    self.run(day=data["Day"][index],
-                             month=data["Month"][index],
-                             year=data["Year"][index],
-                             o3=data["Ozone"][index],
-                             aod=aod,
-                             name=data["Date"][index],
-                             path=path_results)
-                    # Valor maximo de los resultados del modelo SMARTS
-                    data_model = self.obtain_maximum_from_results(data["Date"][index],
-                                                                  path=path_results)
-                    # Calculo del RD y verificación si se cumple la condicion
-                    stop, RD = self.RD_decision(data_model,
-                                                data_max)
-                    bar.set_postfix(AOD=aod,
-                                    RD=RD)
-                    if not stop:
-                        # Se calculara un nuevo AOD siguiendo el algoritmo de busqueda binaria
-                        aod = self.aod_binary_search(aod, RD)
-                        # Si se queda en un intervalo muy pequeño se verificara que cumpla la condicion si lo hace entonces escribira en el archivo el resultado, esto llega a pasar  si se pone un delta_RD menor a 1
-                        rd_diff = abs(RD-self.params["RD limite"])
-                        if self.aod_lim >= aod and rd_diff < self.params["RD delta"]:
-                            stop = True
-                        iter += 1
-                AOD_results.loc[i] = [data["Date"][index],
-                                      data["Year"][index],
-                                      data["Month"][index],
-                                      data["Day"][index],
-                                      data["Ozone"][index],
-                                      aod,
-                                      RD]
-            AOD_results.to_csv(filename_results,
-                               index=False)
+        days = data.to_dict("records")
+        rows = days
+        if self.warm_start and self.part is not None:
+            raise ValueError("warm start necesita resolver los dias en orden, "
+                             "no se puede repartir entre nodos")
+        if dates is not None:
+            dates = {str(date) for date in dates}
+            days = [data_day for data_day in days
+                    if str(data_day["Date"]) in dates]
+        if self.measurements is not None:
+            # El archivo binario se crea antes de repartir los dias
+            self.measurements.open()
+        # Dias resueltos en una ejecucion anterior con los mismos parametros
+        finished = {}
+        if self.checkpoint:
+            checkpoint = self.obtain_checkpoint(station_path,
+                                                self.name_checkpoint())
+            finished = checkpoint.load()
+            # Solo se conservan los dias con los mismos datos de entrada
+            inputs = {str(data_day["Date"]): self.search_inputs(data_day)
+                      for data_day in rows}
+            finished = {date: result
+                        for date, result in finished.items()
+                        if checkpoint.inputs[date] == inputs.get(date)}
+            total = len(days)
+            days = [data_day for data_day in days
+                    if str(data_day["Date"]) not in finished]
+            self.metrics.emit("skip",
+                              days=total-len(days))
+        workers = self.params.get("workers", 1)
+        if self.lockstep:
+            # Todos los dias avanzan un paso de la busqueda en cada ronda
+            results = self.search_days_lockstep(days,
+                                                station_path,
+                                                path_results)
+        elif self.params.get("pipeline", False):
+            # Procesos asincronos de smarts.out, la lectura y escritura de
+            # cada dia ocurre mientras el modelo calcula los siguientes
+            results = SMARTS_pipeline(self,
+                                      workers).search_days(days,
+                                                           station_path,
+                                                           path_results)
+        elif workers > 1:
+            # Busqueda de cada dia en paralelo, un dia por proceso
+            results = search_days(self,
+                                  days,
+                                  station_path,
+                                  path_results,
+                                  workers)
+        else:
+            # Fecha de la fila anterior de cada dia y AOD de los dias resueltos
+            previous = {str(row["Date"]): str(row_previous["Date"])
+                        for row_previous, row in zip(rows[:-1], rows[1:])}
+            solved = {str(result[0]): result[5]
+                      for result in finished.values()
+                      if result is not None}
+            results = []
+            with tqdm(days) as bar:
+                for data_day in bar:
+                    date = str(data_day["Date"])
+                    result = self.search_day(data_day,
+                                             station_path,
+                                             path_results,
+                                             bar=bar,
+                                             aod_previous=solved.get(previous.get(date)))
+                    solved[date] = result[5]
+                    results += [result]
+        results += [result for result in finished.values()
+                    if result is not None]
+        # Resultados ordenados por fecha
+        AOD_results = DataFrame(results,
+                                columns=columns)
+        AOD_results = AOD_results.sort_values("Date")
+        AOD_results.to_csv(filename_results,
+                           index=False)
+        return AOD_results
+
+    def search_day(self,
+                   data_day: dict,
+                   station_path: str,
+                   path_results: str,
+                   bar: tqdm = None,
+                   aod_previous: float = None) -> list:
+        """
+        Busqueda del AOD de un dia que cumple con la RD dada
+        ### inputs:
+        + data_day     ----> Fila de datos de entrada del dia (Date, Ozone, Year, Month, Day)
+        + station_path ----> Direccion de los datos de la estacion
+        + path_results ----> Direccion donde se guardan los resultados del modelo
+        + bar          ----> Barra de progreso para mostrar el AOD y la RD
+        + aod_previous ----> AOD de la fila anterior de file data, inicio de la
+                             busqueda con warm start
+        ### output:
+        + [Date, year, month, day, ozone, AOD, RD]
+        """
+        start = perf_counter()
+        self.evaluations = 0
+        self.aod_previous = aod_previous
+        self.initialize_aod(self.params["AOD inicial"],
+                            self.params["AOD limite"])
+        # Lectura de las mediciones
+        measurements = self.read_measurements(data_day,
+                                              station_path)
+        # Valor maximo de medicion, esta se usara para el calculo de la RD
+        data_max = max(measurements[0:self.delta_hour+1])
+        # Integrales del dia completo de cada AOD evaluado
+        self.integrals_search = {}
+        if self.search == "binary":
+            aod, RD = self.search_binary(data_day,
+                                         path_results,
+                                         data_max,
+                                         bar=bar)
+        else:
+            aod, RD = self.search_secant(data_day,
+                                         path_results,
+                                         data_max,
+                                         bar=bar)
+        result = [data_day["Date"],
+                  data_day["Year"],
+                  data_day["Month"],
+                  data_day["Day"],
+                  data_day["Ozone"],
+                  aod,
+                  RD]
+        if aod in self.integrals_search and not self.keep_spectra:
+            with self.metrics.stage("write"):
+                self.write_results(data_day["Date"],
+                                   path_results,
+                                   self.integrals_search[aod])
+        else:
+            # Dia completo con el AOD final
+            self.run(day=data_day["Day"],
+                     month=data_day["Month"],
+                     year=data_day["Year"],
+                     o3=data_day["Ozone"],
+                     aod=aod,
+                     name=data_day["Date"],
+                     path=path_results)
+        if self.checkpoint:
+            checkpoint = self.obtain_checkpoint(station_path,
+                                                self.name_checkpoint())
+            checkpoint.append(data_day["Date"],
+                              result,
+                              self.search_inputs(data_day))
+        self.metrics.emit("search",
+                          name=data_day["Date"],
+                          iterations=self.evaluations,
+                          capped=self.search_capped(self.evaluations, RD),
+                          aod=aod,
+                          RD=RD,
+                          seconds=perf_counter()-start)
+        return result
+
+    def search_days_lockstep(self,
+                             days: list,
+                             station_path: str,
+                             path_results: str) -> list:
+        """
+        Busqueda del AOD de todos los dias por rondas (ver lockstep.py)
+        ### output:
+        + Lista con [Date, year, month, day, ozone, AOD, RD] de cada dia
+        """
+        data_max = [max(self.read_measurements(data_day,
+                                               station_path)[0:self.delta_hour+1])
+                    for data_day in days]
+        results = []
+        start = perf_counter()
+
+        def finished(data_day: dict, aod: float, RD: float, evaluations: int) -> None:
+            # Los dias se resuelven juntos, el tiempo desde el dia anterior
+            # se asigna al dia que termina
+            nonlocal start
+            seconds = perf_counter()-start
+            start = perf_counter()
+            self.metrics.emit("search",
+                              name=data_day["Date"],
+                              iterations=evaluations,
+                              capped=self.search_capped(evaluations, RD),
+                              aod=aod,
+                              RD=RD,
+                              seconds=seconds)
+            result = [data_day["Date"],
+                      data_day["Year"],
+                      data_day["Month"],
+                      data_day["Day"],
+                      data_day["Ozone"],
+                      aod,
+                      RD]
+            if self.checkpoint:
+                checkpoint = self.obtain_checkpoint(station_path,
+                                                    self.name_checkpoint())
+                checkpoint.append(data_day["Date"],
+                                  result,
+                                  self.search_inputs(data_day))
+            results.append(result)
+
+        # Cada dia se escribe y se registra en el checkpoint al terminar
+        search_lockstep(self,
+                        days,
+                        data_max,
+                        path_results,
+                        finished)
+        return results
+
+    def evaluate_probe(self, probe: tuple) -> tuple:
+        """
+        Evaluacion de un AOD de un dia en la busqueda por rondas
+        ### inputs:
+        + probe ----> (data_day, aod, data_max)
+        ### output:
+        + stop, RD e integrales del dia completo (None con peak window)
+        """
+        data_day, aod, data_max = probe
+        self.integrals_search = {}
+        stop, RD = self.evaluate_RD(data_day,
+                                    aod,
+                                    None,
+                                    data_max)
+        return stop, RD, self.integrals_search.get(aod)
+
+    def read_measurements(self,
+                          data_day: dict,
+                          station_path: str) -> array:
+        """
+        Mediciones del dia a partir de hour initial, del archivo binario de
+        la estacion o del archivo de texto del dia
+        """
+        if self.measurements is not None:
+            measurements = self.measurements.read(data_day["Date"])
+            return measurements[self.params["hour initial"]:]
+        filename = f'{data_day["Date"]}.txt'
+        filename = join(station_path,
+                        self.params["folder measurements"],
+                        filename)
+        measurements = loadtxt(filename,
+                               skiprows=self.params["hour initial"],
+                               usecols=1)
+        return measurements
+
+    def search_inputs(self, data_day: dict) -> dict:
+        """
+        Datos de entrada de un dia que se guardan en el checkpoint
+        """
+        return {key: float(data_day[key])
+                for key in ["Year", "Month", "Day", "Ozone"]}
+
+    def name_checkpoint(self) -> str:
+        name = f'{self.params["file results"]}.checkpoint.jsonl'
+        if self.part is not None:
+            return join(self.params["path results"],
+                        "parts",
+                        self.part,
+                        name)
+        return name
+
+    def search_binary(self,
+                      data_day: dict,
+                      path_results: str,
+                      data_max: float,
+                      bar: tqdm = None) -> tuple:
+        """
+        Busqueda binaria del AOD en el intervalo [AOD inicial, AOD limite]
+        """
+        stop = False
+        # Primer valor de AOD, se puede cambiar por cualquier otro siempre y cuando este entre aod_i y aod_lim
+        aod = self.obtain_initial_aod()
+        # Control de iteracciones
+        iter = 0
+        while not(stop) and iter < 10:
+            # Ejecucion del modelo SMARTS y calculo del RD
+            stop, RD = self.evaluate_RD(data_day,
+                                        aod,
+                                        path_results,
+                                        data_max)
+            if bar is not None:
+                bar.set_postfix(AOD=aod,
+                                RD=RD)
+            if not stop:
+                # Se calculara un nuevo AOD siguiendo el algoritmo de busqueda binaria
+                aod = self.aod_binary_search(aod, RD)
+                # Si se queda en un intervalo muy pequeño se verificara que cumpla la condicion si lo hace entonces escribira en el archivo el resultado, esto llega a pasar  si se pone un delta_RD menor a 1
+                rd_diff = abs(RD-self.params["RD limite"])
+                if self.aod_lim >= aod and rd_diff < self.params["RD delta"]:
+                    stop = True
+                iter += 1
+        return aod, RD
+
+    def search_secant(self,
+                      data_day: dict,
+                      path_results: str,
+                      data_max: float,
+                      bar: tqdm = None) -> tuple:
+        """
+        Busqueda del AOD con el metodo de la secante o de Illinois sobre
+        RD(AOD)-RD limite. El intervalo [AOD inicial, AOD limite] se reduce
+        con cada evaluacion, si el nuevo AOD sale de el se usa un paso de
+        biseccion.
+        """
+        RD_lim = self.params["RD limite"]
+        iterations = self.params.get("iterations", 10)
+        aod = self.obtain_initial_aod()
+        # Extremos del intervalo, f > 0 en lower y f < 0 en upper
+        lower, upper = self.aod_i, self.aod_lim
+        f_lower, f_upper = None, None
+        side = None
+        points = []
+        best = None
+        for _ in range(iterations):
+            # Ejecucion del modelo SMARTS y calculo del RD
+            stop, RD = self.evaluate_RD(data_day,
+                                        aod,
+                                        path_results,
+                                        data_max)
+            if bar is not None:
+                bar.set_postfix(AOD=aod,
+                                RD=RD)
+            f = RD-RD_lim
+            if best is None or abs(f) < abs(best[1]-RD_lim):
+                best = (aod, RD)
+            if stop:
+                return aod, RD
+            points += [(aod, f)]
+            # Actualizacion del intervalo
+            if f > 0:
+                lower, f_lower = aod, f
+                if side == "lower" and f_upper is not None:
+                    f_upper /= 2
+                side = "lower"
+            else:
+                upper, f_upper = aod, f
+                if side == "upper" and f_lower is not None:
+                    f_lower /= 2
+                side = "upper"
+            aod = self.obtain_secant_aod(points,
+                                         lower,
+                                         upper,
+                                         f_lower,
+                                         f_upper)
+            # El intervalo ya no se puede dividir con 3 decimales
+            if aod in [point[0] for point in points]:
+                break
+        return best
+
+    def obtain_secant_aod(self,
+                          points: list,
+                          lower: float,
+                          upper: float,
+                          f_lower: float,
+                          f_upper: float) -> float:
+        """
+        Siguiente AOD de la busqueda. Illinois usa los extremos del intervalo
+        cuando ambos han sido evaluados, la secante usa las dos ultimas
+        evaluaciones.
+        """
+        aod, f = points[-1]
+        if self.search == "illinois" and None not in (f_lower, f_upper):
+            aod = (lower*f_upper-upper*f_lower)/(f_upper-f_lower)
+        elif len(points) > 1 and points[-2][1] != f:
+            aod_0, f_0 = points[-2]
+            aod = aod-f*(aod-aod_0)/(f-f_0)
+        else:
+            # Primer paso, RD disminuye cuando aumenta el AOD
+            delta = self.params.get("AOD delta", 0.05)
+            aod = aod+delta if f > 0 else aod-delta
+        if not lower < aod < upper:
+            aod = (lower+upper)/2
+        return round(aod, 3)
+
+    def obtain_initial_aod(self) -> float:
+        """
+        Primer AOD de la busqueda, el AOD del dia anterior si se usa
+        warm start o el punto medio del intervalo
+        """
+        if self.warm_start and self.aod_previous is not None:
+            if self.aod_i < self.aod_previous < self.aod_lim:
+                return self.aod_previous
+        return self.obtain_aod(self.aod_i,
+                               self.aod_lim)
+
+    def evaluate_RD(self,
+                    data_day: dict,
+                    aod: float,
+                    path_results: str,
+                    data_max: float) -> tuple:
+        """
+        Ejecucion del modelo SMARTS con un AOD y calculo de la RD
+        respecto a la medicion maxima del dia
+        """
+        self.evaluations += 1
+        if self.peak_window:
+            # Solo se modela la ventana alrededor del medio dia solar
+            data_model = self.obtain_peak_maximum(data_day,
+                                                  aod)
+        else:
+            # Ejecucion del modelo SMARTS con los parametros de cada dia,
+            # los resultados se escriben solo con el AOD final
+            integrals = self.run_hours(data_day["Day"],
+                                       data_day["Month"],
+                                       data_day["Year"],
+                                       self.obtain_hours(),
+                                       data_day["Ozone"],
+                                       aod)
+            self.integrals_search[aod] = integrals
+            # Valor maximo de los resultados del modelo SMARTS
+            data_model = self.obtain_maximum(self.obtain_broadband(integrals))
+        # Calculo del RD y verificación si se cumple la condicion
+        return self.RD_decision(data_model,
+                                data_max)
+
+    def obtain_peak_maximum(self, data_day: dict, aod: float) -> float:
+        """
+        Promedio de +-30 minutos alrededor del maximo del modelo calculado
+        solo en una ventana alrededor del medio dia solar. Si la ventana no
+        contiene los 30 minutos a cada lado del maximo se amplia.
+        """
+        margin = self.params.get("peak margin", 20)
+        while True:
+            minutes = self.obtain_peak_minutes(data_day,
+                                               margin)
+            hours = [self.hour_and_minute_to_hours(minute)
+                     for minute in minutes]
+            data_model = self.run_hours(data_day["Day"],
+                                        data_day["Month"],
+                                        data_day["Year"],
+                                        hours,
+                                        data_day["Ozone"],
+                                        aod)
+            data_model = self.obtain_broadband(data_model)
+            pos = (where(max(data_model) == data_model)[0])[0]
+            start = pos >= 30 or minutes[0] == 0
+            end = pos+31 <= len(data_model) or minutes[-1] == self.total_minute-1
+            if start and end:
+                return self.obtain_maximum(data_model)
+            margin = 2*margin
+
+    def obtain_peak_minutes(self, data_day: dict, margin: int) -> range:
+        """
+        Minutos de la ventana de +-30 minutos (mas un margen) alrededor del
+        medio dia solar, esta ventana es la unica que se usa en la RD
+        """
+        noon = solar_noon(data_day["Year"],
+                          data_day["Month"],
+                          data_day["Day"],
+                          self.lon,
+                          self.timezone)
+        peak = round((noon-self.params["hour initial"])*60)
+        minutes = range(max([peak-30-margin, 0]),
+                        min([peak+31+margin, self.total_minute]))
+        return minutes
 
     def initialize_aod(self, aod_i: float, aod_lim: float) -> None:
         """
@@ -368,12 +1690,10 @@ class SMARTS_DR(SMARTS):
     def obtain_aod(self, aod_i: float, aod_f: float) -> float:
         return round((aod_i+aod_f)/2, 3)
 
-    def obtain_maximum_from_results(self, name, path=""):
-        filename = f"{name}.txt"
-        filename = join(path,
-                        filename)
-        data_model = loadtxt(filename,
-                             usecols=1)
+    def obtain_maximum(self, data_model: array) -> float:
+        """
+        Promedio de +-30 minutos alrededor del maximo del modelo
+        """
         pos = (where(max(data_model) == data_model)[0])[0]
         data_model = mean(data_model[pos-30:pos+31])
         return data_model
@@ -403,6 +1723,15 @@ class SMARTS_DR(SMARTS):
                               self.aod_i)
         return aod
 
+    def search_capped(self, evaluations: int, RD: float) -> bool:
+        """
+        La busqueda termino por el limite de iteraciones sin llegar a la RD
+        """
+        iterations = 10
+        if self.search != "binary":
+            iterations = self.params.get("iterations", 10)
+        return evaluations >= iterations and not self.RD_search(RD)
+
     def RD_search(self, RD: float) -> bool:
         lim_i = self.params["RD limite"]-self.params["RD delta"]
         lim_f = self.params["RD limite"]+self.params["RD delta"]
@@ -410,119 +1739,14 @@ class SMARTS_DR(SMARTS):
 
 
 class SMARTS_DR_SSAAER_CUSTOM(SMARTS_DR):
+    """
+    Clase heredada de SMARTS_DR que usa el modelo de aerosoles USER
+    (Card 8a con SSAAER de Palancar)
+    """
+    aerosol_model = "SSAAER_CUSTOM"
+
     def __init__(self, parameters: dict, station: str) -> None:
         SMARTS_DR.__init__(self,
                            parameters=parameters,
                            station=station)
         self.params = parameters
-
-    def write_data_input(self, day: int,
-                         month: int,
-                         year: int,
-                         hour: int,
-                         ozono: float,
-                         aod: float) -> None:
-        """
-        Formato del input del modelo SMARTS
-        day   ----> Dia del año
-        month ----> Mes del año númerico
-        year  ----> Año del dia por analizar
-        hour  ----> Hora del calculo de la irradiancia
-        ozono ----> ozono del dia
-        aod   ----> AOD del dia
-        igas  ----> Card 6a
-        """
-        file = open("data.inp.txt", "w")
-        file.write(" 'AOD={} '\n".format(aod))
-        # Card 2
-        file.write(" 2\n")
-        # Card 2a
-        # lat,altit,height
-        file.write(" {:.3f} {} {}\n".format(self.lat,
-                                            self.height,
-                                            0))
-        # Card 3
-        # IATMOS
-        file.write(" 1\n")
-        # Card 3a
-        file.write(" 'USSA'\n")
-        # Card 4
-        # H2O
-        file.write(" 1\n")
-        # Card 4a
-        file.write(" 0\n")
-        # Card 5
-        # Ozono
-        file.write(" {} {:.4f}\n".format(1,
-                                         ozono/1000))
-        # Card 6
-        file.write(" 0\n")
-        # Card 6a
-        # Pristine ----> 1
-        # Moderate ----> 3
-        file.write(" {}\n".format(self.params["igas"]))
-        # Card 7
-        # Co2
-        file.write(" 390\n")
-        # Card 7a
-        file.write(" 0\n")
-        # Card 8
-        file.write(" 'USER'\n")
-        # Card 8a
-        # SSAAER Palancar
-        # Asymmetry Promedio de 550 nm y humedad ente 50-70%
-        file.write(" {} {} {} {}\n".format(1, 1, 0.8, 0.68))
-        # Card 9
-        file.write(" 5\n")
-        # Card 9a
-        file.write(" {} {}\n".format(aod,
-                                     2))
-        # Card 10
-        file.write(" 18\n")
-        # Card 10b
-        file.write(" 1\n")
-        # Card 10d
-        # IALBDG, TILT,WAZIM
-        file.write(" {} {} {}\n".format(51,
-                                        37.,
-                                        180.))
-        # Card 11---
-        # Wave min, Wave max, suncor, solar cons
-        file.write(" {} {} {} {}\n".format(self.params["wavelength initial"],
-                                           self.params["wavelength final"],
-                                           1,
-                                           1366.1))
-        # ------Card 12---
-        file.write(" 2\n")
-        # Card 12a
-        # Wave min, Wave max, inter wave
-        file.write(" {} {} {}\n".format(self.params["wavelength initial"],
-                                        self.params["wavelength final"],
-                                        1))
-        # Card 12b
-        file.write(" 1\n")
-        # Card 12c
-        file.write(" 4\n")
-        # Card 13
-        file.write(" 1\n")
-        # Card 13a
-        #  slope, apert, limit
-        file.write(" 0 2.9 0\n")
-        # Card 14
-        file.write(" 0\n")
-        # Card 15
-        file.write(" 0\n")
-        # Card 16
-        file.write(" 1\n")
-        # Card 17
-        file.write(" 3\n")
-        # Card 17a
-        # Year, month, day, hour, latit, longit, zone
-        file.write(" {} {} {} {} {} {} {}\n".format(year,
-                                                    month,
-                                                    day,
-                                                    hour,
-                                                    self.lat,
-                                                    self.lon,
-                                                    -6))
-        file.close()
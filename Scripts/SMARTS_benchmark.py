@@ -0,0 +1,197 @@
+from SMARTS_algorithm import SMARTS, SMARTS_DR
+from numpy import array, percentile
+from subprocess import run as command
+from pandas import read_csv
+from tempfile import mkdtemp
+from functions import mkdir
+from shutil import rmtree
+from os.path import abspath, join
+from time import perf_counter
+from os import symlink
+import json
+"""
+Benchmark de las etapas del modelo SMARTS con los datos de Data/noreste.
+Se mide la latencia de cada etapa (escritura del input, ejecucion de
+smarts.out, lectura de resultados), las ejecuciones del modelo por segundo
+y el tiempo por dia de SMARTS_DM y SMARTS_DR. Los resultados se guardan en
+JSON para comparar entre commits.
+"""
+params = {
+    "path stations": "../Data",
+    "station": "noreste",
+    "file data DM": "Data_found_pristine.csv",
+    "file data DR": "datos.txt",
+    "folder measurements": "Mediciones",
+    "file benchmark": "benchmark.json",
+    # Número de dias que se ejecutaran de cada archivo
+    "days": 3,
+    "hour initial": 9,
+    "hour final": 16,
+    "wavelength initial": 285,
+    "wavelength final": 2800,
+    "batch": True,
+    "binary output": True,
+    # Sin cache para medir ejecuciones reales del modelo
+    "cache": False,
+    "AOD inicial": 0.01,
+    "AOD limite": 1,
+    "RD limite": 10,
+    "RD delta": 1,
+    "search": "illinois",
+    "peak window": True,
+    "igas": 1,
+}
+# Etapas que se miden en cada modelo
+stages = ["write_data_input",
+          "execute_model",
+          "read_results_batch",
+          "run",
+          "search_day"]
+
+
+def timed(method: callable, times: list) -> callable:
+    """
+    Envuelve un metodo para guardar la duracion de cada llamada
+    """
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        result = method(*args, **kwargs)
+        times.append(perf_counter()-start)
+        return result
+    return wrapper
+
+
+def instrument(model: SMARTS) -> dict:
+    """
+    Agrega la medicion de tiempo a las etapas del modelo
+    """
+    times = {}
+    for stage in stages:
+        if hasattr(model, stage):
+            times[stage] = []
+            setattr(model,
+                    stage,
+                    timed(getattr(model, stage),
+                          times[stage]))
+    return times
+
+
+def summary(times: list) -> dict:
+    """
+    Distribucion de la latencia de una etapa en segundos
+    """
+    if not times:
+        return {"count": 0}
+    times = array(times)
+    p50, p90, p99 = percentile(times, [50, 90, 99])
+    return {"count": len(times),
+            "total": times.sum(),
+            "mean": times.mean(),
+            "min": times.min(),
+            "p50": p50,
+            "p90": p90,
+            "p99": p99,
+            "max": times.max()}
+
+
+def report(times: dict, wall: float) -> dict:
+    results = {stage: summary(values)
+               for stage, values in times.items()}
+    runs = results["execute_model"]["count"]
+    results["wall time"] = wall
+    results["model runs"] = runs
+    results["model runs per second"] = runs/wall if wall else 0
+    return results
+
+
+def benchmark_DM(parameters: dict, path: str) -> dict:
+    """
+    Benchmark de SMARTS.run sobre los primeros dias de Data_found
+    """
+    station_path = join(parameters["path stations"],
+                        parameters["station"])
+    data = read_csv(join(station_path,
+                         parameters["file data DM"]))
+    data = data[:parameters["days"]]
+    model = SMARTS(parameters,
+                   parameters["station"])
+    times = instrument(model)
+    start = perf_counter()
+    for index in data.index:
+        model.run(data["day"][index],
+                  data["month"][index],
+                  data["year"][index],
+                  data["ozone"][index],
+                  data["AOD"][index],
+                  data["Date"][index],
+                  path=path)
+    return report(times,
+                  perf_counter()-start)
+
+
+def benchmark_DR(parameters: dict, path: str) -> dict:
+    """
+    Benchmark de SMARTS_DR.run_search sobre los primeros dias de datos.txt,
+    la busqueda se realiza en una copia temporal de la estacion
+    """
+    station_path = join(parameters["path stations"],
+                        parameters["station"])
+    data = read_csv(join(station_path,
+                         parameters["file data DR"]))
+    data = data[:parameters["days"]]
+    # Estacion temporal con los datos del benchmark
+    path_station = join(path,
+                        parameters["station"])
+    mkdir(path_station)
+    symlink(abspath(join(station_path,
+                         parameters["folder measurements"])),
+            join(path_station,
+                 parameters["folder measurements"]))
+    data.to_csv(join(path_station,
+                     parameters["file data DR"]),
+                index=False)
+    parameters = parameters.copy()
+    parameters.update({"path stations": path,
+                       "path results": "Results_SMARTS_DR_",
+                       "file results": "Data_found_",
+                       "file data": parameters["file data DR"],
+                       "workers": 1})
+    model = SMARTS_DR(parameters,
+                      parameters["station"])
+    times = instrument(model)
+    start = perf_counter()
+    model.run_search()
+    return report(times,
+                  perf_counter()-start)
+
+
+def git_commit() -> str:
+    result = command(["git", "rev-parse", "HEAD"],
+                     capture_output=True,
+                     text=True)
+    return result.stdout.strip()
+
+
+if __name__ == "__main__":
+    path = mkdtemp(prefix="SMARTS_benchmark_")
+    try:
+        results = {"commit": git_commit(),
+                   "parameters": params,
+                   "SMARTS_DM": benchmark_DM(params,
+                                             path),
+                   "SMARTS_DR": benchmark_DR(params,
+                                             path)}
+    finally:
+        rmtree(path,
+               ignore_errors=True)
+    for name in ["SMARTS_DM", "SMARTS_DR"]:
+        day = "run" if name == "SMARTS_DM" else "search_day"
+        print("{}: {:.2f} s por dia, {:.1f} ejecuciones del modelo por segundo".format(
+            name,
+            results[name][day]["mean"],
+            results[name]["model runs per second"]))
+    with open(params["file benchmark"], "w") as file:
+        json.dump(results,
+                  file,
+                  indent=4,
+                  default=float)
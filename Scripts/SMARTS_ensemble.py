@@ -0,0 +1,73 @@
+from SMARTS_algorithm import SMARTS
+from ensemble import SMARTS_ensemble
+from functions import mkdir
+from pandas import read_csv
+from os.path import join
+"""
+Bandas de incertidumbre de la irradiancia con el modo ensemble. Cada dia de
+file data se ejecuta con los miembros de params["ensemble"] y se escriben
+la media y los percentiles de cada minuto en
+<estacion>/<folder results>/Ensemble/<Date>.txt
+"""
+params = {
+    "file data": "Data_found_pristine.csv",
+    "folder results": "Results_SMARTS_ensemble",
+    "path stations": "../Data",
+    "igas": 1,
+    "stations": ["noreste"],
+    "hour initial": 8,
+    "hour final": 17,
+    "wavelength initial": 285,
+    "wavelength final": 2800,
+    # Card 8a con los valores de SSAAER que se pueden variar
+    "aerosol model": "SSAAER_CUSTOM",
+    "binary output": True,
+    "cache": False,
+    "scratch": True,
+    "workers": 4,
+    "pipeline": False,
+    "ensemble": {
+        "members": 32,
+        "seed": 0,
+        "percentiles": [5, 50, 95],
+        "save members": False,
+        # Perturbacion del ozono (DU) y del AOD del dia
+        "ozone": ["normal", 0, 10],
+        "aod": ["normal", 0, 0.02],
+        # Valores de la Card 8a, lista de valores o distribucion
+        "omegl": ["uniform", 0.75, 0.85],
+        "gg": [0.64, 0.68, 0.72],
+    },
+}
+
+
+def run_station(parameters: dict, station: str) -> None:
+    """
+    Ejecucion del ensemble para los dias de file data de una estacion
+    """
+    station_path = join(parameters["path stations"],
+                        station)
+    path_results = join(station_path,
+                        parameters["folder results"])
+    mkdir(path_results)
+    data = read_csv(join(station_path,
+                         parameters["file data"]))
+    days = [{"day": data["day"][index],
+             "month": data["month"][index],
+             "year": data["year"][index],
+             "o3": data["ozone"][index],
+             "aod": data["AOD"][index],
+             "name": data["Date"][index],
+             "path": path_results}
+            for index in data.index]
+    SMARTS_Model = SMARTS(parameters,
+                          station)
+    ensemble = SMARTS_ensemble(SMARTS_Model)
+    ensemble.write_members(path_results)
+    ensemble.run_days(days)
+
+
+if __name__ == "__main__":
+    for station in params["stations"]:
+        run_station(params,
+                    station)
@@ -0,0 +1,107 @@
+from resolution import table_error
+from SMARTS_algorithm import SMARTS
+from pandas import read_csv
+from time import perf_counter
+from os.path import join
+from numpy import array
+import json
+"""
+Verificacion de la resolucion espectral (Card 12a). Se ejecuta una muestra
+de dias de Data_found con cada paso de wavelength steps y con el paso de
+referencia de 1 nm, y se reporta el error de las integrales junto con el
+error estimado a partir de las tablas del modelo.
+"""
+params = {
+    "path stations": "../Data",
+    "station": "noreste",
+    "file data": "Data_found_pristine.csv",
+    "file resolution": "resolution.json",
+    # Número de dias de la muestra y minutos entre cada hora modelada
+    "days": 5,
+    "sample minutes": 15,
+    "wavelength steps": [2, 5, 10, 20],
+    "hour initial": 8,
+    "hour final": 17,
+    "wavelength initial": 285,
+    "wavelength final": 2800,
+    "batch": True,
+    "binary output": True,
+    # Sin cache para medir ejecuciones reales del modelo
+    "cache": False,
+    "igas": 1,
+}
+
+
+def run_sample(parameters: dict, step: float, data) -> tuple:
+    """
+    Integrales de la muestra de dias con un paso de step nm
+    ### output:
+    + integrales, tiempo de ejecucion
+    """
+    parameters = parameters.copy()
+    parameters["wavelength step"] = step
+    model = SMARTS(parameters,
+                   parameters["station"])
+    hours = [model.hour_and_minute_to_hours(minute)
+             for minute in range(0,
+                                 model.total_minute,
+                                 parameters["sample minutes"])]
+    integrals = []
+    start = perf_counter()
+    for index in data.index:
+        integrals += model.run_hours(data["day"][index],
+                                     data["month"][index],
+                                     data["year"][index],
+                                     hours,
+                                     data["ozone"][index],
+                                     data["AOD"][index])
+    return array(integrals, dtype=float), perf_counter()-start
+
+
+def check_resolution(parameters: dict) -> dict:
+    station_path = join(parameters["path stations"],
+                        parameters["station"])
+    data = read_csv(join(station_path,
+                         parameters["file data"]))
+    data = data[:parameters["days"]]
+    reference, time = run_sample(parameters,
+                                 1,
+                                 data)
+    results = {1: {"time": time}}
+    # Solo se comparan las horas con el sol sobre el horizonte
+    day = reference > 0
+    for step in parameters["wavelength steps"]:
+        integrals, time = run_sample(parameters,
+                                     step,
+                                     data)
+        error = abs(integrals-reference)[day]
+        results[step] = {"time": time,
+                         "max error": error.max(),
+                         "mean error": error.mean(),
+                         "max relative error": (error/reference[day]).max(),
+                         "table relative error": table_error(".",
+                                                             parameters["wavelength initial"],
+                                                             parameters["wavelength final"],
+                                                             step)}
+    return results
+
+
+if __name__ == "__main__":
+    results = check_resolution(params)
+    for step, result in results.items():
+        if step == 1:
+            continue
+        print("{} nm: error maximo {:.1f} W/m2 ({:.2%}), promedio {:.2f} W/m2, "
+              "estimado con las tablas {:.2%}, tiempo {:.1f} s (1 nm: {:.1f} s)".format(
+                  step,
+                  result["max error"],
+                  result["max relative error"],
+                  result["mean error"],
+                  result["table relative error"],
+                  result["time"],
+                  results[1]["time"]))
+    with open(params["file resolution"], "w") as file:
+        json.dump(results,
+                  file,
+                  indent=4,
+                  default=float)
@@ -0,0 +1,168 @@
+from SMARTS_algorithm import SMARTS_DR, SMARTS_DR_SSAAER_CUSTOM
+from shards import SMARTS_queue, merge_parts, parse_shard, select_shard
+from pandas import read_csv
+from socket import gethostname
+from os.path import join
+import SMARTS_DM
+import SMARTS_DR as DR
+import SMARTS_DR_MTY as DR_MTY
+import argparse
+import os
+"""
+Ejecucion de SMARTS_DM.py, SMARTS_DR.py o SMARTS_DR_MTY.py desde la linea de
+comandos repartiendo los dias (estacion, fecha) entre varios nodos:
+
+    python SMARTS_run.py DR --shard 2/8
+    python SMARTS_run.py DR --queue /compartido/cola --node nodo03
+    python SMARTS_run.py DR --merge
+
+Con --shard cada nodo calcula una parte fija de los dias, con --queue los
+nodos reclaman dias hasta terminar la lista. Los resultados de cada nodo se
+escriben en <carpeta de resultados>/parts/<parte> y --merge los junta en
+los archivos de siempre (Data_found_*.csv, results.bin, <Date>.txt).
+"""
+# Parametros y clase de cada tarea
+tasks = {
+    "DM": (SMARTS_DM.params, None),
+    "DR": (DR.parameters, SMARTS_DR),
+    "DR_MTY": (DR_MTY.parameters, SMARTS_DR_SSAAER_CUSTOM),
+}
+
+
+def obtain_work(parameters: dict) -> list:
+    """
+    Lista de (estacion, fecha) de todas las estaciones
+    """
+    work = []
+    for station in parameters["stations"]:
+        data = read_csv(join(parameters["path stations"],
+                             station,
+                             parameters["file data"]))
+        work += [(station, str(date)) for date in data["Date"]]
+    return work
+
+
+def run_work(task: str, work: list, part: str) -> None:
+    """
+    Ejecucion de los dias de la lista, agrupados por estacion
+    """
+    parameters, model = tasks[task]
+    # Los nodos comparten la carpeta de smarts.out, cada ejecucion del
+    # modelo usa su propia carpeta temporal
+    parameters = {**parameters,
+                  "scratch": True}
+    stations = {}
+    for station, date in work:
+        stations.setdefault(station, []).append(date)
+    for station, dates in stations.items():
+        if model is None:
+            SMARTS_DM.run_station(parameters,
+                                  station,
+                                  dates,
+                                  part)
+            continue
+        # SMARTS_DR modifica path results y file results de sus parametros
+        SMARTS_Model = model(parameters=parameters.copy(),
+                             station=station)
+        SMARTS_Model.part = part
+        SMARTS_Model.run_search(dates)
+
+
+def run_shard(task: str, shard: str) -> None:
+    index, total = parse_shard(shard)
+    work = select_shard(obtain_work(tasks[task][0]),
+                        index,
+                        total)
+    run_work(task,
+             work,
+             f"shard_{index}_{total}")
+
+
+def run_queue(task: str, path: str, node: str, timeout: float) -> None:
+    """
+    Reclama grupos de dias de la cola hasta que no quedan dias pendientes
+    """
+    parameters = tasks[task][0]
+    if not parameters.get("checkpoint", False):
+        raise ValueError("La cola necesita checkpoint para conservar los "
+                         "resultados de cada grupo de dias del nodo")
+    queue = SMARTS_queue(join(path, task),
+                         node,
+                         timeout)
+    work = obtain_work(parameters)
+    # Un grupo alcanza para todos los procesos del nodo
+    size = 2*parameters.get("workers", 1)
+    while True:
+        claimed = queue.claim_days(queue.pending(work),
+                                   size)
+        if not claimed:
+            break
+        # Un bloqueo abandonado pudo ser reemplazado por otro nodo
+        claimed = [(station, date) for station, date in claimed
+                   if queue.owns(station, date)]
+        with queue.heartbeat(claimed):
+            run_work(task,
+                     claimed,
+                     f"node_{node}")
+        for station, date in claimed:
+            queue.done(station,
+                       date)
+
+
+def merge(task: str) -> None:
+    """
+    Une los resultados de las partes de cada estacion
+    """
+    parameters, model = tasks[task]
+    for station in parameters["stations"]:
+        station_path = join(parameters["path stations"],
+                            station)
+        if model is None:
+            path_results = join(station_path,
+                                parameters["folder results"])
+            parts = merge_parts(path_results,
+                                join(path_results, "checkpoint.jsonl"))
+        else:
+            SMARTS_Model = model(parameters=parameters.copy(),
+                                 station=station)
+            path_results = join(station_path,
+                                SMARTS_Model.params["path results"])
+            parts = merge_parts(path_results,
+                                join(station_path, SMARTS_Model.name_checkpoint()),
+                                join(station_path,
+                                     f'{SMARTS_Model.params["file results"]}.csv'))
+        print(f"{station}: {len(parts)} partes unidas")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ejecucion del modelo SMARTS "
+                                     "repartida entre varios nodos")
+    parser.add_argument("task",
+                        choices=list(tasks))
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--shard",
+                       help="Parte i/N de los dias, i de 1 a N")
+    group.add_argument("--queue",
+                       help="Carpeta compartida de la cola de dias")
+    group.add_argument("--merge",
+                       action="store_true",
+                       help="Une los resultados de todas las partes")
+    parser.add_argument("--node",
+                        default=f"{gethostname()}_{os.getpid()}",
+                        help="Nombre del nodo en la cola")
+    parser.add_argument("--timeout",
+                        type=float,
+                        default=3600,
+                        help="Segundos despues de los cuales un dia "
+                        "reclamado sin terminar se vuelve a calcular")
+    arguments = parser.parse_args()
+    if arguments.shard:
+        run_shard(arguments.task,
+                  arguments.shard)
+    elif arguments.queue:
+        run_queue(arguments.task,
+                  arguments.queue,
+                  arguments.node,
+                  arguments.timeout)
+    else:
+        merge(arguments.task)
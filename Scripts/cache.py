@@ -0,0 +1,93 @@
+from hashlib import sha1
+from time import time
+import sqlite3
+import json
+"""
+Cache persistente de las integrales del modelo SMARTS. La llave de cada
+resultado es el hash del archivo data.inp.txt completo junto con la
+identificacion del ejecutable, por lo que cualquier cambio en las cards o
+en smarts.out genera una llave distinta.
+"""
+
+
+class SMARTS_cache:
+    """
+    Cache en disco (sqlite) con eliminacion de los resultados usados hace
+    mas tiempo cuando se supera el tamaño maximo
+    """
+
+    def __init__(self, filename: str, max_size: int = 100000) -> None:
+        """
+        ### inputs
+        + filename ----> Archivo sqlite del cache
+        + max_size ----> Número maximo de resultados guardados
+        """
+        self.filename = filename
+        self.max_size = max_size
+        self.connection = None
+        self.inserts = 0
+
+    def __getstate__(self) -> dict:
+        # La conexion no se puede copiar a otros procesos
+        state = self.__dict__.copy()
+        state["connection"] = None
+        return state
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.filename,
+                                              timeout=60)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS results "
+                                    "(key TEXT PRIMARY KEY, "
+                                    "integrals TEXT, "
+                                    "access REAL)")
+            self.connection.commit()
+        return self.connection
+
+    def key(self, *parts: str) -> str:
+        """
+        Hash de las partes que definen una ejecucion del modelo
+        """
+        hash = sha1()
+        for part in parts:
+            hash.update(part.encode())
+        return hash.hexdigest()
+
+    def get(self, key: str) -> list:
+        """
+        Integrales guardadas para la llave, None si no existen
+        """
+        connection = self.connect()
+        row = connection.execute("SELECT integrals FROM results WHERE key=?",
+                                 (key,)).fetchone()
+        if row is None:
+            return None
+        connection.execute("UPDATE results SET access=? WHERE key=?",
+                           (time(), key))
+        connection.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, integrals: list) -> None:
+        connection = self.connect()
+        connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                           (key, json.dumps(integrals), time()))
+        connection.commit()
+        self.inserts += 1
+        # La revision del tamaño se realiza cada 100 resultados nuevos
+        if self.inserts % 100 == 0:
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Eliminacion de los resultados usados hace mas tiempo hasta
+        regresar al 90% del tamaño maximo
+        """
+        connection = self.connect()
+        size = connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if size <= self.max_size:
+            return
+        total = size-int(0.9*self.max_size)
+        connection.execute("DELETE FROM results WHERE key IN "
+                           "(SELECT key FROM results ORDER BY access LIMIT ?)",
+                           (total,))
+        connection.commit()
@@ -0,0 +1,112 @@
+from hashlib import sha1
+from os.path import exists
+import json
+import os
+"""
+Archivo de puntos de control para reanudar las ejecuciones largas. Cada
+dia terminado se agrega como una linea JSON junto con la firma de los
+parametros con los que se calculo.
+"""
+# Parametros que solo cambian la forma de ejecutar el modelo y no sus resultados
+runtime_parameters = ["backend",
+                      "batch",
+                      "binary output",
+                      "cache",
+                      "cache size",
+                      "checkpoint",
+                      "file cache",
+                      "measurement archive",
+                      "metrics",
+                      "path model",
+                      "path scratch",
+                      "pipeline",
+                      "profile",
+                      "scratch",
+                      "spectra",
+                      "spectra compression",
+                      "spectra dtype",
+                      "stations",
+                      "store",
+                      "text export",
+                      "workers"]
+
+
+def parameters_signature(parameters: dict, *extra: str) -> str:
+    """
+    Firma de los parametros que afectan los resultados del modelo
+    """
+    values = {key: value
+              for key, value in parameters.items()
+              if key not in runtime_parameters}
+    text = json.dumps([values, extra],
+                      sort_keys=True,
+                      default=str)
+    return sha1(text.encode()).hexdigest()
+
+
+class SMARTS_checkpoint:
+    """
+    Lectura y escritura del archivo de puntos de control
+    """
+
+    def __init__(self, filename: str, signature: str) -> None:
+        """
+        ### inputs
+        + filename  ----> Archivo de puntos de control (JSON lines)
+        + signature ----> Firma de los parametros actuales
+        """
+        self.filename = filename
+        self.signature = signature
+        # Datos de entrada de cada dia guardado, se llena con load
+        self.inputs = {}
+
+    def load(self) -> dict:
+        """
+        Resultados guardados con la firma actual, los datos de entrada de
+        cada dia quedan en inputs
+        ### output:
+        + Diccionario {Date: resultado}
+        """
+        results = {}
+        self.inputs = {}
+        if not exists(self.filename):
+            return results
+        with open(self.filename, "r") as file:
+            for line in file:
+                # Una linea incompleta indica que el proceso se detuvo al escribirla
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record["signature"] == self.signature:
+                    results[record["Date"]] = record["result"]
+                    self.inputs[record["Date"]] = record.get("inputs")
+        return results
+
+    def append(self,
+               date: str,
+               result: object = None,
+               inputs: dict = None) -> None:
+        """
+        Agrega el resultado de un dia con una sola escritura, por lo que
+        varios procesos pueden escribir en el mismo archivo
+        ### inputs:
+        + date   ----> Fecha del dia
+        + result ----> Resultado del dia
+        + inputs ----> Datos de entrada del dia (fecha, ozono, AOD), si
+                       cambian el dia se calcula de nuevo
+        """
+        record = {"Date": str(date),
+                  "signature": self.signature,
+                  "inputs": inputs,
+                  "result": result}
+        line = json.dumps(record,
+                          default=lambda value: value.item())+"\n"
+        descriptor = os.open(self.filename,
+                             os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        try:
+            os.write(descriptor,
+                     line.encode())
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
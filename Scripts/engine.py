@@ -0,0 +1,67 @@
+from numpy import empty, float32, int32
+"""
+Motor del modelo SMARTS dentro del proceso de Python. La extension
+smarts_engine se compila con f2py a partir de Code/smarts.f (make engine)
+y evita crear un proceso nuevo por cada ejecucion del modelo. Las cards
+y los resultados pasan por los argumentos de la subrutina, sin archivos
+data.*, y las tablas de Gases y Solar quedan cargadas en memoria entre
+ejecuciones del mismo proceso.
+"""
+try:
+    import smarts_engine
+except ImportError:
+    smarts_engine = None
+
+
+class SMARTS_engine:
+    """
+    Ejecucion de la subrutina SMARTS295 de smarts.f sin subprocesos
+    """
+
+    def __init__(self, path_model: str = ".") -> None:
+        """
+        ### inputs
+        + path_model ----> Carpeta con Gases, Solar, Albedo y CIE_data
+        """
+        if smarts_engine is None:
+            raise ImportError("No se encontro la extension smarts_engine, "
+                              "compilarla con make engine en Code/")
+        self.root = path_model.rstrip("/")+"/"
+        # Archivo de la extension, identifica al modelo en el cache
+        self.filename = smarts_engine.__file__
+        # Arreglo de espectros reutilizado entre ejecuciones
+        self.spectra = empty(0,
+                             dtype=float32)
+
+    def run(self, deck: str, total_records: int) -> tuple:
+        """
+        Ejecucion del modelo con el texto del input
+        ### inputs:
+        + deck          ----> Texto de las cards, una card por linea
+        + total_records ----> Número de Card 17a del input
+        ### output:
+        + solved  ----> Registros resueltos (False = sol bajo el horizonte)
+        + spectra ----> Valores real*4 de los espectros, igual que el
+                        data.ext.txt en binario
+        """
+        status = empty(max(total_records, 1),
+                       dtype=int32)
+        # Tamaño inicial: 2002 longitudes de onda con una salida por registro
+        size = max(total_records, 1)*2002*2
+        if len(self.spectra) < size:
+            self.spectra = empty(size,
+                                 dtype=float32)
+        nstat, nspec, ierr = smarts_engine.smarts295(self.root,
+                                                      deck,
+                                                      status,
+                                                      self.spectra)
+        if ierr:
+            # El arreglo es pequeño, nspec es el tamaño necesario
+            self.spectra = empty(nspec,
+                                 dtype=float32)
+            nstat, nspec, ierr = smarts_engine.smarts295(self.root,
+                                                          deck,
+                                                          status,
+                                                          self.spectra)
+        solved = status[:min(nstat, total_records)] == 1
+        return solved, self.spectra[:nspec].copy()
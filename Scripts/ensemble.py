@@ -0,0 +1,270 @@
+from SMARTS_algorithm import aerosol_models
+from numpy import array, float32, mean, percentile, save, zeros
+from concurrent.futures import ProcessPoolExecutor
+from parallel import initialize_worker, run_deck
+from checkpoint import parameters_signature
+from numpy.random import default_rng
+from pipeline import SMARTS_pipeline
+from functions import mkdir
+from itertools import product
+from os.path import exists, join
+from pandas import DataFrame
+from os import replace
+import json
+"""
+Modo ensemble del modelo SMARTS. Cada dia se ejecuta con varios miembros
+que perturban el ozono, el AOD y los valores de la Card 8a del modelo de
+aerosoles, y se escriben los percentiles de la irradiancia de cada minuto.
+Las cards fijas de cada modelo de aerosoles y las Card 17a de cada dia se
+escriben una sola vez, cada miembro solo cambia la Card 1, la Card 5 y la
+Card 9a. Los miembros de cada dia se reparten juntos entre los procesos.
+Junto a cada Ensemble/<Date>.txt se guarda la firma de la configuracion
+(Ensemble/<Date>.json), un dia se calcula de nuevo si la firma cambia.
+"""
+# Valores de la Card 8a (modelo de aerosoles USER)
+aerosol_parameters = ["alpha1", "alpha2", "omegl", "gg"]
+
+
+class SMARTS_ensemble:
+    """
+    Miembros del ensemble y ejecucion de una lista de dias
+    """
+
+    def __init__(self, model: object) -> None:
+        """
+        ### inputs
+        + model ----> Objeto SMARTS (o heredado) ya inicializado
+        ### params["ensemble"]
+        + members     ----> Número de miembros muestreados de las distribuciones
+        + seed        ----> Semilla del muestreo
+        + percentiles ----> Percentiles de cada minuto que se escriben
+        + save members ---> Guarda la irradiancia de todos los miembros
+                            (Ensemble/<Date>.npy)
+        + ozone, aod  ----> Perturbacion que se suma al valor del dia
+        + alpha1, alpha2, omegl, gg ----> Valor de la Card 8a
+        Cada perturbacion es una lista de valores (malla), ["normal", media,
+        sigma] o ["uniform", minimo, maximo]. Las mallas se combinan entre si
+        y con cada miembro muestreado.
+        """
+        self.model = model
+        self.params = model.params["ensemble"]
+        if model.keep_spectra or model.table is not None:
+            raise ValueError("El modo ensemble integra cada miembro, quitar "
+                             "spectra y surrogate")
+        card = aerosol_models[model.aerosol_model]
+        if any(name in self.params for name in aerosol_parameters) and len(card) < 2:
+            raise ValueError("Los valores de la Card 8a solo se pueden variar "
+                             "con el modelo de aerosoles SSAAER_CUSTOM")
+        self.aerosol_card = card[1] if len(card) > 1 else None
+        self.percentiles = self.params.get("percentiles", [5, 50, 95])
+        self.members = self.obtain_members()
+        self.templates = {}
+        self.signature = self.obtain_signature()
+
+    def obtain_members(self) -> list:
+        """
+        Lista de miembros, cada uno un diccionario con la perturbacion del
+        ozono y del AOD y los valores de la Card 8a
+        """
+        names = ["ozone", "aod"]+aerosol_parameters
+        names = [name for name in names if name in self.params]
+        grids = {name: self.params[name] for name in names
+                 if not isinstance(self.params[name][0], str)}
+        distributions = {name: self.params[name] for name in names
+                         if name not in grids}
+        total = self.params.get("members", 50) if distributions else 1
+        generator = default_rng(self.params.get("seed", 0))
+        samples = {}
+        for name, (distribution, first, second) in distributions.items():
+            if distribution == "normal":
+                samples[name] = generator.normal(first, second, total)
+            elif distribution == "uniform":
+                samples[name] = generator.uniform(first, second, total)
+            else:
+                raise ValueError(f"Distribucion {distribution} de {name} "
+                                 "no soportada, usar normal o uniform")
+        members = []
+        for values in product(*grids.values()):
+            for sample in range(total):
+                member = dict(zip(grids, values))
+                member.update({name: float(samples[name][sample])
+                               for name in samples})
+                members += [member]
+        return members
+
+    def obtain_signature(self) -> str:
+        """
+        Firma de los parametros del modelo (incluye params["ensemble"] con la
+        semilla, las distribuciones y los percentiles), de las cards fijas
+        del input y de los miembros con sus valores de la Card 8a
+        """
+        return parameters_signature(self.model.params,
+                                    self.model.template,
+                                    json.dumps(self.members,
+                                               sort_keys=True))
+
+    def obtain_template(self, member: dict) -> str:
+        """
+        Formato del input con la Card 8a del miembro, se construye una sola
+        vez para cada combinacion de valores
+        """
+        if self.aerosol_card is None:
+            return self.model.template
+        values = [float(value) for value in self.aerosol_card.split()]
+        values = tuple(round(member.get(name, value), 4)
+                       for name, value in zip(aerosol_parameters, values))
+        if values not in self.templates:
+            card = " {} {} {} {}".format(*values)
+            self.templates[values] = self.model.template.replace(f"\n{self.aerosol_card}\n",
+                                                                 f"\n{card}\n",
+                                                                 1)
+        return self.templates[values]
+
+    def obtain_visible(self, arguments: dict) -> array:
+        """
+        Minutos del dia con el sol sobre minimum elevation, solo estos se
+        envian al modelo
+        """
+        return self.model.geometry.visible(arguments["year"],
+                                           arguments["month"],
+                                           arguments["day"],
+                                           self.model.obtain_hours())
+
+    def obtain_decks(self, arguments: dict, visible: array) -> list:
+        """
+        Input de cada miembro para un dia
+        ### inputs:
+        + arguments ----> Argumentos de SMARTS.run del dia
+        + visible   ----> Minutos que se modelan
+        """
+        hours = [hour
+                 for hour, is_visible in zip(self.model.obtain_hours(), visible)
+                 if is_visible]
+        records = self.model.render_records([(arguments["year"],
+                                              arguments["month"],
+                                              arguments["day"],
+                                              hour)
+                                             for hour in hours])
+        decks = []
+        for member in self.members:
+            ozone = max(arguments["o3"]+member.get("ozone", 0), 1)
+            aod = max(round(arguments["aod"]+member.get("aod", 0), 4), 0)
+            deck = self.obtain_template(member).format(aod=aod,
+                                                       ozone=ozone/1000)
+            decks += [(deck+records,
+                       len(hours))]
+        return decks
+
+    def pending_days(self, days: list) -> list:
+        """
+        Dias sin el archivo de percentiles o calculados con otra firma
+        """
+        return [arguments for arguments in days
+                if not exists(self.filename(arguments, "txt"))
+                or self.read_signature(arguments) != self.signature]
+
+    def read_signature(self, arguments: dict) -> str:
+        filename = self.filename(arguments, "json")
+        if not exists(filename):
+            return None
+        with open(filename, "r") as file:
+            return json.load(file).get("signature")
+
+    def filename(self, arguments: dict, extension: str) -> str:
+        return join(arguments["path"],
+                    "Ensemble",
+                    f'{arguments["name"]}.{extension}')
+
+    def run_days(self, days: list) -> None:
+        """
+        Ejecucion de todos los miembros de una lista de dias y escritura de
+        los percentiles de cada dia
+        ### inputs:
+        + days ----> Lista de argumentos de SMARTS.run para cada dia
+        """
+        days = self.pending_days(days)
+        # Los procesos o el pipeline se crean una sola vez para todos los dias
+        workers = self.model.params.get("workers", 1)
+        if self.model.params.get("pipeline", False):
+            pipeline = SMARTS_pipeline(self.model,
+                                       workers)
+            self.run_members(days,
+                             lambda decks: pipeline.map(lambda model, deck: model.run_deck(*deck),
+                                                        decks))
+        elif workers > 1:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=initialize_worker,
+                                     initargs=(self.model,)) as executor:
+                self.run_members(days,
+                                 lambda decks: list(executor.map(run_deck,
+                                                                 decks)))
+        else:
+            self.run_members(days,
+                             lambda decks: [self.model.run_deck(*deck)
+                                            for deck in decks])
+
+    def run_members(self, days: list, execute: callable) -> None:
+        """
+        Ejecucion de los inputs de todos los miembros de cada dia y escritura
+        de sus percentiles
+        ### inputs:
+        + days    ----> Lista de argumentos de SMARTS.run para cada dia
+        + execute ----> Ejecuta una lista de (input, número de Card 17a) y
+                        regresa las integrales de cada input
+        """
+        for arguments in days:
+            visible = self.obtain_visible(arguments)
+            integrals = zeros((len(self.members),
+                               len(visible)))
+            if visible.any():
+                results = execute(self.obtain_decks(arguments,
+                                                    visible))
+                integrals[:, visible] = array([self.model.obtain_broadband(values)
+                                               for values in results])
+            self.write_results(arguments,
+                               integrals)
+
+    def write_results(self, arguments: dict, integrals: array) -> None:
+        """
+        Escritura de la media y los percentiles de cada minuto de un dia
+        ### inputs:
+        + arguments ----> Argumentos de SMARTS.run del dia
+        + integrals ----> Irradiancia total (miembros, minutos)
+        """
+        mkdir(join(arguments["path"],
+                   "Ensemble"))
+        if self.params.get("save members", False):
+            save(self.filename(arguments, "npy"),
+                 integrals.astype(float32))
+        values = [mean(integrals, axis=0)]
+        values += list(percentile(integrals,
+                                  self.percentiles,
+                                  axis=0))
+        filename = self.filename(arguments, "txt")
+        # El archivo se reemplaza al terminar para no dejar archivos
+        # incompletos si el proceso se detiene
+        with open(f"{filename}.tmp", "w") as file:
+            file.write("hour mean {}\n".format(" ".join([f"p{value}"
+                                                        for value in self.percentiles])))
+            for hour, row in zip(self.model.obtain_hours(), zip(*values)):
+                file.write("{} {}\n".format(hour,
+                                            " ".join([str(round(float(value), 1))
+                                                      for value in row])))
+        replace(f"{filename}.tmp",
+                filename)
+        # La firma se escribe despues de los percentiles, si el proceso se
+        # detiene entre ambos el dia se calcula de nuevo
+        filename = self.filename(arguments, "json")
+        with open(f"{filename}.tmp", "w") as file:
+            json.dump({"signature": self.signature},
+                      file)
+        replace(f"{filename}.tmp",
+                filename)
+
+    def write_members(self, path: str) -> None:
+        """
+        Tabla de los miembros del ensemble (Ensemble/members.csv)
+        """
+        mkdir(join(path, "Ensemble"))
+        DataFrame(self.members).to_csv(join(path, "Ensemble", "members.csv"),
+                                       index_label="member")
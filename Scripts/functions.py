@@ -1,4 +1,9 @@
-from os import makedirs
+from os import makedirs, remove, symlink
+from os.path import exists, join
+from datetime import date
+from hashlib import sha1
+from numpy import pi, sin, cos, arccos, clip, degrees, radians
+import json
 
 
 def mkdir(path: str) -> None:
@@ -10,3 +15,98 @@ def fill_number(number: int, fill: int) -> str:
     number_str = str(number)
     number_str = number_str.zfill(fill)
     return number_str
+
+
+def link_model_files(path_model: str, path_run: str) -> None:
+    """
+    Enlaza el ejecutable y los datos de referencia del modelo SMARTS
+    en una carpeta de trabajo
+    """
+    for name in ["smarts.out", "Gases", "Solar", "Albedo", "CIE_data"]:
+        symlink(join(path_model, name),
+                join(path_run, name))
+
+
+def read_stations(filename: str) -> dict:
+    """
+    Registro de estaciones {nombre: {Lat, Lon, Height, Timezone}}
+    ### inputs:
+    + filename ----> Archivo JSON del registro
+    """
+    with open(filename, "r") as file:
+        stations = json.load(file)
+    for name, station in stations.items():
+        missing = {"Lat", "Lon", "Height", "Timezone"}-set(station)
+        if missing:
+            raise ValueError(f"La estacion {name} de {filename} no tiene "
+                             f"{', '.join(sorted(missing))}")
+    return stations
+
+
+def remove_files(files: list) -> None:
+    for file in files:
+        if exists(file):
+            remove(file)
+
+
+def equation_of_time(year: int, month: int, day: int) -> float:
+    """
+    Ecuacion del tiempo en minutos (Spencer, 1971)
+    """
+    day_of_year = date(year, month, day).timetuple().tm_yday
+    gamma = 2*pi*(day_of_year-1)/365
+    eot = 229.18*(0.000075+0.001868*cos(gamma)-0.032077*sin(gamma)
+                  - 0.014615*cos(2*gamma)-0.040849*sin(2*gamma))
+    return eot
+
+
+def solar_noon(year: int, month: int, day: int, lon: float, zone: float) -> float:
+    """
+    Hora local estandar del medio dia solar
+    ### inputs:
+    + lon  ----> Longitud de la estacion (negativa al oeste)
+    + zone ----> Zona horaria de la estacion (ver stations.json)
+    """
+    eot = equation_of_time(year, month, day)
+    noon = 12-(lon-15*zone)/15-eot/60
+    return noon
+
+
+def solar_position(year: int,
+                   month: int,
+                   day: int,
+                   hour: float,
+                   lat: float,
+                   lon: float,
+                   zone: float) -> tuple:
+    """
+    Angulo cenital y factor de correccion de la distancia Tierra-Sol
+    (Spencer, 1971), hour puede ser un arreglo de horas
+    ### inputs:
+    + hour ----> Hora local estandar
+    + lat  ----> Latitud de la estacion
+    + lon  ----> Longitud de la estacion (negativa al oeste)
+    + zone ----> Zona horaria de la estacion (ver stations.json)
+    """
+    day_of_year = date(year, month, day).timetuple().tm_yday
+    gamma = 2*pi*(day_of_year-1)/365
+    declination = (0.006918-0.399912*cos(gamma)+0.070257*sin(gamma)
+                   - 0.006758*cos(2*gamma)+0.000907*sin(2*gamma)
+                   - 0.002697*cos(3*gamma)+0.00148*sin(3*gamma))
+    factor = (1.000110+0.034221*cos(gamma)+0.001280*sin(gamma)
+              + 0.000719*cos(2*gamma)+0.000077*sin(2*gamma))
+    solar_hour = hour+(lon-15*zone)/15+equation_of_time(year,
+                                                        month,
+                                                        day)/60
+    hour_angle = radians(15*(solar_hour-12))
+    lat = radians(lat)
+    cos_zenith = (sin(lat)*sin(declination)
+                  + cos(lat)*cos(declination)*cos(hour_angle))
+    zenith = degrees(arccos(clip(cos_zenith, -1, 1)))
+    return zenith, factor
+
+
+def file_hash(filename: str) -> str:
+    with open(filename, "rb") as file:
+        hash = sha1(file.read())
+    return hash.hexdigest()
@@ -0,0 +1,91 @@
+from functions import solar_position
+from numpy import array, searchsorted
+"""
+Posicion del sol de cada minuto de un dia de la estacion. La tabla de cada
+fecha se calcula una sola vez y la comparten todas las ejecuciones del dia
+(cada AOD de la busqueda, cada miembro del ensemble y cada banda). Los
+minutos con el sol por debajo de minimum elevation no se envian al modelo.
+"""
+
+
+class SMARTS_geometry:
+    """
+    Tablas del angulo cenital y del factor de la distancia Tierra-Sol por
+    fecha
+    """
+
+    def __init__(self,
+                 lat: float,
+                 lon: float,
+                 zone: float,
+                 hours: list,
+                 minimum_elevation: float = -1) -> None:
+        """
+        ### inputs
+        + lat, lon          ----> Coordenadas de la estacion
+        + zone              ----> Zona horaria de la estacion
+        + hours             ----> Hora con decimal de cada minuto del dia
+        + minimum_elevation ----> Elevacion (grados) bajo la cual no se
+                                  modela el minuto, con -1 solo se omiten
+                                  los minutos que smarts.out da como noche
+        """
+        self.lat = lat
+        self.lon = lon
+        self.zone = zone
+        self.hours = array(hours, dtype=float)
+        self.minimum_elevation = minimum_elevation
+        self.tables = {}
+
+    def table(self, year: int, month: int, day: int) -> tuple:
+        """
+        Angulo cenital y factor de cada minuto del dia
+        """
+        key = (int(year), int(month), int(day))
+        if key not in self.tables:
+            self.tables[key] = solar_position(*key,
+                                              self.hours,
+                                              self.lat,
+                                              self.lon,
+                                              self.zone)
+        return self.tables[key]
+
+    def position(self,
+                 year: int,
+                 month: int,
+                 day: int,
+                 hours: list) -> tuple:
+        """
+        Angulo cenital y factor de una lista de horas, de la tabla del dia
+        si todas las horas estan en ella
+        """
+        hours = array(hours, dtype=float)
+        zenith, factor = self.table(year,
+                                    month,
+                                    day)
+        positions = searchsorted(self.hours,
+                                 hours).clip(0, len(self.hours)-1)
+        if len(self.hours) and (self.hours[positions] == hours).all():
+            return zenith[positions], factor
+        return solar_position(int(year),
+                              int(month),
+                              int(day),
+                              hours,
+                              self.lat,
+                              self.lon,
+                              self.zone)
+
+    def visible(self,
+                year: int,
+                month: int,
+                day: int,
+                hours: list) -> array:
+        """
+        Horas con el sol sobre minimum elevation
+        """
+        if self.minimum_elevation is None:
+            return array([True]*len(hours))
+        zenith, _ = self.position(year,
+                                  month,
+                                  day,
+                                  hours)
+        return zenith < 90-self.minimum_elevation
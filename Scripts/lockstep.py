@@ -0,0 +1,287 @@
+from concurrent.futures import ProcessPoolExecutor
+from parallel import initialize_worker, evaluate_probe, run_search_day
+from pipeline import SMARTS_pipeline
+from numpy import abs, array, errstate, full, isnan, nan, ones, where, zeros
+from tqdm import tqdm
+"""
+Busqueda del AOD de todos los dias al mismo tiempo. En cada ronda se
+evalua el AOD de prueba de cada dia que no ha convergido, todas las
+ejecuciones del modelo de la ronda se reparten juntas entre los procesos, y
+despues se actualizan los intervalos de todos los dias con arreglos. Los
+dias que terminan en una ronda se escriben al terminarla. Se
+obtienen los mismos AOD que con la busqueda de un dia a la vez (sin warm
+start, cada dia inicia en el punto medio del intervalo).
+"""
+
+
+class SMARTS_lockstep:
+    """
+    Estado de la busqueda (binary, secant o illinois) de una lista de dias
+    """
+
+    def __init__(self, model: object, days: list, data_max: list) -> None:
+        """
+        ### inputs
+        + model    ----> Objeto SMARTS_DR (o heredado) ya inicializado
+        + days     ----> Lista con los datos de entrada de cada dia
+        + data_max ----> Medicion maxima de cada dia
+        """
+        self.model = model
+        self.days = days
+        self.data_max = array(data_max, dtype=float)
+        self.RD_lim = model.params["RD limite"]
+        self.RD_delta = model.params["RD delta"]
+        total = len(days)
+        self.lower = full(total, float(model.params["AOD inicial"]))
+        self.upper = full(total, float(model.params["AOD limite"]))
+        self.aod = self.round((self.lower+self.upper)/2)
+        self.RD = full(total, nan)
+        # Secante e Illinois: valor de f en los extremos y punto anterior
+        self.f_lower = full(total, nan)
+        self.f_upper = full(total, nan)
+        self.side = zeros(total)
+        self.aod_last = full(total, nan)
+        self.f_last = full(total, nan)
+        self.best_aod = full(total, nan)
+        self.best_RD = full(total, nan)
+        self.evaluated = [set() for _ in days]
+        self.iteration = zeros(total, dtype=int)
+        # Ejecuciones del modelo de cada dia
+        self.evaluations = zeros(total, dtype=int)
+        self.active = ones(total, dtype=bool)
+        # AOD y RD final de cada dia
+        self.result_aod = full(total, nan)
+        self.result_RD = full(total, nan)
+        # Integrales del dia completo del AOD final (sin peak window)
+        self.integrals = [None]*total
+
+    def round(self, values: array) -> array:
+        # round de Python para obtener los mismos AOD que search_day
+        return array([round(float(value), 3) for value in values])
+
+    def probes(self) -> list:
+        """
+        (dia, AOD, medicion maxima) de cada dia que no ha convergido
+        """
+        return [(self.days[position],
+                 float(self.aod[position]),
+                 float(self.data_max[position]))
+                for position in where(self.active)[0]]
+
+    def update(self, results: list) -> None:
+        """
+        Actualizacion de todos los dias activos con los resultados de la
+        ronda [(stop, RD, integrales)]
+        """
+        positions = where(self.active)[0]
+        stop = zeros(len(self.days), dtype=bool)
+        RD = full(len(self.days), nan)
+        for position, (stop_day, RD_day, integrals) in zip(positions, results):
+            stop[position] = stop_day
+            RD[position] = RD_day
+            self.evaluated[position].add(float(self.aod[position]))
+            if integrals is not None:
+                self.integrals[position] = (float(self.aod[position]),
+                                            integrals)
+        self.RD = where(self.active, RD, self.RD)
+        self.evaluations += self.active
+        if self.model.search == "binary":
+            self.update_binary(stop)
+        else:
+            self.update_secant(stop)
+
+    def update_binary(self, stop: array) -> None:
+        """
+        Mismos pasos que SMARTS_DR.search_binary
+        """
+        active = self.active
+        self.finish(active & stop)
+        moving = active & ~stop
+        high = self.RD > self.RD_lim+self.RD_delta
+        self.lower = where(moving & high, self.aod, self.lower)
+        self.upper = where(moving & ~high, self.aod, self.upper)
+        self.aod = where(moving,
+                         self.round((self.upper+self.lower)/2),
+                         self.aod)
+        close = (self.upper >= self.aod) & (abs(self.RD-self.RD_lim) < self.RD_delta)
+        self.iteration += moving
+        # Al terminar se conserva el ultimo AOD calculado con la ultima RD
+        self.finish(moving & (close | (self.iteration >= 10)))
+
+    def update_secant(self, stop: array) -> None:
+        """
+        Mismos pasos que SMARTS_DR.search_secant
+        """
+        active = self.active
+        f = self.RD-self.RD_lim
+        better = active & (isnan(self.best_RD) | (abs(f) < abs(self.best_RD-self.RD_lim)))
+        self.best_aod = where(better, self.aod, self.best_aod)
+        self.best_RD = where(better, self.RD, self.best_RD)
+        self.finish(active & stop)
+        moving = active & ~stop
+        # Actualizacion del intervalo, Illinois divide el valor del extremo
+        # que se repite
+        positive = moving & (f > 0)
+        negative = moving & (f <= 0)
+        self.f_upper = where(positive & (self.side == 1) & ~isnan(self.f_upper),
+                             self.f_upper/2,
+                             self.f_upper)
+        self.f_lower = where(negative & (self.side == -1) & ~isnan(self.f_lower),
+                             self.f_lower/2,
+                             self.f_lower)
+        self.lower = where(positive, self.aod, self.lower)
+        self.f_lower = where(positive, f, self.f_lower)
+        self.upper = where(negative, self.aod, self.upper)
+        self.f_upper = where(negative, f, self.f_upper)
+        self.side = where(positive, 1, where(negative, -1, self.side))
+        aod = self.secant_aod(f)
+        self.aod_last = where(moving, self.aod, self.aod_last)
+        self.f_last = where(moving, f, self.f_last)
+        self.aod = where(moving, aod, self.aod)
+        self.iteration += moving
+        repeated = array([float(aod) in evaluated
+                          for aod, evaluated in zip(self.aod, self.evaluated)])
+        iterations = self.model.params.get("iterations", 10)
+        ended = moving & (repeated | (self.iteration >= iterations))
+        # Sin convergencia se conserva el AOD con la RD mas cercana
+        self.result_aod = where(ended, self.best_aod, self.result_aod)
+        self.result_RD = where(ended, self.best_RD, self.result_RD)
+        self.active = self.active & ~ended
+
+    def secant_aod(self, f: array) -> array:
+        """
+        Mismos pasos que SMARTS_DR.obtain_secant_aod para todos los dias
+        """
+        delta = self.model.params.get("AOD delta", 0.05)
+        # Primer paso, RD disminuye cuando aumenta el AOD
+        aod = where(f > 0, self.aod+delta, self.aod-delta)
+        # Los dias sin punto anterior o sin intervalo dan nan y no se usan
+        with errstate(divide="ignore", invalid="ignore"):
+            secant = ~isnan(self.f_last) & (self.f_last != f)
+            with_last = self.aod-f*(self.aod-self.aod_last)/(f-self.f_last)
+            aod = where(secant, with_last, aod)
+            if self.model.search == "illinois":
+                bracket = ~isnan(self.f_lower) & ~isnan(self.f_upper)
+                illinois = (self.lower*self.f_upper-self.upper*self.f_lower)/(self.f_upper-self.f_lower)
+                aod = where(bracket, illinois, aod)
+        outside = ~((self.lower < aod) & (aod < self.upper))
+        aod = where(outside, (self.lower+self.upper)/2, aod)
+        return self.round(aod)
+
+    def finish(self, positions: array) -> None:
+        self.result_aod = where(positions, self.aod, self.result_aod)
+        self.result_RD = where(positions, self.RD, self.result_RD)
+        self.active = self.active & ~positions
+
+    def run(self, evaluate: callable, write: callable) -> None:
+        """
+        Rondas de la busqueda hasta que todos los dias terminan
+        ### inputs:
+        + evaluate ----> Funcion que recibe la lista de probes y regresa
+                         [(stop, RD, integrales)] en el mismo orden
+        + write    ----> Funcion que recibe las posiciones de los dias que
+                         terminaron en la ronda
+        """
+        with tqdm(total=len(self.days)) as bar:
+            while self.active.any():
+                results = evaluate(self.probes())
+                active = self.active.copy()
+                self.update(results)
+                write(where(active & ~self.active)[0].tolist())
+                bar.update(len(self.days)-int(self.active.sum())-bar.n)
+                bar.set_postfix(dias=int(self.active.sum()))
+
+
+def search_lockstep(model: object,
+                    days: list,
+                    data_max: list,
+                    path_results: str,
+                    finished: callable = None) -> list:
+    """
+    Busqueda del AOD de una lista de dias en rondas. El dia completo con el
+    AOD final de cada dia se escribe en la ronda en la que termina
+    ### inputs:
+    + model        ----> Objeto SMARTS_DR (o heredado) ya inicializado
+    + days         ----> Lista con los datos de entrada de cada dia
+    + data_max     ----> Medicion maxima de cada dia
+    + path_results ----> Direccion donde se guardan los resultados del modelo
+    + finished     ----> Funcion que recibe (dia, AOD, RD, ejecuciones) de
+                         cada dia escrito
+    ### output:
+    + Lista de (AOD, RD, ejecuciones de la busqueda) de cada dia en el
+      mismo orden que days
+    """
+    search = SMARTS_lockstep(model,
+                             days,
+                             data_max)
+
+    def write(positions: list, run_final: callable) -> None:
+        run_final(obtain_final(model,
+                               search,
+                               positions,
+                               path_results))
+        if finished is None:
+            return
+        for position in positions:
+            finished(days[position],
+                     float(search.result_aod[position]),
+                     float(search.result_RD[position]),
+                     int(search.evaluations[position]))
+
+    workers = model.params.get("workers", 1)
+    if model.params.get("pipeline", False):
+        pipeline = SMARTS_pipeline(model,
+                                   workers)
+        search.run(lambda probes: pipeline.map(lambda model, probe: model.evaluate_probe(probe),
+                                               probes),
+                   lambda positions: write(positions,
+                                           lambda final: pipeline.map(lambda model, arguments: model.run(**arguments),
+                                                                      final)))
+    elif workers > 1:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=initialize_worker,
+                                 initargs=(model,)) as executor:
+            search.run(lambda probes: list(executor.map(evaluate_probe,
+                                                        probes)),
+                       lambda positions: write(positions,
+                                               lambda final: list(executor.map(run_search_day,
+                                                                               final))))
+    else:
+        search.run(lambda probes: [model.evaluate_probe(probe)
+                                   for probe in probes],
+                   lambda positions: write(positions,
+                                           lambda final: [model.run(**arguments)
+                                                          for arguments in final]))
+    return list(zip(search.result_aod.tolist(),
+                    search.result_RD.tolist(),
+                    search.evaluations.tolist()))
+
+
+def obtain_final(model: object,
+                 search: SMARTS_lockstep,
+                 positions: list,
+                 path_results: str) -> list:
+    """
+    Escribe los dias cuyo AOD final se evaluo con el dia completo y regresa
+    los argumentos de SMARTS.run de los demas
+    ### inputs:
+    + positions ----> Posiciones de los dias que terminaron
+    """
+    final = []
+    for position in positions:
+        data_day = search.days[position]
+        aod = float(search.result_aod[position])
+        integrals = search.integrals[position]
+        if integrals is not None and integrals[0] == aod and not model.keep_spectra:
+            model.write_results(data_day["Date"],
+                                path_results,
+                                integrals[1])
+            continue
+        final += [{"day": data_day["Day"],
+                   "month": data_day["Month"],
+                   "year": data_day["Year"],
+                   "o3": data_day["Ozone"],
+                   "aod": aod,
+                   "name": data_day["Date"],
+                   "path": path_results}]
+    return final
@@ -0,0 +1,113 @@
+from numpy import array, load, loadtxt, save
+from os.path import exists, join
+from os import listdir, replace, stat
+from tqdm import tqdm
+import json
+"""
+Archivo binario con todas las mediciones de una estacion. Los archivos
+Mediciones/<Date>.txt se leen una sola vez y se guardan en un arreglo
+(dias, horas) de numpy con un indice por fecha, durante la busqueda cada
+dia se obtiene con un memmap sin abrir ni convertir archivos de texto.
+Como tables.f con los archivos de Gases y Solar, el indice guarda el tamaño
+y la fecha de modificacion de cada archivo y el arreglo se crea de nuevo si
+alguno cambia.
+"""
+
+
+class SMARTS_measurements:
+    """
+    Lectura y creacion de <folder>.npy y <folder>.json en la carpeta de la
+    estacion
+    """
+
+    def __init__(self, station_path: str, folder: str) -> None:
+        """
+        ### inputs
+        + station_path ----> Direccion de los datos de la estacion
+        + folder       ----> Carpeta de las mediciones (Mediciones)
+        """
+        self.path = join(station_path,
+                         folder)
+        self.filename = join(station_path,
+                             f"{folder}.npy")
+        self.filename_index = join(station_path,
+                                   f"{folder}.json")
+        self.values = None
+        self.index = None
+
+    def __getstate__(self) -> dict:
+        # Cada proceso abre su propio memmap
+        state = self.__dict__.copy()
+        state["values"] = None
+        return state
+
+    def ingest(self) -> None:
+        """
+        Lectura de todos los archivos de mediciones de la estacion, todos
+        deben tener las mismas horas
+        """
+        sources = self.sources()
+        files = sorted(sources)
+        hours = None
+        values = []
+        for file in tqdm(files):
+            data = loadtxt(join(self.path, file))
+            if hours is None:
+                hours = data[:, 0]
+            if data.shape[0] != len(hours) or (data[:, 0] != hours).any():
+                raise ValueError(f"{file} no tiene las mismas horas que "
+                                 f"{files[0]}")
+            values += [data[:, 1]]
+        with open(f"{self.filename}.tmp", "wb") as file:
+            save(file,
+                 array(values))
+        replace(f"{self.filename}.tmp",
+                self.filename)
+        index = {"hours": [] if hours is None else hours.tolist(),
+                 "dates": [file[:-4] for file in files],
+                 "sources": sources}
+        with open(self.filename_index, "w") as file:
+            json.dump(index,
+                      file)
+
+    def sources(self) -> dict:
+        """
+        Tamaño y fecha de modificacion de cada archivo de mediciones
+        """
+        sources = {}
+        for file in listdir(self.path):
+            if file.endswith(".txt"):
+                status = stat(join(self.path, file))
+                sources[file] = [status.st_size, status.st_mtime]
+        return sources
+
+    def open(self) -> None:
+        """
+        Lectura del arreglo, se crea de nuevo si no existe o si algun
+        archivo de mediciones se agrego, elimino o modifico
+        """
+        index = None
+        if exists(self.filename) and exists(self.filename_index):
+            with open(self.filename_index, "r") as file:
+                index = json.load(file)
+        if index is None or index.get("sources") != self.sources():
+            self.ingest()
+            with open(self.filename_index, "r") as file:
+                index = json.load(file)
+        self.index = {date: row
+                      for row, date in enumerate(index["dates"])}
+        self.values = load(self.filename,
+                           mmap_mode="r")
+
+    def read(self, date: str) -> array:
+        """
+        Mediciones de cada hora de un dia, los dias agregados despues de
+        crear el archivo se leen del archivo de texto
+        """
+        if self.values is None:
+            self.open()
+        row = self.index.get(str(date))
+        if row is None:
+            return loadtxt(join(self.path, f"{date}.txt"),
+                           usecols=1)
+        return self.values[row]
@@ -0,0 +1,174 @@
+from contextlib import contextmanager
+from collections import Counter, defaultdict
+from time import perf_counter, time
+from os.path import exists
+from threading import Lock
+import cProfile
+import json
+import os
+"""
+Metricas de ejecucion del modelo SMARTS. Cada evento (ejecucion del modelo,
+etapa, dia, busqueda, dias omitidos) se envia a las funciones registradas
+con add_hook, se acumula en memoria y, si se da un archivo, se agrega como
+una linea JSON. Con varios procesos cada uno agrega sus eventos al mismo
+archivo y el resumen se calcula a partir de el.
+"""
+
+
+class SMARTS_metrics:
+    """
+    Registro de eventos y resumen de una ejecucion
+    """
+
+    def __init__(self, filename: str = None, profile: str = None) -> None:
+        """
+        ### inputs
+        + filename ----> Archivo JSON lines de los eventos, None para solo
+                         acumularlos en memoria
+        + profile  ----> Archivo de estadisticas de cProfile, None para no
+                         perfilar
+        """
+        self.filename = filename
+        self.profile_filename = profile
+        self.hooks = []
+        self.records = []
+        self.lock = Lock()
+
+    def __getstate__(self) -> dict:
+        # Los procesos reciben una copia sin hooks ni eventos, sus eventos
+        # solo se escriben en el archivo
+        state = self.__dict__.copy()
+        state["hooks"] = []
+        state["records"] = []
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.lock = Lock()
+
+    def add_hook(self, hook: callable) -> None:
+        """
+        Registra una funcion que recibe cada evento como diccionario
+        """
+        self.hooks += [hook]
+
+    def emit(self, event: str, **values) -> None:
+        """
+        Envio de un evento a los hooks, a la memoria y al archivo
+        """
+        record = {"event": event,
+                  "time": time(),
+                  "pid": os.getpid(),
+                  **values}
+        with self.lock:
+            self.records += [record]
+        for hook in self.hooks:
+            hook(record)
+        if self.filename is None:
+            return
+        # Una sola escritura con O_APPEND para que varios procesos puedan
+        # escribir en el mismo archivo
+        descriptor = os.open(self.filename,
+                             os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+                             0o644)
+        try:
+            os.write(descriptor,
+                     f"{json.dumps(record, default=str)}\n".encode())
+        finally:
+            os.close(descriptor)
+
+    @contextmanager
+    def stage(self, name: str, **values):
+        """
+        Tiempo de ejecucion de una etapa
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.emit("stage",
+                      name=name,
+                      seconds=perf_counter()-start,
+                      **values)
+
+    @contextmanager
+    def profile(self):
+        """
+        Perfil de cProfile de la ejecucion si se dio un archivo
+        """
+        if self.profile_filename is None:
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(self.profile_filename)
+
+    def read(self) -> list:
+        """
+        Eventos de todos los procesos si hay archivo, si no los de memoria
+        """
+        if self.filename is None or not exists(self.filename):
+            return list(self.records)
+        with open(self.filename, "r") as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    def summary(self, since: float = None) -> dict:
+        """
+        Resumen de los eventos
+        ### inputs:
+        + since ----> Solo los eventos posteriores a este tiempo (time())
+        """
+        records = self.read()
+        if since is not None:
+            records = [record for record in records
+                       if record["time"] >= since]
+        runs = [record for record in records
+                if record["event"] == "run"]
+        stages = defaultdict(float)
+        for record in records:
+            if record["event"] == "stage":
+                stages[record["name"]] += record["seconds"]
+        searches = [record for record in records
+                    if record["event"] == "search"]
+        days = [record for record in records
+                if record["event"] in ["day", "search"]]
+        iterations = Counter(record["iterations"] for record in searches)
+        return {"model runs": sum(not record["cached"] for record in runs),
+                "cache hits": sum(record["cached"] for record in runs),
+                "records": sum(record["records"] for record in runs),
+                "skipped days": sum(record["days"] for record in records
+                                    if record["event"] == "skip"),
+                "days": len(days),
+                "seconds per day": (sum(record["seconds"] for record in days)/len(days)
+                                    if days else 0),
+                "stage seconds": dict(stages),
+                "iterations": dict(sorted(iterations.items())),
+                "capped days": [record["name"] for record in searches
+                                if record["capped"]],
+                "slowest days": [(record["name"], round(record["seconds"], 2))
+                                 for record in sorted(days,
+                                                      key=lambda record: -record["seconds"])[:5]]}
+
+    def report(self, since: float = None) -> str:
+        """
+        Resumen como texto
+        """
+        summary = self.summary(since)
+        lines = ["Ejecuciones del modelo: {} (cache: {}), registros: {}".format(summary["model runs"],
+                                                                              summary["cache hits"],
+                                                                              summary["records"]),
+                 "Dias: {}, omitidos: {}, {:.2f} s por dia".format(summary["days"],
+                                                                   summary["skipped days"],
+                                                                   summary["seconds per day"])]
+        lines += ["Etapa {}: {:.2f} s".format(name, seconds)
+                  for name, seconds in summary["stage seconds"].items()]
+        if summary["iterations"]:
+            lines += ["Iteraciones por dia: {}".format(summary["iterations"]),
+                      "Dias en el limite de iteraciones: {}".format(summary["capped days"])]
+        lines += ["Dias mas lentos: {}".format(summary["slowest days"])]
+        return "\n".join(lines)
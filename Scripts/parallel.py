@@ -0,0 +1,126 @@
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+"""
+Funciones para distribuir las ejecuciones del modelo SMARTS en varios
+procesos. Cada proceso recibe su propia copia del modelo y cada ejecucion
+se realiza en una carpeta temporal aislada.
+"""
+model = None
+
+
+def initialize_worker(model_worker: object) -> None:
+    """
+    Inicializacion del modelo dentro de cada proceso
+    """
+    global model
+    model = model_worker
+    model.scratch = True
+
+
+def run_day(arguments: dict) -> str:
+    """
+    Ejecucion del modelo SMARTS para un dia dentro de un proceso
+    """
+    model.run_day(arguments)
+    return arguments["name"]
+
+
+def search_day(arguments: tuple) -> list:
+    """
+    Busqueda del AOD de un dia dentro de un proceso
+    """
+    return model.search_day(*arguments)
+
+
+def evaluate_probe(probe: tuple) -> tuple:
+    """
+    Evaluacion de un AOD de un dia de la busqueda lockstep dentro de un proceso
+    """
+    return model.evaluate_probe(probe)
+
+
+def run_search_day(arguments: dict) -> None:
+    """
+    Ejecucion del dia completo con el AOD final dentro de un proceso
+    """
+    model.run(**arguments)
+
+
+def run_zeniths(arguments: tuple) -> list:
+    """
+    Ejecucion de una fila de la tabla del modo surrogate dentro de un proceso
+    """
+    return model.run_zeniths(*arguments)
+
+
+def run_days(model: object,
+             days: list,
+             workers: int) -> None:
+    """
+    Ejecucion del modelo SMARTS para una lista de dias en paralelo
+    ### inputs:
+    + model   ----> Objeto SMARTS (o heredado) ya inicializado
+    + days    ----> Lista de argumentos de SMARTS.run para cada dia
+    + workers ----> Número de procesos
+    """
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=initialize_worker,
+                             initargs=(model,)) as executor:
+        for _ in tqdm(executor.map(run_day, days),
+                      total=len(days)):
+            pass
+
+
+def search_days(model: object,
+                days: list,
+                station_path: str,
+                path_results: str,
+                workers: int) -> list:
+    """
+    Busqueda del AOD de una lista de dias en paralelo
+    ### inputs:
+    + model        ----> Objeto SMARTS_DR (o heredado) ya inicializado
+    + days         ----> Lista con los datos de entrada de cada dia
+    + station_path ----> Direccion de los datos de la estacion
+    + path_results ----> Direccion donde se guardan los resultados del modelo
+    + workers      ----> Número de procesos
+    ### output:
+    + Lista con los resultados de cada dia en el mismo orden que days
+    """
+    arguments = [(data_day, station_path, path_results)
+                 for data_day in days]
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=initialize_worker,
+                             initargs=(model,)) as executor:
+        results = list(tqdm(executor.map(search_day, arguments),
+                            total=len(days)))
+    return results
+
+
+def run_table(model: object,
+              zeniths: list,
+              rows: list,
+              workers: int) -> list:
+    """
+    Calculo de la tabla del modo surrogate en paralelo
+    ### inputs:
+    + model   ----> Objeto SMARTS (o heredado) ya inicializado
+    + zeniths ----> Angulos cenitales de la tabla
+    + rows    ----> Lista de (ozono, AOD) de cada fila
+    + workers ----> Número de procesos
+    """
+    arguments = [(zeniths, o3, aod) for o3, aod in rows]
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=initialize_worker,
+                             initargs=(model,)) as executor:
+        results = list(tqdm(executor.map(run_zeniths, arguments),
+                            total=len(arguments)))
+    return results
+
+
+def run_deck(arguments: tuple) -> list:
+    """
+    Ejecucion de un input del modo ensemble dentro de un proceso
+    """
+    return model.run_deck(*arguments)
+
@@ -0,0 +1,136 @@
+from concurrent.futures import ThreadPoolExecutor
+from asyncio.subprocess import DEVNULL
+from copy import copy
+from tqdm import tqdm
+import asyncio
+import os
+"""
+Ejecucion asincrona del modelo SMARTS. Un ciclo de asyncio mantiene hasta
+workers procesos de smarts.out ejecutandose mientras que la escritura de los
+inputs, la lectura de los resultados y la escritura de cada dia se realizan
+en hilos, cada uno con su propia copia del modelo. Asi la lectura y
+escritura de un dia ocurre mientras el modelo calcula los siguientes.
+"""
+
+
+class SMARTS_pipeline:
+    """
+    Ejecucion de los dias de un modelo SMARTS (o heredado) con procesos
+    asincronos de smarts.out
+    """
+
+    def __init__(self,
+                 model: object,
+                 workers: int,
+                 queue: int = None) -> None:
+        """
+        ### inputs
+        + model   ----> Objeto SMARTS (o heredado) ya inicializado
+        + workers ----> Número maximo de procesos de smarts.out al mismo tiempo
+        + queue   ----> Número de dias en proceso al mismo tiempo, por
+                        defecto el doble de workers
+        """
+        if model.engine is not None:
+            raise ValueError("El pipeline ejecuta smarts.out en subprocesos, "
+                             "usar backend executable")
+        self.model = model
+        self.workers = workers
+        self.queue = queue or 2*workers
+        self.loop = None
+        self.semaphore = None
+
+    def obtain_model(self) -> object:
+        """
+        Copia del modelo para un hilo, cada ejecucion usa su propia carpeta
+        temporal y su propia conexion al cache
+        """
+        model = copy(self.model)
+        model.scratch = True
+        model.pipeline = self
+        if model.cache is not None:
+            model.cache = copy(model.cache)
+        return model
+
+    def execute(self, path_run: str) -> None:
+        """
+        Ejecucion de smarts.out en path_run desde un hilo, espera a que el
+        ciclo de asyncio termine el proceso
+        """
+        future = asyncio.run_coroutine_threadsafe(self.execute_async(path_run),
+                                                  self.loop)
+        future.result()
+
+    async def execute_async(self, path_run: str) -> None:
+        environment = os.environ.copy()
+        if self.model.binary:
+            # Archivo de resultados en binario (ver smarts.f)
+            environment["SMARTS_BINARY"] = "1"
+        async with self.semaphore:
+            process = await asyncio.create_subprocess_exec("./smarts.out",
+                                                           cwd=path_run,
+                                                           env=environment,
+                                                           stdin=DEVNULL,
+                                                           stdout=DEVNULL)
+            await process.wait()
+
+    async def run_async(self, function: callable, items: list) -> list:
+        """
+        Ejecucion de function(model, item) de cada item en hilos, hay a lo
+        mas queue items en proceso al mismo tiempo
+        ### output:
+        + Lista con el resultado de cada item en el mismo orden que items
+        """
+        self.loop = asyncio.get_running_loop()
+        self.semaphore = asyncio.Semaphore(self.workers)
+        models = asyncio.Queue()
+        for _ in range(self.queue):
+            models.put_nowait(self.obtain_model())
+        with ThreadPoolExecutor(max_workers=self.queue) as executor, \
+                tqdm(total=len(items)) as bar:
+            async def run_item(item):
+                model = await models.get()
+                try:
+                    return await self.loop.run_in_executor(executor,
+                                                           function,
+                                                           model,
+                                                           item)
+                finally:
+                    models.put_nowait(model)
+                    bar.update()
+            results = await asyncio.gather(*[run_item(item)
+                                             for item in items])
+        return results
+
+    def map(self, function: callable, items: list) -> list:
+        """
+        Resultado de function(model, item) de cada item
+        """
+        return asyncio.run(self.run_async(function,
+                                          items))
+
+    def run_days(self, days: list) -> None:
+        """
+        Ejecucion del modelo SMARTS para una lista de dias
+        ### inputs:
+        + days ----> Lista de argumentos de SMARTS.run para cada dia
+        """
+        asyncio.run(self.run_async(lambda model, arguments: model.run_day(arguments),
+                                   days))
+
+    def search_days(self,
+                    days: list,
+                    station_path: str,
+                    path_results: str) -> list:
+        """
+        Busqueda del AOD de una lista de dias
+        ### inputs:
+        + days         ----> Lista con los datos de entrada de cada dia
+        + station_path ----> Direccion de los datos de la estacion
+        + path_results ----> Direccion donde se guardan los resultados del modelo
+        ### output:
+        + Lista con los resultados de cada dia en el mismo orden que days
+        """
+        return asyncio.run(self.run_async(lambda model, data_day: model.search_day(data_day,
+                                                                                   station_path,
+                                                                                   path_results),
+                                          days))
@@ -0,0 +1,122 @@
+from numpy import arange, array, concatenate, exp, interp, loadtxt
+try:
+    from scipy.integrate import trapz
+except ImportError:
+    # scipy >= 1.14 solo tiene trapezoid
+    from scipy.integrate import trapezoid as trapz
+from os.path import join
+"""
+Resolucion espectral de los resultados del modelo SMARTS (Card 12a). El
+modelo calcula siempre en su malla propia (0.5 nm hasta 400 nm, 1 nm hasta
+1700 nm y 5 nm despues) y solo escribe una de cada wavelength step
+longitudes de onda. El error de la integral con un paso mas grueso se
+estima con el espectro extraterrestre (Solar/Spctrm_0.dat) atenuado por
+las bandas de absorcion de H2O y O3 (Gases/Abs_H2O.dat, Gases/Abs_O3UV.dat).
+"""
+# Columna de H2O (cm), ozono (atm-cm) y masa de aire del espectro de referencia
+water = 1.4
+ozone = 0.3
+air_mass = 1.5
+# Moleculas por cm2 de una columna de 1 atm-cm
+loschmidt = 2.687e19
+
+
+def model_wavelengths(wavelength_initial: float,
+                      wavelength_final: float) -> array:
+    """
+    Malla de longitudes de onda en la que calcula smarts.out
+    """
+    wavelength = concatenate([arange(280, 400, 0.5),
+                              arange(400, 1701, 1.0),
+                              array([1702.0, 1705.0]),
+                              arange(1710, 4001, 5.0)])
+    return wavelength[(wavelength >= wavelength_initial) &
+                      (wavelength <= wavelength_final)]
+
+
+def output_wavelengths(wavelength: array,
+                       step: float,
+                       wavelength_initial: float,
+                       uv: bool = True) -> array:
+    """
+    Posiciones de las longitudes de onda que escribe smarts.out con un paso
+    de step nm. smarts.f escribe cuando MOD(WVLN-WPMN,INTVL) es 0, WPMN es
+    el minimo de la Card 12a salvo con IUV=1 en la Card 16, que lo cambia a
+    280 nm
+    ### inputs:
+    + wavelength_initial ----> Minimo de la Card 12a
+    + uv                 ----> IUV=1 en la Card 16
+    """
+    start = 280 if uv else wavelength_initial
+    return abs((wavelength-start) % step) <= 1e-4
+
+
+def reference_spectrum(path_model: str, wavelength: array) -> array:
+    """
+    Irradiancia aproximada a nivel del suelo a partir de las tablas del
+    modelo, solo se usa para medir la variabilidad espectral
+    """
+    solar = loadtxt(join(path_model, "Solar", "Spctrm_0.dat"),
+                    skiprows=2)
+    # Spctrm_0.dat tiene las longitudes de onda en decimas de nm
+    irradiance = interp(wavelength,
+                        solar[:, 0]/10,
+                        solar[:, 1])
+    h2o = loadtxt(join(path_model, "Gases", "Abs_H2O.dat"),
+                  skiprows=1,
+                  usecols=(0, 1))
+    o3 = loadtxt(join(path_model, "Gases", "Abs_O3UV.dat"),
+                 skiprows=1,
+                 usecols=(0, 1))
+    tau = water*interp(wavelength, h2o[:, 0], h2o[:, 1], left=0, right=0)
+    tau += ozone*loschmidt*interp(wavelength, o3[:, 0], o3[:, 1], left=0, right=0)
+    return irradiance*exp(-air_mass*tau)
+
+
+def table_error(path_model: str,
+                wavelength_initial: float,
+                wavelength_final: float,
+                step: float,
+                uv: bool = True) -> float:
+    """
+    Error relativo de la integral del espectro de referencia escrito con
+    un paso de step nm respecto al espectro escrito cada 1 nm
+    """
+    wavelength = model_wavelengths(wavelength_initial,
+                                   wavelength_final)
+    spectrum = reference_spectrum(path_model,
+                                  wavelength)
+    fine = output_wavelengths(wavelength,
+                              1,
+                              wavelength_initial,
+                              uv)
+    coarse = output_wavelengths(wavelength,
+                                step,
+                                wavelength_initial,
+                                uv)
+    integral = trapz(spectrum[fine],
+                     wavelength[fine])
+    integral_coarse = trapz(spectrum[coarse],
+                            wavelength[coarse])
+    return abs(integral_coarse-integral)/integral
+
+
+def select_step(path_model: str,
+                wavelength_initial: float,
+                wavelength_final: float,
+                tolerance: float,
+                steps: list = [1, 2, 5, 10, 20],
+                uv: bool = True) -> float:
+    """
+    Paso mas grueso cuyo error relativo estimado no supera tolerance
+    """
+    selected = steps[0]
+    for step in steps:
+        error = table_error(path_model,
+                            wavelength_initial,
+                            wavelength_final,
+                            step,
+                            uv)
+        if error <= tolerance:
+            selected = step
+    return selected
@@ -0,0 +1,279 @@
+from pandas import concat, read_csv
+from os.path import basename, exists, isdir, join
+from shutil import copyfile, rmtree
+from functions import mkdir
+from store import SMARTS_store
+from contextlib import contextmanager
+from threading import Event, Thread
+from hashlib import sha1
+from uuid import uuid4
+from glob import glob
+from time import time
+import os
+"""
+Reparto de los dias (estacion, fecha) entre varios nodos. Cada nodo calcula
+una parte fija de la lista (--shard i/N) o reclama dias de una cola de
+archivos de bloqueo en un sistema de archivos compartido. Los resultados de
+cada nodo se escriben en <carpeta de resultados>/parts/<parte> y
+merge_parts los junta en la carpeta de resultados.
+"""
+
+
+def parse_shard(text: str) -> tuple:
+    """
+    Numero de parte y total de partes de un texto i/N, con i de 1 a N
+    """
+    index, total = [int(value) for value in text.split("/")]
+    if not 1 <= index <= total:
+        raise ValueError(f"La parte {text} debe estar entre 1/{total} y "
+                         f"{total}/{total}")
+    return index, total
+
+
+def select_shard(work: list, index: int, total: int) -> list:
+    """
+    Dias de la parte index de total, los dias se reparten intercalados para
+    que cada parte tenga dias de todas las estaciones y periodos
+    """
+    return work[index-1::total]
+
+
+class SMARTS_queue:
+    """
+    Cola de trabajo con un archivo de bloqueo por dia. Un dia se reclama
+    creando <estacion>/<fecha>.lock con O_EXCL, solo un nodo puede crearlo, y
+    se marca como terminado con <estacion>/<fecha>.done. Cada intento escribe
+    en el bloqueo su propio token, el nodo solo ejecuta el dia si el bloqueo
+    tiene su token. Mientras se calcula un dia el nodo actualiza la fecha de
+    modificacion de su bloqueo (heartbeat), asi un dia largo no se considera
+    abandonado.
+    """
+
+    def __init__(self, path: str, node: str, timeout: float = 3600) -> None:
+        """
+        ### inputs
+        + path    ----> Carpeta de la cola en el sistema de archivos compartido
+        + node    ----> Nombre del nodo, se escribe en cada archivo de bloqueo
+        + timeout ----> Segundos despues de los cuales el bloqueo de un dia
+                        sin terminar se considera abandonado
+        """
+        self.path = path
+        self.node = node
+        self.timeout = timeout
+        # Token de cada dia reclamado por este nodo
+        self.tokens = {}
+        # Archivo .reclaim de cada dia reemplazado por este nodo
+        self.markers = {}
+
+    def filename(self, station: str, date: str, extension: str) -> str:
+        return join(self.path,
+                    station,
+                    f"{date}.{extension}")
+
+    def claim(self, station: str, date: str) -> bool:
+        """
+        Reclama un dia, False si ya esta terminado o lo tiene otro nodo
+        """
+        if exists(self.filename(station, date, "done")):
+            return False
+        filename = self.filename(station, date, "lock")
+        mkdir(join(self.path, station))
+        token = f"{self.node} {uuid4().hex}"
+        try:
+            descriptor = os.open(filename,
+                                 os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+                                 0o644)
+        except FileExistsError:
+            if not self.reclaim(station, date, token):
+                return False
+        else:
+            try:
+                os.write(descriptor,
+                         f"{token}\n".encode())
+            finally:
+                os.close(descriptor)
+        self.tokens[(station, date)] = token
+        return self.owns(station, date)
+
+    def reclaim(self, station: str, date: str, token: str) -> bool:
+        """
+        Reemplaza el bloqueo abandonado de un dia. Solo el nodo que crea con
+        O_EXCL el archivo .reclaim de ese bloqueo (contenido y fecha de
+        modificacion) lo reemplaza. El archivo .reclaim se elimina cuando el
+        dia termina
+        """
+        filename = self.filename(station, date, "lock")
+        try:
+            with open(filename, "r") as file:
+                stale = file.read()
+                modified = os.fstat(file.fileno()).st_mtime
+        except FileNotFoundError:
+            return False
+        if time()-modified <= self.timeout:
+            return False
+        attempt = sha1(f"{stale}{modified}".encode()).hexdigest()[:16]
+        marker = f"{filename}.{attempt}.reclaim"
+        try:
+            descriptor = os.open(marker,
+                                 os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+                                 0o644)
+        except FileExistsError:
+            return False
+        try:
+            os.write(descriptor,
+                     f"{token}\n".encode())
+        finally:
+            os.close(descriptor)
+        # Otro nodo pudo reemplazar el bloqueo y eliminar su .reclaim despues
+        # de que se leyo el bloqueo abandonado
+        try:
+            with open(filename, "r") as file:
+                current = file.read()
+                current_modified = os.fstat(file.fileno()).st_mtime
+        except FileNotFoundError:
+            current, current_modified = None, None
+        if (current, current_modified) != (stale, modified):
+            os.remove(marker)
+            return False
+        self.markers[(station, date)] = marker
+        with open(f"{filename}.{attempt}", "w") as file:
+            file.write(f"{token}\n")
+        os.replace(f"{filename}.{attempt}",
+                   filename)
+        return True
+
+    def owns(self, station: str, date: str) -> bool:
+        """
+        True si el bloqueo del dia tiene el token de este nodo
+        """
+        token = self.tokens.get((station, date))
+        try:
+            with open(self.filename(station, date, "lock"), "r") as file:
+                return token is not None and file.read().strip() == token
+        except FileNotFoundError:
+            return False
+
+    def touch(self, claimed: list) -> None:
+        """
+        Actualiza la fecha de modificacion de los bloqueos de este nodo
+        """
+        for station, date in claimed:
+            if self.owns(station, date):
+                os.utime(self.filename(station, date, "lock"))
+
+    @contextmanager
+    def heartbeat(self, claimed: list):
+        """
+        Actualiza los bloqueos de los dias reclamados cada cuarto de timeout
+        mientras se calculan
+        """
+        stop = Event()
+
+        def beat():
+            while not stop.wait(self.timeout/4):
+                self.touch(claimed)
+
+        thread = Thread(target=beat,
+                        daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def claim_days(self, work: list, size: int) -> list:
+        """
+        Reclama hasta size dias de la lista de (estacion, fecha)
+        """
+        claimed = []
+        for station, date in work:
+            if len(claimed) == size:
+                break
+            if self.claim(station, date):
+                claimed += [(station, date)]
+        return claimed
+
+    def done(self, station: str, date: str) -> None:
+        with open(self.filename(station, date, "done"), "w") as file:
+            file.write(f"{self.node}\n")
+        marker = self.markers.pop((station, date), None)
+        if marker is not None and exists(marker):
+            os.remove(marker)
+
+    def pending(self, work: list) -> list:
+        """
+        Dias de la lista que no se han terminado
+        """
+        return [(station, date) for station, date in work
+                if not exists(self.filename(station, date, "done"))]
+
+
+def merge_parts(path_results: str,
+                checkpoint: str,
+                filename_results: str = None) -> list:
+    """
+    Une los resultados de cada parte en la carpeta de resultados y elimina
+    las carpetas de las partes
+    ### inputs:
+    + path_results     ----> Carpeta de resultados que contiene parts/
+    + checkpoint       ----> Archivo de puntos de control al que se agregan
+                             los de cada parte (mismo nombre en cada parte)
+    + filename_results ----> Archivo csv de resultados de SMARTS_DR al que
+                             se agregan los de cada parte (mismo nombre en
+                             cada parte)
+    ### output:
+    + Lista de las partes unidas
+    """
+    parts = sorted(glob(join(path_results, "parts", "*")))
+    results = []
+    for part in parts:
+        # Almacen columnar de la parte
+        if exists(join(part, "results.json")):
+            store = SMARTS_store(part)
+            SMARTS_store(path_results,
+                         store.station,
+                         store.hours,
+                         store.columns).extend(store.read())
+        # Archivos <Date>.txt de cada dia
+        for filename in glob(join(part, "*.txt")):
+            os.replace(filename,
+                       join(path_results, basename(filename)))
+        # Espectros, los ejes son iguales en todas las partes
+        path_spectra = join(part, "Spectra")
+        if isdir(path_spectra):
+            mkdir(join(path_results, "Spectra"))
+            for filename in glob(join(path_spectra, "*")):
+                target = join(path_results, "Spectra", basename(filename))
+                if basename(filename) in ["hours.npy", "wavelength.npy"]:
+                    if not exists(target):
+                        copyfile(filename,
+                                 target)
+                    continue
+                os.replace(filename,
+                           target)
+        # Puntos de control de la parte, sus lineas se agregan al final
+        filename = join(part, basename(checkpoint))
+        if exists(filename):
+            with open(filename, "r") as file:
+                lines = file.read()
+            with open(checkpoint, "a") as file:
+                file.write(lines)
+        if filename_results is not None:
+            filename = join(part, basename(filename_results))
+            if exists(filename):
+                results += [read_csv(filename)]
+        rmtree(part)
+    if parts:
+        os.rmdir(join(path_results, "parts"))
+    if results:
+        if exists(filename_results):
+            results = [read_csv(filename_results)]+results
+        # Si un dia se calculo en varias partes se conserva el ultimo
+        data = concat(results)
+        data = data.drop_duplicates("Date",
+                                    keep="last")
+        data = data.sort_values("Date")
+        data.to_csv(filename_results,
+                    index=False)
+    return parts
@@ -0,0 +1,95 @@
+from numpy import array, array_equal, load, save, savez_compressed
+from os.path import exists, join
+from functions import mkdir
+from os import replace
+"""
+Espectros completos de cada minuto del modelo SMARTS. Cada dia se guarda en
+un arreglo (minutos, longitudes de onda) en float32 o float16, sin comprimir
+(<Date>.npy, se lee con memmap) o comprimido (<Date>.npz). Las longitudes de
+onda y las horas se guardan una sola vez por carpeta.
+"""
+
+
+class SMARTS_spectra:
+    """
+    Lectura y escritura de los espectros de una carpeta de resultados
+    """
+
+    def __init__(self,
+                 path: str,
+                 dtype: str = "float32",
+                 compress: bool = False) -> None:
+        """
+        ### inputs
+        + path     ----> Carpeta de los espectros
+        + dtype    ----> float32 o float16
+        + compress ----> Guarda cada dia comprimido (.npz) en lugar de .npy
+        """
+        self.path = path
+        self.dtype = dtype
+        self.compress = compress
+
+    def write_axis(self, name: str, values: array) -> None:
+        """
+        Escritura de un eje, si ya existe debe ser igual
+        """
+        filename = join(self.path,
+                        f"{name}.npy")
+        if exists(filename):
+            if not array_equal(load(filename), values):
+                raise ValueError(f"{filename} es diferente, usar otra "
+                                 "carpeta de espectros")
+            return
+        self.save(filename,
+                  values)
+
+    def save(self, filename: str, values: array) -> None:
+        # Se escribe en un archivo temporal para no dejar archivos incompletos
+        with open(f"{filename}.tmp", "wb") as file:
+            if filename.endswith(".npz"):
+                savez_compressed(file,
+                                 irradiance=values)
+            else:
+                save(file,
+                     values)
+        replace(f"{filename}.tmp",
+                filename)
+
+    def write(self,
+              name: str,
+              hours: list,
+              wavelength: array,
+              irradiance: array) -> None:
+        """
+        Escritura de los espectros de un dia
+        ### inputs
+        + name       ----> Fecha del dia
+        + hours      ----> Hora con decimal de cada minuto
+        + wavelength ----> Longitudes de onda
+        + irradiance ----> arreglo (minutos, longitudes de onda)
+        """
+        mkdir(self.path)
+        self.write_axis("hours",
+                        array(hours))
+        self.write_axis("wavelength",
+                        array(wavelength))
+        extension = "npz" if self.compress else "npy"
+        self.save(join(self.path, f"{name}.{extension}"),
+                  irradiance.astype(self.dtype))
+
+    def read(self, name: str) -> tuple:
+        """
+        Espectros de un dia, sin copiarlos a memoria si no estan comprimidos
+        ### output:
+        + hours, wavelength, irradiance
+        """
+        hours = load(join(self.path, "hours.npy"))
+        wavelength = load(join(self.path, "wavelength.npy"))
+        filename = join(self.path,
+                        f"{name}.npy")
+        if exists(filename):
+            irradiance = load(filename,
+                              mmap_mode="r")
+        else:
+            irradiance = load(join(self.path, f"{name}.npz"))["irradiance"]
+        return hours, wavelength, irradiance
@@ -0,0 +1,159 @@
+from numpy import array, dtype, memmap, unique
+from pandas import DataFrame, MultiIndex
+from os.path import exists, getsize, join
+from functions import mkdir
+import json
+import os
+"""
+Almacen columnar de los resultados del modelo SMARTS. Todos los dias de una
+carpeta de resultados se guardan en un solo archivo binario con un registro
+de tamaño fijo por dia (fecha e integral de cada minuto), los registros se
+agregan al final y se leen con un memmap sin convertir texto.
+"""
+
+
+class SMARTS_store:
+    """
+    Lectura y escritura de results.bin y results.json de una carpeta de
+    resultados
+    """
+
+    def __init__(self,
+                 path: str,
+                 station: str = None,
+                 hours: list = None,
+                 columns: list = None) -> None:
+        """
+        ### inputs
+        + path    ----> Carpeta de resultados
+        + station ----> Estacion de los resultados
+        + hours   ----> Hora con decimal de cada minuto de los registros,
+                        si no se da se lee de results.json
+        + columns ----> Irradiancia total y bandas de cada minuto
+        """
+        self.filename = join(path,
+                             "results.bin")
+        self.filename_info = join(path,
+                                  "results.json")
+        if exists(self.filename_info):
+            with open(self.filename_info, "r") as file:
+                info = json.load(file)
+            info.setdefault("columns", ["integral"])
+            if hours is not None and list(hours) != info["hours"]:
+                raise ValueError(f"{self.filename} tiene otras horas, "
+                                 "usar otra carpeta de resultados")
+            if columns is not None and list(columns) != info["columns"]:
+                raise ValueError(f"{self.filename} tiene otras bandas, "
+                                 "usar otra carpeta de resultados")
+        else:
+            info = {"station": station,
+                    "hours": list(hours),
+                    "columns": list(columns or ["integral"])}
+            mkdir(path)
+            with open(self.filename_info, "w") as file:
+                json.dump(info,
+                          file)
+        self.station = info["station"]
+        self.hours = info["hours"]
+        self.columns = info["columns"]
+        # Con bandas cada minuto tiene una columna por banda
+        shape = (len(self.hours),)
+        if len(self.columns) > 1:
+            shape = (len(self.hours), len(self.columns))
+        self.dtype = dtype([("date", "S16"),
+                            ("integrals", "f4", shape)])
+
+    def append(self, date: str, integrals: list) -> None:
+        """
+        Agrega el registro de un dia, una sola escritura con O_APPEND para
+        que varios procesos puedan escribir en el mismo archivo
+        """
+        values = array([[float(value) for value in str(integral).split()]
+                        for integral in integrals])
+        record = array([(str(date), values.reshape(self.dtype["integrals"].shape))],
+                       dtype=self.dtype)
+        descriptor = os.open(self.filename,
+                             os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+                             0o644)
+        try:
+            os.write(descriptor,
+                     record.tobytes())
+        finally:
+            os.close(descriptor)
+
+    def extend(self, records: array) -> None:
+        """
+        Agrega registros leidos de otro almacen con las mismas horas y
+        bandas, en una sola escritura
+        """
+        descriptor = os.open(self.filename,
+                             os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+                             0o644)
+        try:
+            os.write(descriptor,
+                     array(records, dtype=self.dtype).tobytes())
+        finally:
+            os.close(descriptor)
+
+    def read(self) -> array:
+        """
+        Registros del archivo sin copiarlos a memoria, si un dia se calculo
+        varias veces aparece varias veces
+        """
+        if not exists(self.filename):
+            return array([], dtype=self.dtype)
+        # Un registro incompleto al final del archivo se ignora
+        total = getsize(self.filename)//self.dtype.itemsize
+        if total == 0:
+            return array([], dtype=self.dtype)
+        return memmap(self.filename,
+                      dtype=self.dtype,
+                      mode="r",
+                      shape=(total,))
+
+    def dates(self) -> set:
+        return {date.decode() for date in self.read()["date"]}
+
+    def to_frame(self) -> DataFrame:
+        """
+        Resultados como DataFrame indexado por estacion y fecha con una
+        columna por minuto (por banda y minuto si hay bandas), se conserva
+        el ultimo registro de cada dia
+        """
+        records = self.read()
+        dates = records["date"][::-1]
+        _, last = unique(dates,
+                         return_index=True)
+        positions = sorted(len(records)-1-last)
+        index = MultiIndex.from_arrays([[self.station]*len(positions),
+                                        [records["date"][position].decode()
+                                         for position in positions]],
+                                       names=["station", "Date"])
+        if len(self.columns) == 1:
+            return DataFrame(records["integrals"][positions],
+                             index=index,
+                             columns=self.hours)
+        values = records["integrals"][positions].transpose(0, 2, 1)
+        columns = MultiIndex.from_product([self.columns,
+                                           self.hours])
+        return DataFrame(values.reshape(len(positions), -1),
+                         index=index,
+                         columns=columns)
+
+    def export_text(self, path: str) -> None:
+        """
+        Escritura de un archivo <Date>.txt por dia con el formato anterior
+        """
+        records = self.read()
+        dates = [date.decode() for date in records["date"]]
+        # Se conserva el ultimo registro de cada dia
+        positions = {date: position for position, date in enumerate(dates)}
+        for date, position in positions.items():
+            integrals = records["integrals"][position].reshape(len(self.hours),
+                                                               -1)
+            with open(join(path, f"{date}.txt"), "w") as file:
+                for hour, values in zip(self.hours, integrals):
+                    values = [str(round(float(values[0])))] + \
+                        [str(round(float(value), 2)) for value in values[1:]]
+                    file.write("{} {}\n".format(hour,
+                                                " ".join(values)))
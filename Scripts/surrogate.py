@@ -0,0 +1,211 @@
+from numpy import arange, array, column_stack, full, load, savez, zeros
+from scipy.interpolate import RegularGridInterpolator
+from functions import file_hash
+from numpy.random import default_rng
+from os.path import exists, join
+from parallel import run_table
+from datetime import date
+from hashlib import sha1
+from os import listdir, replace, stat
+from tqdm import tqdm
+import json
+"""
+Modo surrogate del modelo SMARTS. Para una estacion, igas y modelo de
+aerosoles la irradiancia global integrada solo depende del angulo cenital,
+el AOD y el ozono, ademas de la distancia Tierra-Sol que la escala. La
+tabla se calcula una sola vez con smarts.out (Card 17 con IMASS=0) y las
+consultas se resuelven por interpolacion.
+"""
+
+
+class SMARTS_table:
+    """
+    Tabla de integrales por angulo cenital, AOD y ozono guardada en disco
+    """
+
+    def __init__(self, model: object) -> None:
+        """
+        ### inputs
+        + model ----> Objeto SMARTS (o heredado) ya inicializado
+        ### params
+        + file table       ----> Archivo .npz de la tabla
+        + table zenith     ----> [inicial, final, paso] del angulo cenital
+        + table AOD        ----> [inicial, final, paso] del AOD
+        + table ozone      ----> [inicial, final, paso] del ozono
+        + table method     ----> Interpolacion de scipy (linear, cubic, ...)
+        + table validation ----> Ejecuciones directas para estimar el error
+        """
+        parameters = model.params
+        self.model = model
+        self.filename = parameters.get("file table",
+                                       f"SMARTS_table_{model.station}.npz")
+        self.zenith = self.obtain_axis(parameters.get("table zenith",
+                                                      [0, 88, 2]))
+        self.aod = self.obtain_axis(parameters.get("table AOD",
+                                                   [0, 1, 0.025]))
+        self.ozone = self.obtain_axis(parameters.get("table ozone",
+                                                     [200, 400, 25]))
+        self.method = parameters.get("table method", "linear")
+        self.signature = self.obtain_signature()
+        if not self.load():
+            self.build()
+            self.validate(parameters.get("table validation", 20))
+            self.save()
+        self.build_interpolator()
+
+    def build_interpolator(self) -> None:
+        # Fuera de la tabla se extrapola linealmente
+        self.interpolator = RegularGridInterpolator((self.zenith,
+                                                     self.aod,
+                                                     self.ozone),
+                                                    self.values,
+                                                    method=self.method,
+                                                    bounds_error=False,
+                                                    fill_value=None)
+
+    def obtain_axis(self, limits: list) -> array:
+        start, final, step = limits
+        return arange(start, final+step/2, step).round(6)
+
+    def obtain_signature(self) -> str:
+        """
+        Firma de las cards fijas del input, de los ejes de la tabla, del
+        modelo que se ejecuta (smarts.out o smarts_engine) y de las tablas de
+        Gases y Solar, si alguno cambia la tabla se calcula de nuevo
+        """
+        filename = self.model.model_filename()
+        model_id = file_hash(filename) if exists(filename) else ""
+        text = json.dumps([self.model.template,
+                           self.zenith.tolist(),
+                           self.aod.tolist(),
+                           self.ozone.tolist(),
+                           model_id,
+                           self.obtain_stamps()])
+        return sha1(text.encode()).hexdigest()
+
+    def obtain_stamps(self) -> dict:
+        """
+        Tamaño y fecha de modificacion de las tablas de Gases y Solar, en
+        texto (.dat) y convertidas con make tables (.bin)
+        """
+        stamps = {}
+        for folder in ["Gases", "Solar"]:
+            path = join(self.model.path_model,
+                        folder)
+            if not exists(path):
+                continue
+            for file in sorted(listdir(path)):
+                if file.endswith((".dat", ".bin")):
+                    status = stat(join(path, file))
+                    stamps[f"{folder}/{file}"] = [status.st_size,
+                                                  status.st_mtime]
+        return stamps
+
+    def load(self) -> bool:
+        """
+        Lectura de la tabla, solo si se calculo con la misma firma
+        """
+        if not exists(self.filename):
+            return False
+        data = load(self.filename)
+        if str(data["signature"]) != self.signature:
+            return False
+        self.values = data["values"]
+        self.errors = json.loads(str(data["errors"]))
+        return True
+
+    def save(self) -> None:
+        with open(f"{self.filename}.tmp", "wb") as file:
+            savez(file,
+                  values=self.values,
+                  zenith=self.zenith,
+                  aod=self.aod,
+                  ozone=self.ozone,
+                  signature=array(self.signature),
+                  errors=array(json.dumps(self.errors)))
+        replace(f"{self.filename}.tmp",
+                self.filename)
+
+    def build(self) -> None:
+        """
+        Ejecucion de smarts.out con todos los angulos cenitales en una sola
+        llamada por cada par de AOD y ozono
+        """
+        rows = [(ozone, aod)
+                for aod in self.aod
+                for ozone in self.ozone]
+        zeniths = self.zenith.tolist()
+        workers = self.model.params.get("workers", 1)
+        if workers > 1:
+            results = run_table(self.model,
+                                zeniths,
+                                rows,
+                                workers)
+        else:
+            results = [self.model.run_zeniths(zeniths,
+                                              ozone,
+                                              aod)
+                       for ozone, aod in tqdm(rows)]
+        self.values = zeros((len(self.zenith),
+                             len(self.aod),
+                             len(self.ozone)))
+        for (ozone, aod), integrals in zip(rows, results):
+            i = self.aod.tolist().index(aod)
+            j = self.ozone.tolist().index(ozone)
+            self.values[:, i, j] = integrals
+
+    def validate(self, samples: int) -> None:
+        """
+        Error de la tabla respecto a ejecuciones directas del modelo en
+        fechas, horas, AOD y ozono aleatorios, en W/m2
+        """
+        parameters = self.model.params
+        generator = default_rng(0)
+        records = []
+        for _ in range(samples):
+            day = date.fromordinal(date(2015, 1, 1).toordinal() +
+                                   int(generator.integers(365)))
+            hour = round(generator.uniform(parameters["hour initial"],
+                                           parameters["hour final"]), 4)
+            aod = round(generator.uniform(self.aod[0],
+                                          self.aod[-1]), 3)
+            ozone = round(generator.uniform(self.ozone[0],
+                                            self.ozone[-1]), 1)
+            records += [(day.year, day.month, day.day, hour, ozone, aod)]
+        self.build_interpolator()
+        direct = array(self.model.run_records(records),
+                       dtype=float)
+        table = array([self.integrals(day, month, year, [hour], ozone, aod)[0]
+                       for year, month, day, hour, ozone, aod in records],
+                      dtype=float)
+        errors = abs(table-direct)
+        self.errors = {"samples": samples,
+                       "max": float(errors.max()) if samples else 0.0,
+                       "mean": float(errors.mean()) if samples else 0.0}
+        print("Error de la tabla respecto al modelo: max {:.1f} W/m2, promedio {:.1f} W/m2".format(
+            self.errors["max"],
+            self.errors["mean"]))
+
+    def integrals(self,
+                  day: int,
+                  month: int,
+                  year: int,
+                  hours: list,
+                  o3: float,
+                  aod: float) -> list:
+        """
+        Integrales de cada hora del dia a partir de la tabla, con el mismo
+        formato que SMARTS.run_hours
+        """
+        zenith, factor = self.model.geometry.position(year,
+                                                      month,
+                                                      day,
+                                                      hours)
+        points = column_stack([zenith,
+                               full(len(zenith), aod),
+                               full(len(zenith), o3)])
+        integrals = self.interpolator(points)*factor
+        # Sol bajo el horizonte
+        integrals[zenith > 90] = 0
+        integrals = integrals.clip(0)
+        return [str(round(integral)) for integral in integrals]
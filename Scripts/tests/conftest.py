@@ -0,0 +1,71 @@
+from os.path import abspath, dirname, exists, join
+import pytest
+import sys
+"""
+Configuracion de las pruebas. Las pruebas ejecutan smarts.out (make en
+Code/) y se omiten si no esta compilado.
+"""
+path_scripts = dirname(dirname(abspath(__file__)))
+path_data = join(dirname(path_scripts), "Data")
+sys.path.insert(0, path_scripts)
+
+
+@pytest.fixture
+def parameters(tmp_path) -> dict:
+    """
+    Parametros minimos del modelo, cada ejecucion en una carpeta temporal
+    """
+    if not exists(join(path_scripts, "smarts.out")):
+        pytest.skip("smarts.out no esta compilado")
+    return {"path model": path_scripts,
+            "path scratch": str(tmp_path),
+            "scratch": True,
+            "cache": False,
+            "hour initial": 12,
+            "hour final": 12.5,
+            "wavelength initial": 285,
+            "wavelength final": 2800,
+            "igas": 1,
+            "batch": True,
+            "binary output": True}
+
+
+@pytest.fixture
+def stations(tmp_path) -> str:
+    """
+    Carpeta de estaciones con los primeros dias de Data/noreste
+    """
+    from pandas import read_csv
+    from os import makedirs, symlink
+    path = tmp_path / "stations"
+    makedirs(path / "noreste")
+    for name, rows in [("datos.txt", 3), ("Data_found_pristine.csv", 3)]:
+        data = read_csv(join(path_data, "noreste", name))
+        data[:rows].to_csv(path / "noreste" / name,
+                           index=False)
+    symlink(join(path_data, "noreste", "Mediciones"),
+            path / "noreste" / "Mediciones")
+    return str(path)
+
+
+@pytest.fixture
+def parameters_DR(parameters, stations) -> dict:
+    """
+    Parametros de SMARTS_DR con la ventana del maximo
+    """
+    return {**parameters,
+            "path stations": stations,
+            "folder measurements": "Mediciones",
+            "path results": "Results_SMARTS_DR_",
+            "file results": "Data_found_",
+            "file data": "datos.txt",
+            "hour initial": 9,
+            "hour final": 16,
+            "checkpoint": False,
+            "workers": 1,
+            "AOD inicial": 0.01,
+            "AOD limite": 1,
+            "RD limite": 10,
+            "RD delta": 1,
+            "search": "illinois",
+            "peak window": True}
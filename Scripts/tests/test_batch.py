@@ -0,0 +1,23 @@
+from SMARTS_algorithm import SMARTS
+
+
+def test_batch_across_sunrise(parameters):
+    # Todos los minutos se envian al modelo, el input en modo batch inicia
+    # con registros de noche (ERROR #7)
+    parameters = {**parameters,
+                  "hour initial": 7.25,
+                  "hour final": 7.75,
+                  "minimum elevation": None}
+    integrals = {}
+    for batch in [True, False]:
+        model = SMARTS({**parameters,
+                        "batch": batch},
+                       "noreste")
+        integrals[batch] = model.run_hours(11,
+                                           1,
+                                           2015,
+                                           model.obtain_hours(),
+                                           274,
+                                           0.32)
+    assert integrals[True] == integrals[False]
+    assert integrals[True][0] == "0" and integrals[True][-1] != "0"
@@ -0,0 +1,25 @@
+from SMARTS_algorithm import SMARTS
+from functions import file_hash
+from conftest import path_scripts
+from os.path import join
+
+
+def test_cache_default(parameters, tmp_path):
+    # El cache esta activo si no se da "cache": False
+    parameters = {key: value for key, value in parameters.items()
+                  if key != "cache"}
+    parameters["file cache"] = str(tmp_path / "cache.sqlite")
+    integrals = []
+    for _ in range(2):
+        model = SMARTS(parameters,
+                       "noreste")
+        integrals += [model.run_hours(11,
+                                      1,
+                                      2015,
+                                      model.obtain_hours(),
+                                      274,
+                                      0.32)]
+    assert model.model_id == file_hash(join(path_scripts, "smarts.out"))
+    assert integrals[0] == integrals[1]
+    summary = model.metrics.summary()
+    assert summary["model runs"] == 0 and summary["cache hits"] > 0
@@ -0,0 +1,54 @@
+from SMARTS_algorithm import SMARTS
+from store import SMARTS_store
+from functions import mkdir
+from pandas import read_csv
+from os.path import join
+
+
+def run_days(parameters: dict, stations: str) -> list:
+    """
+    Ejecucion de SMARTS_DM para la estacion, regresa los dias calculados
+    """
+    model = SMARTS(parameters,
+                   "noreste")
+    path_results = join(stations, "noreste", parameters["folder results"])
+    data = read_csv(join(stations, "noreste", parameters["file data"]))
+    days = [{"day": data["day"][index],
+             "month": data["month"][index],
+             "year": data["year"][index],
+             "o3": data["ozone"][index],
+             "aod": data["AOD"][index],
+             "name": data["Date"][index],
+             "path": path_results}
+            for index in data.index]
+    days = model.pending_days(days)
+    for day in days:
+        model.run_day(day)
+    return [str(day["name"]) for day in days]
+
+
+def test_resume_changed_input(parameters, stations):
+    parameters = {**parameters,
+                  "path stations": stations,
+                  "file data": "Data_found_pristine.csv",
+                  "folder results": "Results_SMARTS_DM",
+                  "checkpoint": True,
+                  "store": True}
+    mkdir(join(stations, "noreste", parameters["folder results"]))
+    assert len(run_days(parameters, stations)) == 3
+    # Sin cambios no se calcula ningun dia
+    assert run_days(parameters, stations) == []
+    filename = join(stations, "noreste", parameters["file data"])
+    data = read_csv(filename)
+    data.loc[1, "AOD"] += 0.2
+    data.to_csv(filename,
+                index=False)
+    assert run_days(parameters, stations) == [str(data["Date"][1])]
+    store = SMARTS_store(join(stations, "noreste", parameters["folder results"]))
+    results = store.to_frame()
+    assert len(results) == 3
+    # El ultimo registro del dia es el del nuevo AOD
+    records = store.read()
+    changed = [record["integrals"] for record in records
+               if record["date"].decode() == str(data["Date"][1])]
+    assert len(changed) == 2 and (changed[1] < changed[0]).all()
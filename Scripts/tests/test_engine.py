@@ -0,0 +1,42 @@
+from numpy.testing import assert_array_equal
+from SMARTS_algorithm import SMARTS
+import pytest
+
+smarts_engine = pytest.importorskip("smarts_engine")
+
+
+def run_cases(model: SMARTS) -> list:
+    """
+    Varias ejecuciones seguidas del mismo modelo: horas que cruzan el
+    amanecer, angulos cenitales y repeticion de la primera llamada
+    """
+    hours = [7.25+minute/60 for minute in range(0, 30, 3)]
+    results = [model.run_hours(11, 1, 2015, hours, 274, 0.32),
+               model.run_zeniths([10, 45, 80, 95], 300, 0.1),
+               model.run_hours(10, 6, 2016, [12.0, 13.5], 290, 0.5),
+               model.run_hours(11, 1, 2015, hours, 274, 0.32)]
+    return results
+
+
+def test_engine_matches_executable(parameters, tmp_path):
+    # El motor dentro del proceso da los mismos resultados que smarts.out
+    parameters = {**parameters,
+                  "minimum elevation": None,
+                  "bands": {"visible": [380, 780, "VLambda", 683]},
+                  "spectra": True}
+    results = {}
+    spectra = {}
+    for backend in ["executable", "engine"]:
+        model = SMARTS({**parameters,
+                        "backend": backend},
+                       "noreste")
+        results[backend] = run_cases(model)
+        spectra[backend] = model.spectra_records
+    assert results["engine"] == results["executable"]
+    assert results["engine"][0] == results["engine"][3]
+    assert results["engine"][0][0] == "0 0.0"
+    for engine, executable in zip(spectra["engine"], spectra["executable"]):
+        assert engine[:2] == executable[:2]
+        assert_array_equal(engine[2], executable[2])
+    # Sin archivos data.* ni carpetas temporales
+    assert list(tmp_path.iterdir()) == []
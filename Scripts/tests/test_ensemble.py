@@ -0,0 +1,61 @@
+from SMARTS_algorithm import SMARTS
+from ensemble import SMARTS_ensemble
+from numpy import array, loadtxt
+
+
+def test_identity_member(parameters, tmp_path):
+    # Un miembro sin perturbacion da la irradiancia de run_hours
+    model = SMARTS({**parameters,
+                    "ensemble": {"ozone": [0],
+                                 "aod": [0],
+                                 "percentiles": [50]}},
+                   "noreste")
+    ensemble = SMARTS_ensemble(model)
+    assert ensemble.members == [{"ozone": 0, "aod": 0}]
+    arguments = {"day": 11,
+                 "month": 1,
+                 "year": 2015,
+                 "o3": 274,
+                 "aod": 0.32,
+                 "name": "150111",
+                 "path": str(tmp_path)}
+    ensemble.run_days([arguments])
+    data = loadtxt(ensemble.filename(arguments, "txt"),
+                   skiprows=1)
+    integrals = model.run_hours(11,
+                                1,
+                                2015,
+                                model.obtain_hours(),
+                                274,
+                                0.32)
+    assert data[:, 0].tolist() == model.obtain_hours()
+    # run_hours redondea a W/m2 y el ensemble a 0.1 W/m2
+    assert abs(data[:, 1]-array(integrals, dtype=float)).max() <= 0.55
+    assert (data[:, 1] == data[:, 2]).all()
+
+
+def test_signature(parameters, tmp_path):
+    # Un dia se calcula de nuevo solo si cambia la configuracion
+    ensemble_parameters = {"aod": [0, 0.1],
+                           "percentiles": [50]}
+    model = SMARTS({**parameters,
+                    "ensemble": ensemble_parameters},
+                   "noreste")
+    ensemble = SMARTS_ensemble(model)
+    arguments = {"day": 11,
+                 "month": 1,
+                 "year": 2015,
+                 "o3": 274,
+                 "aod": 0.32,
+                 "name": "150111",
+                 "path": str(tmp_path)}
+    assert ensemble.pending_days([arguments]) == [arguments]
+    ensemble.run_days([arguments])
+    assert ensemble.pending_days([arguments]) == []
+    for changes in [{"percentiles": [5, 95]},
+                    {"aod": [0, 0.2]},
+                    {"seed": 1, "aod": ["normal", 0, 0.1], "members": 2}]:
+        model = SMARTS({**parameters,
+                        "ensemble": {**ensemble_parameters, **changes}},
+                       "noreste")
+        assert SMARTS_ensemble(model).pending_days([arguments]) == [arguments]
@@ -0,0 +1,30 @@
+from measurements import SMARTS_measurements
+from numpy import loadtxt, savetxt
+from os.path import join
+from os import makedirs, utime
+
+
+def write_day(path: str, date: str, value: float) -> None:
+    savetxt(join(path, f"{date}.txt"),
+            [[12.0, value], [12.0167, value+1]])
+
+
+def test_archive_rebuilt_on_change(tmp_path):
+    path = str(tmp_path / "Mediciones")
+    makedirs(path)
+    write_day(path, "150111", 900)
+    write_day(path, "150112", 800)
+    measurements = SMARTS_measurements(str(tmp_path),
+                                       "Mediciones")
+    assert measurements.read("150111").tolist() == [900, 901]
+    # Un archivo modificado y uno nuevo
+    write_day(path, "150111", 950)
+    utime(join(path, "150111.txt"), (1, 1))
+    write_day(path, "150113", 700)
+    measurements = SMARTS_measurements(str(tmp_path),
+                                       "Mediciones")
+    measurements.open()
+    assert measurements.read("150111").tolist() == [950, 951]
+    assert sorted(measurements.index) == ["150111", "150112", "150113"]
+    assert measurements.read("150113").tolist() == loadtxt(join(path, "150113.txt"),
+                                                           usecols=1).tolist()
@@ -0,0 +1,26 @@
+from resolution import model_wavelengths, output_wavelengths
+from SMARTS_algorithm import SMARTS
+import pytest
+
+
+@pytest.mark.parametrize("wavelength_initial, step", [(285, 10), (280, 20), (300.5, 5), (285, 2)])
+def test_output_wavelengths(parameters, wavelength_initial, step):
+    # Malla de output_wavelengths igual a la que escribe smarts.out con la
+    # Card 16 del modelo (IUV=1)
+    model = SMARTS({**parameters,
+                    "wavelength initial": wavelength_initial,
+                    "wavelength step": step,
+                    "spectra": True},
+                   "noreste")
+    model.run_hours(11,
+                    1,
+                    2015,
+                    [12.0],
+                    274,
+                    0.32)
+    wavelength = model_wavelengths(wavelength_initial,
+                                   parameters["wavelength final"])
+    expected = wavelength[output_wavelengths(wavelength,
+                                             step,
+                                             wavelength_initial)]
+    assert model.spectra_wavelength.tolist() == expected.tolist()
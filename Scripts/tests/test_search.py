@@ -0,0 +1,92 @@
+from SMARTS_algorithm import SMARTS_DR
+from os.path import exists, join
+from os import listdir
+import pytest
+
+
+def test_warm_start_needs_one_process(parameters_DR):
+    with pytest.raises(ValueError):
+        SMARTS_DR({**parameters_DR,
+                   "warm start": True,
+                   "workers": 2},
+                  "noreste")
+
+
+def test_warm_start_resume(parameters_DR):
+    # Cada dia inicia con el AOD de la fila anterior aunque se haya
+    # resuelto en una ejecucion anterior
+    parameters = {**parameters_DR,
+                  "warm start": True,
+                  "checkpoint": True}
+    complete = SMARTS_DR(parameters.copy(),
+                         "noreste").run_search(["150111", "150112"])
+    parameters["file results"] = "Data_resumed_"
+    SMARTS_DR(parameters.copy(),
+              "noreste").run_search(["150111"])
+    resumed = SMARTS_DR(parameters.copy(),
+                        "noreste").run_search(["150111", "150112"])
+    assert complete[["AOD", "RD"]].values.tolist() == resumed[["AOD", "RD"]].values.tolist()
+
+
+def test_lockstep_equals_day_by_day(parameters_DR):
+    found = SMARTS_DR(parameters_DR.copy(),
+                      "noreste").run_search()
+    model = SMARTS_DR({**parameters_DR,
+                       "lockstep": True,
+                       "checkpoint": True,
+                       "path results": "Results_lockstep_",
+                       "file results": "Data_lockstep_"},
+                      "noreste")
+    path_results = join(parameters_DR["path stations"],
+                        "noreste",
+                        model.params["path results"])
+    # Cada dia se escribe al terminar, antes que los dias de rondas
+    # posteriores
+    written = []
+    model.add_hook(lambda record: written.append((exists(join(path_results,
+                                                              f'{record["name"]}.txt')),
+                                                  len(listdir(path_results))))
+                   if record["event"] == "search" else None)
+    lockstep = model.run_search()
+    assert all(exist for exist, _ in written)
+    assert written[0][1] < len(found)
+    assert found[["AOD", "RD"]].values.tolist() == lockstep[["AOD", "RD"]].values.tolist()
+    checkpoint = model.obtain_checkpoint(join(parameters_DR["path stations"],
+                                              "noreste"),
+                                         model.name_checkpoint())
+    assert sorted(checkpoint.load()) == sorted(str(date) for date in found["Date"])
+
+
+def test_parallel_equals_sequential(parameters_DR):
+    dates = ["150111", "150112"]
+    sequential = SMARTS_DR(parameters_DR.copy(),
+                           "noreste").run_search(dates)
+    parallel = SMARTS_DR({**parameters_DR,
+                          "workers": 2,
+                          "path results": "Results_parallel_",
+                          "file results": "Data_parallel_"},
+                         "noreste").run_search(dates)
+    assert sequential.values.tolist() == parallel.values.tolist()
+
+
+def test_peak_window_equals_full_day(parameters_DR):
+    # La ventana del maximo da el mismo AOD y el mismo dia completo
+    dates = ["150111", "150112"]
+    models = [SMARTS_DR(parameters_DR.copy(),
+                        "noreste"),
+              SMARTS_DR({**parameters_DR,
+                         "peak window": False,
+                         "path results": "Results_full_",
+                         "file results": "Data_full_"},
+                        "noreste")]
+    window, full = [model.run_search(dates) for model in models]
+    assert window.values.tolist() == full.values.tolist()
+    for date in dates:
+        days = []
+        for model in models:
+            with open(join(parameters_DR["path stations"],
+                           "noreste",
+                           model.params["path results"],
+                           f"{date}.txt"), "r") as file:
+                days += [file.read()]
+        assert days[0] == days[1]
@@ -0,0 +1,93 @@
+from shards import SMARTS_queue, merge_parts, select_shard
+from concurrent.futures import ThreadPoolExecutor
+from pandas import DataFrame, read_csv
+from threading import Barrier
+from os.path import exists, join
+from time import sleep, time
+from glob import glob
+import os
+
+
+def test_select_shard():
+    work = [("noreste", str(date)) for date in range(10)]
+    parts = [select_shard(work, index, 3) for index in range(1, 4)]
+    assert sorted(sum(parts, [])) == sorted(work)
+
+
+def test_claim(tmp_path):
+    first = SMARTS_queue(str(tmp_path), "node01", timeout=60)
+    second = SMARTS_queue(str(tmp_path), "node02", timeout=60)
+    assert first.claim("noreste", "150111")
+    assert not second.claim("noreste", "150111")
+    first.done("noreste", "150111")
+    assert not second.claim("noreste", "150111")
+    assert first.pending([("noreste", "150111"), ("noreste", "150112")]) == [("noreste", "150112")]
+
+
+def test_reclaim_stale_lock(tmp_path):
+    # Varios nodos encuentran el mismo bloqueo abandonado, solo uno lo
+    # reemplaza y el nodo anterior ya no es el dueno
+    first = SMARTS_queue(str(tmp_path), "node01", timeout=60)
+    assert first.claim("noreste", "150111")
+    old = time()-120
+    os.utime(first.filename("noreste", "150111", "lock"),
+             (old, old))
+    queues = [SMARTS_queue(str(tmp_path), f"node{index:02d}", timeout=60)
+              for index in range(2, 10)]
+    barrier = Barrier(len(queues))
+
+    def claim(queue):
+        barrier.wait()
+        return queue.claim("noreste", "150111")
+
+    with ThreadPoolExecutor(len(queues)) as executor:
+        claimed = list(executor.map(claim, queues))
+    assert sum(claimed) == 1
+    owner = queues[claimed.index(True)]
+    assert owner.owns("noreste", "150111")
+    assert not first.owns("noreste", "150111")
+
+
+def test_merge_parts(tmp_path):
+    path_results = str(tmp_path / "Results")
+    for part, dates, AOD in [("node01", [150111, 150112], 0.1),
+                             ("node02", [150112, 150113], 0.2)]:
+        path = join(path_results, "parts", part)
+        os.makedirs(path)
+        for date in dates:
+            with open(join(path, f"{date}.txt"), "w") as file:
+                file.write(f"{part}\n")
+        with open(join(path, "checkpoint.jsonl"), "w") as file:
+            file.writelines([f'{{"date": "{date}"}}\n' for date in dates])
+        DataFrame({"Date": dates,
+                   "AOD": [AOD]*len(dates)}).to_csv(join(path, "Data_found.csv"),
+                                                   index=False)
+    parts = merge_parts(path_results,
+                        join(path_results, "checkpoint.jsonl"),
+                        join(path_results, "Data_found.csv"))
+    assert len(parts) == 2
+    assert not exists(join(path_results, "parts"))
+    for date in [150111, 150112, 150113]:
+        assert exists(join(path_results, f"{date}.txt"))
+    with open(join(path_results, "checkpoint.jsonl"), "r") as file:
+        assert len(file.readlines()) == 4
+    # Un dia calculado en dos partes conserva el de la ultima
+    data = read_csv(join(path_results, "Data_found.csv"))
+    assert data["Date"].tolist() == [150111, 150112, 150113]
+    assert data["AOD"].tolist() == [0.1, 0.2, 0.2]
+
+
+def test_reclaim_marker_and_heartbeat(tmp_path):
+    # El archivo .reclaim se elimina al terminar el dia y el heartbeat evita
+    # que otro nodo reclame un dia que se sigue calculando
+    first = SMARTS_queue(str(tmp_path), "node01", timeout=0.4)
+    second = SMARTS_queue(str(tmp_path), "node02", timeout=0.4)
+    assert first.claim("noreste", "150111")
+    with first.heartbeat([("noreste", "150111")]):
+        sleep(1)
+        assert not second.claim("noreste", "150111")
+    sleep(0.5)
+    assert second.claim("noreste", "150111")
+    assert len(glob(join(str(tmp_path), "noreste", "*.reclaim"))) == 1
+    second.done("noreste", "150111")
+    assert not glob(join(str(tmp_path), "noreste", "*.reclaim"))
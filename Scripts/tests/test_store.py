@@ -0,0 +1,69 @@
+from SMARTS_algorithm import SMARTS
+from store import SMARTS_store
+from os.path import exists, join
+from os import makedirs
+
+
+def read_text(filename: str) -> list:
+    with open(filename, "r") as file:
+        return file.read().split()
+
+
+def test_store_round_trip(tmp_path):
+    hours = [12.0, 12.0167, 12.0333]
+    store = SMARTS_store(str(tmp_path),
+                         "noreste",
+                         hours)
+    store.append("150111", ["900", "910", "920"])
+    store.append("150112", ["800", "810", "820"])
+    # Un dia calculado de nuevo conserva el ultimo registro
+    store.append("150111", ["901", "911", "921"])
+    store = SMARTS_store(str(tmp_path))
+    assert store.station == "noreste" and store.hours == hours
+    assert len(store.read()) == 3
+    assert store.dates() == {"150111", "150112"}
+    frame = store.to_frame()
+    assert frame.loc[("noreste", "150111")].tolist() == [901, 911, 921]
+    assert frame.loc[("noreste", "150112")].tolist() == [800, 810, 820]
+    makedirs(tmp_path / "text")
+    store.export_text(str(tmp_path / "text"))
+    assert read_text(tmp_path / "text" / "150111.txt") == ["12.0", "901",
+                                                           "12.0167", "911",
+                                                           "12.0333", "921"]
+
+
+def test_store_bands(tmp_path):
+    store = SMARTS_store(str(tmp_path),
+                         "noreste",
+                         [12.0, 12.0167],
+                         ["integral", "uv"])
+    store.append("150111", ["900 30.25", "910 31.5"])
+    frame = SMARTS_store(str(tmp_path)).to_frame()
+    assert frame.loc[("noreste", "150111"), "uv"].tolist() == [30.25, 31.5]
+
+
+def test_store_text_export(parameters, tmp_path):
+    # El <Date>.txt se escribe con store salvo con "text export": False
+    for text_export in [True, False]:
+        path = str(tmp_path / str(text_export))
+        makedirs(path)
+        model = SMARTS({**parameters,
+                        "store": True,
+                        "text export": text_export},
+                       "noreste")
+        model.run_day({"day": 11,
+                       "month": 1,
+                       "year": 2015,
+                       "o3": 274,
+                       "aod": 0.32,
+                       "name": "150111",
+                       "path": path})
+        store = model.obtain_store(path)
+        assert store.dates() == {"150111"}
+        if text_export:
+            exported = join(path, "exported")
+            makedirs(exported)
+            store.export_text(exported)
+            assert read_text(join(path, "150111.txt")) == read_text(join(exported, "150111.txt"))
+        else:
+            assert not exists(join(path, "150111.txt"))
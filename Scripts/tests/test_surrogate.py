@@ -0,0 +1,76 @@
+from SMARTS_algorithm import SMARTS
+from numpy import array
+
+
+def test_table_build(parameters, tmp_path):
+    parameters = {**parameters,
+                  "surrogate": True,
+                  "file table": str(tmp_path / "table.npz"),
+                  "table zenith": [0, 80, 40],
+                  "table AOD": [0.1, 0.3, 0.2],
+                  "table ozone": [250, 300, 50],
+                  "table validation": 2}
+    model = SMARTS(parameters,
+                   "noreste")
+    assert model.table.values.shape == (3, 2, 2)
+    assert (model.table.values[0] > model.table.values[-1]).all()
+    # Se lee la tabla guardada sin ejecutar el modelo
+    values = model.table.values
+    model = SMARTS(parameters,
+                   "noreste")
+    assert (model.table.values == values).all()
+
+
+def test_table_error(parameters, tmp_path):
+    # Irradiancia interpolada de la tabla contra el modelo en un punto que
+    # no esta en la malla
+    parameters = {**parameters,
+                  "surrogate": True,
+                  "file table": str(tmp_path / "table.npz"),
+                  "table zenith": [30, 70, 5],
+                  "table AOD": [0.1, 0.5, 0.1],
+                  "table ozone": [250, 350, 50],
+                  "table validation": 5}
+    model = SMARTS(parameters,
+                   "noreste")
+    surrogate = array(model.run_hours(11,
+                                      1,
+                                      2015,
+                                      model.obtain_hours(),
+                                      274,
+                                      0.32),
+                      dtype=float)
+    direct = array(SMARTS({**parameters,
+                           "surrogate": False},
+                          "noreste").run_hours(11,
+                                               1,
+                                               2015,
+                                               model.obtain_hours(),
+                                               274,
+                                               0.32),
+                   dtype=float)
+    error = abs(surrogate-direct)/direct
+    assert error.max() < 0.01
+    assert model.table.errors["samples"] == 5
+
+
+def test_table_signature(parameters, tmp_path):
+    # La firma cambia si cambia una tabla de Gases aunque el template y los
+    # ejes sean los mismos
+    parameters = {**parameters,
+                  "surrogate": True,
+                  "file table": str(tmp_path / "table.npz"),
+                  "table zenith": [0, 80, 80],
+                  "table AOD": [0.1, 0.3, 0.2],
+                  "table ozone": [250, 300, 50],
+                  "table validation": 1}
+    model = SMARTS(parameters,
+                   "noreste")
+    (tmp_path / "Gases").mkdir()
+    table = tmp_path / "Gases" / "Abs_O2.dat"
+    table.write_text("1 2\n")
+    model.path_model = str(tmp_path)
+    signature = model.table.obtain_signature()
+    assert model.table.obtain_signature() == signature
+    table.write_text("1 3\n4 5\n")
+    assert model.table.obtain_signature() != signature